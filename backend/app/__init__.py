@@ -5,7 +5,9 @@ from flask_jwt_extended import JWTManager # Import JWTManager
 import os
 from pathlib import Path
 
-db = SQLAlchemy()
+from app.utils.db_routing import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager() # Initialize JWTManager
 
@@ -13,6 +15,10 @@ def create_app(config_class=None):
     # 🔑 CRITICAL FIX (already correct)
     app = Flask(__name__, instance_relative_config=True)
 
+    # orjson-backed jsonify / get_json; responses may hold models, Rows and datetimes
+    from app.utils.serialization import JSONProvider
+    app.json = JSONProvider(app)
+
     # Load base config
     app.config.from_object(config_class or 'app.config.Config')
 
@@ -34,7 +40,12 @@ def create_app(config_class=None):
 
     app.config.setdefault("SQLALCHEMY_TRACK_MODIFICATIONS", False)
 
+    # Pool options, replica binds and SQLite pragmas (see app.utils.db_routing)
+    from app.utils.db_routing import configure_app, install_sqlite_pragmas
+    configure_app(app)
     db.init_app(app)
+    with app.app_context():
+        install_sqlite_pragmas(app, [*db.engines.values(), *app.extensions['replica_engines']])
     migrate.init_app(app, db)
     jwt.init_app(app) # Initialize JWT with the app
 
@@ -51,8 +62,11 @@ def create_app(config_class=None):
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
         identity = jwt_data["sub"]
-        from app.models import User
-        return User.query.filter_by(id=identity).one_or_none()
+        from app.utils.identity_cache import load_user_by_id
+        try:
+            return load_user_by_id(int(identity))
+        except (TypeError, ValueError):
+            return None
 
     # Enable CORS
     from flask_cors import CORS
@@ -65,12 +79,26 @@ def create_app(config_class=None):
         # If env var is not set, use both common dev ports as defaults
         allowed_origins = ["http://localhost:3000", "http://localhost:5173"]
 
-    CORS(app, resources={r"/*": {"origins": allowed_origins}})
+    CORS(app, resources={r"/*": {"origins": allowed_origins}}, expose_headers=["X-Next-Cursor", "Link"])
 
     # Register routes
     from app.routes import register_blueprints
     register_blueprints(app)
 
+    # Periodic jobs (started on first request, see app.utils.background)
+    from app.utils import background
+    from app.utils.rollups import compact_rollups
+    background.register_periodic(app, 'rollup-compactor', compact_rollups, 'ROLLUP_COMPACT_INTERVAL_SECONDS')
+    from app.utils.retention import archive_vitals
+    background.register_periodic(app, 'vitals-retention', archive_vitals, 'RETENTION_INTERVAL_SECONDS')
+    from app.utils.outbox import dispatch_outbox
+    background.register_periodic(app, 'outbox-dispatcher', dispatch_outbox, 'OUTBOX_DISPATCH_INTERVAL_SECONDS')
+    from app.utils.event_tail import tail_events
+    background.register_periodic(app, 'sse-db-tail', tail_events, 'SSE_DB_TAIL_SECONDS')
+    from app.utils.hot_vitals import warm_hot_vitals
+    background.register_startup(app, 'hot-vitals-warmer', warm_hot_vitals)
+    background.init_app(app)
+
     @app.route("/")
     def index():
         return {"app": "CareWatch Backend", "status": "ok"}
@@ -0,0 +1,139 @@
+"""ASGI front-end for device vitals ingest.
+
+Serves only POST /patients/<id>/vitals and POST /patients/vitals/batch; the
+rest of the API stays on the Flask (WSGI) app. Each connection waits on the
+event loop, so thousands of monitors can hold connections open at once, while
+authentication and the database write run on INGEST_DB_THREADS threads inside
+a Flask app context, through the same code as the Flask routes
+(app.utils.ingest). Once INGEST_MAX_PENDING requests are waiting for a thread,
+further ones get 503 with Retry-After.
+
+Events for /stream/... clients are published in the process that stored the
+reading, and no client streams from this one: set SSE_DB_TAIL_SECONDS on the
+web processes so they pick these readings up from the database.
+
+Run (from the `backend` folder):
+  uvicorn asgi:app --host 0.0.0.0 --port 8001 --workers 2
+"""
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from app import create_app
+from app.utils.serialization import dumps
+
+_READING_PATH = re.compile(r'^/patients/(\d+)/vitals/?$')
+_BATCH_PATH = re.compile(r'^/patients/vitals/batch/?$')
+
+
+def _authenticate(headers):
+    """User from Authorization (Bearer JWT or Token) or X-User-Id, like the Flask decorators."""
+    from flask_jwt_extended import decode_token
+    from app.utils.identity_cache import load_user_by_id, load_user_by_token
+
+    auth = headers.get('authorization', '')
+    m = re.match(r'^(Bearer|Token)\s+(.+)$', auth)
+    try:
+        if m and m.group(1) == 'Bearer':
+            return load_user_by_id(int(decode_token(m.group(2))['sub']))
+        if m:
+            return load_user_by_token(m.group(2))
+        if headers.get('x-user-id'):
+            return load_user_by_id(int(headers['x-user-id']))
+    except Exception:
+        return None
+    return None
+
+
+class IngestApp:
+    def __init__(self, flask_app=None):
+        self.flask_app = flask_app or create_app()
+        cfg = self.flask_app.config
+        self.max_body = cfg.get('INGEST_MAX_BODY_BYTES', 5 * 1024 * 1024)
+        self.max_pending = cfg.get('INGEST_MAX_PENDING', 1000)
+        self.executor = ThreadPoolExecutor(cfg.get('INGEST_DB_THREADS', 4), thread_name_prefix='ingest')
+        self.pending = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+
+        path = scope['path']
+        reading = _READING_PATH.match(path)
+        if not (reading or _BATCH_PATH.match(path)):
+            return await self._respond(send, 404, {'error': 'not found'})
+        if scope['method'] != 'POST':
+            return await self._respond(send, 405, {'error': 'method not allowed'})
+
+        body = await self._read_body(receive)
+        if body is None:
+            return await self._respond(send, 413, {'error': 'request body too large'})
+
+        if self.pending >= self.max_pending:
+            return await self._respond(send, 503, {'error': 'ingest busy, retry shortly'}, retry_after=1)
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+        patient_id = int(reading.group(1)) if reading else None
+        self.pending += 1
+        try:
+            status, payload = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._ingest, headers, body, patient_id)
+        finally:
+            self.pending -= 1
+        await self._respond(send, status, payload, retry_after=1 if status == 503 else None)
+
+    def _ingest(self, headers, body, patient_id):
+        from app.utils.ingest import ingest_batch, ingest_reading
+
+        with self.flask_app.app_context():
+            user = _authenticate(headers)
+            if not user:
+                return 401, {'error': 'authentication required'}
+            if user.role != 'nurse':
+                return 403, {'error': 'forbidden: insufficient role'}
+            try:
+                payload = json.loads(body) if body else None
+            except ValueError:
+                return 400, {'error': 'invalid JSON body'}
+            if patient_id is None:
+                result, status = ingest_batch(payload)
+            else:
+                result, status = ingest_reading(patient_id, payload)
+            return status, result
+
+    async def _read_body(self, receive):
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    @staticmethod
+    async def _respond(send, status, payload, retry_after=None):
+        body = dumps(payload)
+        headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        if retry_after:
+            headers.append((b'retry-after', str(retry_after).encode()))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(flask_app=None):
+    return IngestApp(flask_app)
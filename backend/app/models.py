@@ -2,6 +2,11 @@ from datetime import datetime, timezone
 from app import db
 
 
+def _isoformat_values(d):
+    """to_json() dict with datetimes as ISO strings, for callers that store or re-encode it."""
+    return {k: v.isoformat() if isinstance(v, datetime) else v for k, v in d.items()}
+
+
 class User(db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
@@ -11,7 +16,7 @@ class User(db.Model):
     email = db.Column(db.String(255), unique=True, nullable=True)
     password_hash = db.Column(db.String(255), nullable=True)
 
-    def to_dict(self):
+    def to_json(self):
         return {
             'id': self.id,
             'name': self.name,
@@ -20,39 +25,36 @@ class User(db.Model):
             'email': self.email,
         }
 
+    to_dict = to_json
+
     # Password helpers (for JWT/email+password auth)
     def set_password(self, password: str):
         """
         Set the password hash for this user.
 
-        Uses bcrypt for secure hashing. Call this before committing the user.
+        Uses bcrypt (BCRYPT_ROUNDS) for secure hashing. Call this before committing the user.
+        Request handlers should hash on the pool instead (app.utils.passwords).
         """
         if password is None:
             self.password_hash = None
             return
-        import bcrypt
+        from app.utils.passwords import hash_password
 
-        if isinstance(password, str):
-            password = password.encode('utf-8')
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password, salt).decode('utf-8')
+        self.password_hash = hash_password(password, _bcrypt_rounds())
 
     def check_password(self, password: str) -> bool:
         """
         Verify a plaintext password against the stored bcrypt hash.
         """
-        import bcrypt
+        from app.utils.passwords import verify_password
 
-        if not self.password_hash:
-            return False
-        if isinstance(password, str):
-            password = password.encode('utf-8')
-        stored = self.password_hash.encode('utf-8')
-        try:
-            return bcrypt.checkpw(password, stored)
-        except ValueError:
-            # corrupted hash
-            return False
+        ok, _ = verify_password(self.password_hash, password, _bcrypt_rounds())
+        return ok
+
+
+def _bcrypt_rounds():
+    from flask import current_app, has_app_context
+    return current_app.config.get('BCRYPT_ROUNDS', 12) if has_app_context() else 12
 
 
 class Patient(db.Model):
@@ -62,21 +64,25 @@ class Patient(db.Model):
     age = db.Column(db.Integer, nullable=True)
     sex = db.Column(db.String(10), nullable=True)
     room = db.Column(db.String(20), nullable=True)
+    ward = db.Column(db.String(50), nullable=True)
     weight_kg = db.Column(db.Float, nullable=True)
     notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
-    def to_dict(self):
+    def to_json(self):
         return {
             'id': self.id,
             'name': self.name,
             'age': self.age,
             'sex': self.sex,
             'room': self.room,
+            'ward': self.ward,
             'weight_kg': self.weight_kg,
             'notes': self.notes
         }
 
+    to_dict = to_json
+
 
 class PatientVital(db.Model):
     """PatientVitals: stores heart rate, temperature, spo2 and timestamp"""
@@ -90,16 +96,20 @@ class PatientVital(db.Model):
 
     patient = db.relationship('Patient', backref=db.backref('vitals', lazy=True))
 
-    def to_dict(self):
+    def to_json(self):
+        """Response shape; datetimes are left to the JSON encoder (app.utils.serialization)."""
         return {
             'id': self.id,
             'patient_id': self.patient_id,
             'heart_rate': self.heart_rate,
             'temperature': self.temperature,
             'spo2': self.spo2,
-            'timestamp': self.timestamp.isoformat()
+            'timestamp': self.timestamp
         }
 
+    def to_dict(self):
+        return _isoformat_values(self.to_json())
+
 
 class Alert(db.Model):
     __tablename__ = 'alerts'
@@ -120,27 +130,31 @@ class Alert(db.Model):
     closed_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
 
     patient = db.relationship('Patient', backref=db.backref('alerts', lazy=True))
+    escalator = db.relationship('User', foreign_keys=[escalated_by])
     reviewer = db.relationship('User', foreign_keys=[reviewed_by])
     closer = db.relationship('User', foreign_keys=[closed_by])
 
-    def to_dict(self):
+    def to_json(self):
         return {
             'id': self.id,
             'patient_id': self.patient_id,
             'severity': self.severity,
             'message': self.message,
-            'created_at': self.created_at.isoformat(),
+            'created_at': self.created_at,
             'escalated': self.escalated,
-            'escalated_at': self.escalated_at.isoformat() if self.escalated_at else None,
+            'escalated_at': self.escalated_at,
             'escalated_by': self.escalated_by,
             'reviewed': self.reviewed,
-            'reviewed_at': self.reviewed_at.isoformat() if self.reviewed_at else None,
+            'reviewed_at': self.reviewed_at,
             'reviewed_by': self.reviewed_by,
             'closed': self.closed,
-            'closed_at': self.closed_at.isoformat() if self.closed_at else None,
+            'closed_at': self.closed_at,
             'closed_by': self.closed_by,
         }
 
+    def to_dict(self):
+        return _isoformat_values(self.to_json())
+
 class Note(db.Model):
     __tablename__ = 'notes'
     id = db.Column(db.Integer, primary_key=True)
@@ -152,12 +166,171 @@ class Note(db.Model):
     patient = db.relationship('Patient', backref=db.backref('patient_notes', lazy='dynamic'))
     user = db.relationship('User', backref=db.backref('notes', lazy='dynamic'))
 
-    def to_dict(self):
+    def to_json(self):
         return {
             'id': self.id,
             'patient_id': self.patient_id,
             'user_id': self.user_id,
-            'timestamp': self.timestamp.isoformat(),
+            'timestamp': self.timestamp,
             'content': self.content,
             'user_name': self.user.name # Include user name for display
         }
+
+    def to_dict(self):
+        return _isoformat_values(self.to_json())
+
+
+class PatientRisk(db.Model):
+    """Materialized risk score, kept current by the ingest and alert routes.
+
+    stale_at is when the score must be recomputed even without new writes
+    (the oldest open alert leaving the 24h window); NULL means never.
+    """
+    __tablename__ = 'patient_risk'
+    patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), primary_key=True)
+    score = db.Column(db.Integer, nullable=False, default=0, index=True)
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    stale_at = db.Column(db.DateTime(timezone=True), nullable=True, index=True)
+
+    patient = db.relationship('Patient', backref=db.backref('risk', uselist=False, lazy=True))
+
+class VitalRollup(db.Model):
+    """Pre-aggregated PatientVital rows per patient and time bucket.
+
+    resolution is the bucket width in seconds (60, 900 or 3600); bucket_start
+    is aligned to a multiple of it since the Unix epoch. Sums and counts are
+    stored (not averages) so buckets can be merged incrementally.
+    """
+    __tablename__ = 'patient_vital_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('patient_id', 'resolution', 'bucket_start', name='uq_vital_rollup_bucket'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
+    resolution = db.Column(db.Integer, nullable=False)
+    bucket_start = db.Column(db.DateTime(timezone=True), nullable=False)
+    heart_rate_sum = db.Column(db.Float, default=0)
+    heart_rate_count = db.Column(db.Integer, default=0)
+    heart_rate_min = db.Column(db.Integer)
+    heart_rate_max = db.Column(db.Integer)
+    temperature_sum = db.Column(db.Float, default=0)
+    temperature_count = db.Column(db.Integer, default=0)
+    temperature_min = db.Column(db.Float)
+    temperature_max = db.Column(db.Float)
+    spo2_sum = db.Column(db.Float, default=0)
+    spo2_count = db.Column(db.Integer, default=0)
+    spo2_min = db.Column(db.Integer)
+    spo2_max = db.Column(db.Integer)
+
+
+class RollupState(db.Model):
+    """Compaction watermark: vitals with id <= last_vital_id are in the rollups.
+
+    horizon_vital_id is the highest id seen by the previous run; a run only
+    compacts up to it, so rows from transactions still in flight at that time
+    (which may commit with lower ids than already-visible rows) are not skipped.
+    """
+    __tablename__ = 'rollup_state'
+    name = db.Column(db.String(50), primary_key=True)
+    last_vital_id = db.Column(db.Integer, nullable=False, default=0)
+    horizon_vital_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class ArchivedVital(db.Model):
+    """Cold copy of PatientVital rows moved out by the retention job (same ids)."""
+    __tablename__ = 'patient_vitals_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    patient_id = db.Column(db.Integer, nullable=False)
+    heart_rate = db.Column(db.Integer)
+    temperature = db.Column(db.Float)
+    spo2 = db.Column(db.Integer)
+    timestamp = db.Column(db.DateTime(timezone=True), nullable=False)
+    archived_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (db.Index('ix_patient_vitals_archive_patient_id_timestamp', 'patient_id', 'timestamp'),)
+
+class AlertRule(db.Model):
+    """Threshold rule for one vital.
+
+    Triggers when the value is below min_value or above max_value. Rules with a
+    severity raise an Alert; rules without one only contribute risk_points.
+    A rule scoped to a ward or patient overrides the rule with the same name
+    from the wider scope (patient > ward > global > ALERT_RULES config).
+    """
+    __tablename__ = 'alert_rules'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), nullable=False)
+    vital = db.Column(db.String(20), nullable=False)  # 'heart_rate', 'temperature' or 'spo2'
+    min_value = db.Column(db.Float, nullable=True)
+    max_value = db.Column(db.Float, nullable=True)
+    severity = db.Column(db.String(20), nullable=True)  # 'warning', 'critical' or None (risk only)
+    message = db.Column(db.Text, nullable=True)  # may reference {value}
+    auto_escalate = db.Column(db.Boolean, default=False)
+    risk_points = db.Column(db.Integer, default=0)
+    ward = db.Column(db.String(50), nullable=True)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=True)
+    enabled = db.Column(db.Boolean, default=True)
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                           onupdate=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'vital': self.vital,
+            'min_value': self.min_value,
+            'max_value': self.max_value,
+            'severity': self.severity,
+            'message': self.message,
+            'auto_escalate': self.auto_escalate,
+            'risk_points': self.risk_points,
+            'ward': self.ward,
+            'patient_id': self.patient_id,
+            'enabled': self.enabled,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+class NotificationDeadLetter(db.Model):
+    """Escalation email that could not be delivered (retries exhausted, rejected, or queue full)."""
+    __tablename__ = 'notification_dead_letters'
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    alert_ids = db.Column(db.String(1000), nullable=True)  # comma-separated
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class OutboxEvent(db.Model):
+    """Side-effect written in the same transaction as its alert change (see app.utils.outbox)."""
+    __tablename__ = 'outbox_events'
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(50), nullable=False)  # 'alert_created' or 'alert_escalated'
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    claimed_by = db.Column(db.String(100), nullable=True)
+    claimed_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime(timezone=True), nullable=True)  # backoff after a failure
+    last_error = db.Column(db.Text, nullable=True)
+
+    __table_args__ = (db.Index('ix_outbox_events_claimed_by', 'claimed_by'),)
+
+
+class DataVersion(db.Model):
+    """Write counter per table or patient, bumped on commit; the source of ETags (see app.utils.etags)."""
+    __tablename__ = 'data_versions'
+    name = db.Column(db.String(64), primary_key=True)  # 'patients', 'alerts', 'patient:<id>', ...
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+
+# Composite indexes for the hot query shapes (see migration 5d0e8a3b7c61)
+db.Index('ix_patient_vitals_patient_id_timestamp', PatientVital.patient_id, PatientVital.timestamp.desc())
+db.Index('ix_alerts_patient_id_closed_created_at', Alert.patient_id, Alert.closed, Alert.created_at)
+db.Index('ix_alerts_escalated_created_at', Alert.escalated, Alert.created_at)
+db.Index('ix_notes_patient_id_timestamp', Note.patient_id, Note.timestamp)
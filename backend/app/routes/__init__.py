@@ -5,6 +5,9 @@ def register_blueprints(app):
     from app.routes.auth import auth_bp # Import the auth blueprint
     from app.routes.notes import notes_bp # Import the notes blueprint
     from app.routes.analytics import analytics_bp # Import the analytics blueprint
+    from app.routes.stream import stream_bp # Server-Sent Events
+    from app.routes.exports import exports_bp # Bulk NDJSON/CSV exports
+    from app.routes.metrics import metrics_bp # In-process cache/queue counters
 
     app.register_blueprint(users_bp)
     app.register_blueprint(patients_bp)
@@ -12,3 +15,6 @@ def register_blueprints(app):
     app.register_blueprint(auth_bp) # Register the auth blueprint
     app.register_blueprint(notes_bp) # Register the notes blueprint
     app.register_blueprint(analytics_bp) # Register the analytics blueprint
+    app.register_blueprint(stream_bp)
+    app.register_blueprint(exports_bp)
+    app.register_blueprint(metrics_bp)
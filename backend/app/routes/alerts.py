@@ -1,50 +1,81 @@
-from flask import Blueprint, jsonify, request
+from functools import wraps
+
+from flask import Blueprint, jsonify, request, current_app
 from app import db
-from app.models import Alert, User
+from app.models import Alert, AlertRule, Patient, User
 from datetime import datetime, timezone
 from flask_jwt_extended import jwt_required, current_user
 
 bp = Blueprint('alerts', __name__, url_prefix='/alerts')
 
 from app.utils.auth import token_required, require_roles
+from app.utils.db_routing import read_replica
+from app.utils.etags import conditional
+from app.utils.alert_rules import invalidate_rules
+from app.utils.events import publish_alert_update
+from app.utils.outbox import ALERT_ESCALATED, add_event
+from app.utils.read_models import alert_rows
+from app.utils.pagination import keyset_page, parse_limit, with_next_cursor
+from app.utils.risk_assessment import mark_all_risk_stale, refresh_patient_risk
+from app.utils.validation import VITAL_FIELDS
+
+
+def _wants_escalated():
+    return request.args.get('role') == 'doctor' or request.args.get('escalated') == 'true'
+
+
+def _escalated_for_doctors(f):
+    """403 for non-doctors asking for escalated alerts; goes above @conditional so a 304 never skips it."""
+    @wraps(f)
+    def wrapped(*args, **kwargs):
+        if _wants_escalated():
+            if current_user and current_user.role != 'doctor':
+                return jsonify({'error': 'forbidden: only doctors can view escalated alerts'}), 403
+            elif request.current_user and request.current_user.role != 'doctor': # Fallback for API token
+                return jsonify({'error': 'forbidden: only doctors can view escalated alerts'}), 403
+        return f(*args, **kwargs)
+    return wrapped
 
 
 @bp.route('/', methods=['GET'])
 @jwt_required(optional=True)
 @token_required
 @require_roles('nurse', 'doctor')
+@_escalated_for_doctors
+@read_replica
+@conditional(lambda: (['alerts'], None))
 def list_alerts():
     """
     Query params:
       - escalated=true
       - role=nurse|doctor
+      - limit=<n> (default PAGE_DEFAULT_LIMIT), cursor=<X-Next-Cursor of the previous page>
     """
-    q = Alert.query
-
-    role = request.args.get('role')
-    escalated_param = request.args.get('escalated') == 'true'
-
-    if role == 'doctor' or escalated_param:
-        if current_user and current_user.role != 'doctor':
-            return jsonify({'error': 'forbidden: only doctors can view escalated alerts'}), 403
-        elif request.current_user and request.current_user.role != 'doctor': # Fallback for API token
-            return jsonify({'error': 'forbidden: only doctors can view escalated alerts'}), 403
+    q = alert_rows()
+    if _wants_escalated():
         q = q.filter_by(escalated=True)
 
-    alerts = q.order_by(Alert.created_at.desc()).all()
-    return jsonify([a.to_dict() for a in alerts])
+    try:
+        alerts, next_cursor = keyset_page(q, Alert.created_at, Alert.id, parse_limit())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return with_next_cursor(jsonify(alerts), next_cursor)
 
 
 @bp.route('/escalated', methods=['GET'])
 @jwt_required()
 @require_roles('doctor')
+@read_replica
 def list_escalated_alerts():
     """Doctor-only escalated alerts.
 
     Note: tests expect 403 even when unauthenticated (not 401).
     """
-    alerts = Alert.query.filter_by(escalated=True).order_by(Alert.created_at.desc()).all()
-    return jsonify([a.to_dict() for a in alerts])
+    try:
+        alerts, next_cursor = keyset_page(alert_rows().filter_by(escalated=True), Alert.created_at, Alert.id, parse_limit())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return with_next_cursor(jsonify(alerts), next_cursor)
 
 
 @bp.route('/<int:alert_id>/escalate', methods=['POST'])
@@ -58,7 +89,7 @@ def escalate_alert(alert_id):
         return jsonify({'error': 'alert not found'}), 404
 
     if a.escalated:
-        return jsonify({'message': 'already escalated', 'alert': a.to_dict()})
+        return jsonify({'message': 'already escalated', 'alert': a})
 
     payload = request.json or {}
 
@@ -81,24 +112,12 @@ def escalate_alert(alert_id):
     a.escalated = True
     a.escalated_at = datetime.now(timezone.utc)
     a.escalated_by = escalated_by_user_id
+    # the escalation email goes out via the outbox (app.utils.outbox)
+    add_event(ALERT_ESCALATED, a.to_dict())
     db.session.commit()
+    publish_alert_update(a.to_dict())
 
-    # background notification
-    try:
-        from threading import Thread
-        from flask import current_app
-        from app.utils.mailer import send_escalation_email
-
-        app_obj = current_app._get_current_object()
-        Thread(
-            target=send_escalation_email,
-            args=(app_obj, a.to_dict()),
-            daemon=True
-        ).start()
-    except Exception:
-        pass
-
-    return jsonify({'message': 'escalated', 'alert': a.to_dict()})
+    return jsonify({'message': 'escalated', 'alert': a})
 
 
 @bp.route('/<int:alert_id>/review', methods=['POST'])
@@ -111,13 +130,14 @@ def review_alert(alert_id):
     if not alert:
         return jsonify({"msg": "Alert not found"}), 404
     if alert.reviewed:
-        return jsonify({"msg": "Alert already reviewed", "alert": alert.to_dict()}), 200
+        return jsonify({"msg": "Alert already reviewed", "alert": alert}), 200
 
     alert.reviewed = True
     alert.reviewed_at = datetime.now(timezone.utc)
     alert.reviewed_by = current_user.id if current_user else request.current_user.id
     db.session.commit()
-    return jsonify({"msg": "Alert reviewed", "alert": alert.to_dict()}), 200
+    publish_alert_update(alert.to_dict())
+    return jsonify({"msg": "Alert reviewed", "alert": alert}), 200
 
 
 @bp.route('/<int:alert_id>/close', methods=['POST'])
@@ -132,10 +152,125 @@ def close_alert(alert_id):
     if not alert.reviewed:
         return jsonify({"msg": "Alert must be reviewed before closing"}), 400
     if alert.closed:
-        return jsonify({"msg": "Alert already closed", "alert": alert.to_dict()}), 200
+        return jsonify({"msg": "Alert already closed", "alert": alert}), 200
 
     alert.closed = True
     alert.closed_at = datetime.now(timezone.utc)
     alert.closed_by = current_user.id if current_user else request.current_user.id
+    refresh_patient_risk([alert.patient_id])
+    db.session.commit()
+    publish_alert_update(alert.to_dict())
+    return jsonify({"msg": "Alert closed", "alert": alert}), 200
+
+
+@bp.route('/rules', methods=['GET'])
+@jwt_required(optional=True)
+@token_required
+@require_roles('nurse', 'doctor')
+def list_alert_rules():
+    """Default rules from config plus the stored overrides."""
+    rules = AlertRule.query.order_by(AlertRule.id).all()
+    return jsonify({
+        'defaults': current_app.config.get('ALERT_RULES', []),
+        'overrides': [r.to_dict() for r in rules]
+    })
+
+
+def _flag(payload, key, current):
+    """A boolean field from the payload; strings such as "false" are rejected, not read as truthy."""
+    value = payload.get(key, current)
+    if not isinstance(value, bool):
+        raise ValueError(f'{key} must be true or false')
+    return value
+
+
+@bp.route('/rules', methods=['POST'])
+@jwt_required(optional=True)
+@token_required
+@require_roles('doctor')
+def save_alert_rule():
+    """Create or update (when `id` is given) a global, ward or patient rule override.
+
+    Changes take effect immediately in this worker and within
+    ALERT_RULES_RELOAD_SECONDS in the others.
+    """
+    payload = request.json or {}
+
+    if payload.get('id') is not None:
+        rule = db.session.get(AlertRule, payload.get('id'))
+        if not rule:
+            return jsonify({'error': 'rule not found'}), 404
+    else:
+        rule = AlertRule()
+
+    try:
+        name = payload.get('name', rule.name)
+        vital = payload.get('vital', rule.vital)
+        if not name:
+            raise ValueError('name is required')
+        if vital not in VITAL_FIELDS:
+            raise ValueError('vital must be heart_rate, temperature or spo2')
+        min_value = payload.get('min_value', rule.min_value)
+        max_value = payload.get('max_value', rule.max_value)
+        min_value = float(min_value) if min_value is not None else None
+        max_value = float(max_value) if max_value is not None else None
+        if min_value is not None and max_value is not None and min_value > max_value:
+            raise ValueError('min_value must not be greater than max_value')
+        severity = payload.get('severity', rule.severity)
+        if severity not in (None, 'warning', 'critical'):
+            raise ValueError('severity must be warning, critical or null')
+        message = payload.get('message', rule.message)
+        if severity and not message:
+            raise ValueError('message is required for alerting rules')
+        if message:
+            try:
+                for sample in (0, 0.5):  # alerts are built with message.format(value=...), int or float readings
+                    message.format(value=sample)
+            except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+                raise ValueError('message may only use the {value} placeholder')
+        enabled = _flag(payload, 'enabled', True if rule.enabled is None else rule.enabled)
+        auto_escalate = _flag(payload, 'auto_escalate', rule.auto_escalate or False)
+        if enabled and min_value is None and max_value is None:
+            raise ValueError('min_value or max_value is required')
+        patient_id = payload.get('patient_id', rule.patient_id)
+        if patient_id is not None:
+            patient_id = int(patient_id)
+            if not db.session.get(Patient, patient_id):
+                raise ValueError('patient not found')
+        risk_points = int(payload.get('risk_points', rule.risk_points or 0))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    rule.name = name
+    rule.vital = vital
+    rule.min_value = min_value
+    rule.max_value = max_value
+    rule.severity = severity
+    rule.message = message
+    rule.auto_escalate = auto_escalate
+    rule.risk_points = risk_points
+    rule.ward = payload.get('ward', rule.ward)
+    rule.patient_id = patient_id
+    rule.enabled = enabled
+    rule.updated_at = datetime.now(timezone.utc)
+    db.session.add(rule)
+    mark_all_risk_stale()
+    db.session.commit()
+    invalidate_rules()
+
+    return jsonify(rule.to_dict()), 200 if payload.get('id') is not None else 201
+
+
+@bp.route('/rules/<int:rule_id>', methods=['DELETE'])
+@jwt_required(optional=True)
+@token_required
+@require_roles('doctor')
+def delete_alert_rule(rule_id):
+    rule = db.session.get(AlertRule, rule_id)
+    if not rule:
+        return jsonify({'error': 'rule not found'}), 404
+    db.session.delete(rule)
+    mark_all_risk_stale()
     db.session.commit()
-    return jsonify({"msg": "Alert closed", "alert": alert.to_dict()}), 200
+    invalidate_rules()
+    return jsonify({'msg': 'Rule deleted'}), 200
@@ -1,23 +1,37 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from app.utils.auth import token_required, require_roles
+from app.utils.db_routing import read_replica
+from app.utils.etags import ALL_PATIENTS, conditional, patient_key, time_bucket
 from app import db
 from app.models import Patient
-from app.utils.risk_assessment import calculate_risk_score, get_vital_trends
+from app.utils.risk_assessment import get_patient_risk, get_at_risk_patients, get_vital_trends, trend_window
 from sqlalchemy import desc
 
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/analytics')
 
+
+def _trend_etag_scope(patient_id, vital_type):
+    # the response changes with the patient's data and when the aligned window moves
+    try:
+        start_time, _, _, _, n_buckets = trend_window(int(request.args.get('hours', 24)),
+                                                      int(request.args.get('interval', 60)))
+    except (ValueError, OverflowError, ZeroDivisionError):
+        return None  # the view answers 400
+    return [patient_key(patient_id), ALL_PATIENTS], [start_time, n_buckets]
+
+
 @analytics_bp.route('/patients/<int:patient_id>/risk', methods=['GET'])
 @jwt_required(optional=True)
 @token_required
 @require_roles('nurse', 'doctor')
+@read_replica
 def get_patient_risk_score(patient_id):
     patient = db.session.get(Patient, patient_id)
     if not patient:
         return jsonify({"msg": "Patient not found"}), 404
 
-    risk_score = calculate_risk_score(patient_id)
+    risk_score = get_patient_risk(patient_id)
     return jsonify({"patient_id": patient_id, "risk_score": risk_score}), 200
 
 
@@ -25,6 +39,8 @@ def get_patient_risk_score(patient_id):
 @jwt_required(optional=True)
 @token_required
 @require_roles('nurse', 'doctor')
+@read_replica
+@conditional(_trend_etag_scope)
 def get_patient_vital_trends(patient_id, vital_type):
     patient = db.session.get(Patient, patient_id)
     if not patient:
@@ -33,8 +49,13 @@ def get_patient_vital_trends(patient_id, vital_type):
     if vital_type not in ['heart_rate', 'temperature', 'spo2']:
         return jsonify({"msg": "Invalid vital type. Must be heart_rate, temperature, or spo2"}), 400
 
-    hours = int(request.args.get('hours', 24))
-    interval_minutes = int(request.args.get('interval', 60))
+    try:
+        hours = int(request.args.get('hours', 24))
+        interval_minutes = int(request.args.get('interval', 60))
+    except ValueError:
+        return jsonify({"msg": "hours and interval must be integers"}), 400
+    if hours <= 0 or interval_minutes <= 0:
+        return jsonify({"msg": "hours and interval must be positive"}), 400
 
     trends = get_vital_trends(patient_id, vital_type, hours, interval_minutes)
     return jsonify({
@@ -47,30 +68,23 @@ def get_patient_vital_trends(patient_id, vital_type):
 @jwt_required(optional=True)
 @token_required
 @require_roles('nurse', 'doctor')
+@read_replica
+@conditional(lambda: (['patients', 'risk'], time_bucket()))
 def get_dashboard_summary():
     """
     Provides a summary for the dashboard, e.g., total patients, patients at risk.
     """
     total_patients = Patient.query.count()
-    
-    # This is a simplified example. In a real app, this would involve more complex
-    # logic, potentially caching risk scores or having a dedicated 'patients_at_risk' table.
-    patients = Patient.query.all()
-    patients_at_risk_count = 0
-    patient_risk_list = []
-    
-    for patient in patients:
-        risk_score = calculate_risk_score(patient.id)
-        if risk_score > 5: # Arbitrary threshold for 'at risk'
-            patients_at_risk_count += 1
-            patient_risk_list.append({
-                "patient_id": patient.id,
-                "name": patient.name,
-                "risk_score": risk_score
-            })
-            
+
+    # Scores are materialized in patient_risk and kept current on ingest and
+    # alert changes, so this is a single indexed read (plus any stale rows).
+    patient_risk_list = [
+        {"patient_id": pid, "name": name, "risk_score": score}
+        for pid, name, score in get_at_risk_patients()
+    ]
+
     return jsonify({
         "total_patients": total_patients,
-        "patients_at_risk_count": patients_at_risk_count,
+        "patients_at_risk_count": len(patient_risk_list),
         "patients_at_risk_details": patient_risk_list
     }), 200
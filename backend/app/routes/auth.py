@@ -3,9 +3,16 @@ from flask_jwt_extended import create_access_token, create_refresh_token, jwt_re
 from app import db
 from app.models import User
 from app.utils.auth import token_required # For api_token compatibility
+from app.utils.passwords import get_password_pool, PoolSaturated
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+
+def _busy():
+    res = jsonify({"msg": "Too many logins in progress, retry shortly"})
+    res.headers['Retry-After'] = '1'
+    return res, 503
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     data = request.get_json()
@@ -20,8 +27,12 @@ def register():
     if User.query.filter_by(email=email).first():
         return jsonify({"msg": "User with that email already exists"}), 409
 
-    user = User(name=name, email=email, role=role)
-    user.set_password(password)
+    try:
+        password_hash = get_password_pool().hash(password)
+    except PoolSaturated:
+        return _busy()
+
+    user = User(name=name, email=email, role=role, password_hash=password_hash)
     db.session.add(user)
     db.session.commit()
 
@@ -34,7 +45,18 @@ def login():
 
     user = User.query.filter_by(email=email).first()
 
-    if user and user.check_password(password):
+    if user is None:
+        return jsonify({"msg": "Bad username or password"}), 401
+    try:
+        ok, new_hash = get_password_pool().verify(user.password_hash, password)
+    except PoolSaturated:
+        return _busy()
+
+    if ok:
+        if new_hash:
+            # BCRYPT_ROUNDS changed since this hash was made
+            user.password_hash = new_hash
+            db.session.commit()
         access_token = create_access_token(identity=user.id)
         refresh_token = create_refresh_token(identity=user.id)
         return jsonify(access_token=access_token, refresh_token=refresh_token, role=user.role), 200
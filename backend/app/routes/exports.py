@@ -0,0 +1,40 @@
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import jwt_required
+from app.utils.auth import token_required, require_roles
+from app.utils.exports import FORMATS, iter_export
+from app.utils.validation import parse_timestamp
+
+exports_bp = Blueprint('exports', __name__, url_prefix='/exports')
+
+
+def _patient_ids():
+    """?patient_id=1&patient_id=2 or ?patient_id=1,2; raises ValueError on anything else."""
+    ids = []
+    for raw in request.args.getlist('patient_id'):
+        ids.extend(int(part) for part in raw.split(',') if part.strip())
+    return ids
+
+
+@exports_bp.route('/<any(vitals, alerts):table>', methods=['GET'])
+@jwt_required(optional=True)
+@token_required
+@require_roles('doctor')
+def export_table(table):
+    """Stream vitals or alerts in id order.
+
+    Query params: ?format=ndjson|csv (default ndjson), ?start=&end= (ISO-8601,
+    end exclusive; vitals by timestamp, alerts by created_at), ?patient_id=1,2
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(FORMATS)}"}), 400
+    try:
+        start = parse_timestamp(request.args.get('start'))
+        end = parse_timestamp(request.args.get('end'))
+        patient_ids = _patient_ids()
+    except ValueError:
+        return jsonify({'error': 'start/end must be ISO-8601 and patient_id integers'}), 400
+
+    chunks = iter_export(table, fmt, start, end, patient_ids, current_app.config['EXPORT_BATCH_SIZE'])
+    return Response(stream_with_context(chunks), mimetype=FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename={table}.{fmt}'})
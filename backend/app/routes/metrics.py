@@ -0,0 +1,31 @@
+from flask import Blueprint, current_app, jsonify
+from flask_jwt_extended import jwt_required
+from app.utils.auth import token_required, require_roles
+from app.utils.events import get_broker
+from app.utils.hot_vitals import get_hot_vitals
+from app.utils.identity_cache import get_identity_cache
+from app.utils.mailer import get_notifier
+from app.utils.outbox import get_dispatch_stats, pending_count
+from app.utils.passwords import get_password_pool
+
+metrics_bp = Blueprint('metrics', __name__, url_prefix='/metrics')
+
+
+@metrics_bp.route('', methods=['GET'])
+@jwt_required(optional=True)
+@token_required
+@require_roles('doctor')
+def get_metrics():
+    """In-process counters for this worker (each gunicorn worker reports its own)."""
+    cache = get_identity_cache()
+    write_behind = current_app.extensions.get('write_behind')
+    hot_vitals = get_hot_vitals()
+    return jsonify({
+        'identity_cache': cache.stats() if cache else None,
+        'event_broker': get_broker().stats(),
+        'password_pool': get_password_pool().stats(),
+        'escalation_notifier': get_notifier().stats(),
+        'write_behind': write_behind.stats() if write_behind else None,
+        'hot_vitals': hot_vitals.stats() if hot_vitals else None,
+        'outbox': {**get_dispatch_stats().as_dict(), 'pending': pending_count()},
+    })
@@ -1,8 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, current_user
 from app import db
 from app.models import Note, Patient, User
 from app.utils.auth import token_required, require_roles
+from app.utils.read_models import note_rows
+from app.utils.pagination import keyset_page, parse_limit, with_next_cursor
 from datetime import datetime, timezone
 
 notes_bp = Blueprint('notes', __name__, url_prefix='/patients/<int:patient_id>/notes')
@@ -12,12 +14,20 @@ notes_bp = Blueprint('notes', __name__, url_prefix='/patients/<int:patient_id>/n
 @token_required
 @require_roles('nurse', 'doctor')
 def get_patient_notes(patient_id):
+    """Newest notes first. Query params: ?limit= (default PAGE_MAX_LIMIT) &cursor=<X-Next-Cursor>"""
     patient = db.session.get(Patient, patient_id)
     if not patient:
         return jsonify({"msg": "Patient not found"}), 404
 
-    notes = Note.query.filter_by(patient_id=patient_id).order_by(Note.timestamp.desc()).all()
-    return jsonify([note.to_dict() for note in notes]), 200
+    try:
+        limit = parse_limit(default=current_app.config['PAGE_MAX_LIMIT'])
+        notes, next_cursor = keyset_page(
+            note_rows().filter(Note.patient_id == patient_id),
+            Note.timestamp, Note.id, limit
+        )
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    return with_next_cursor(jsonify(notes), next_cursor), 200
 
 @notes_bp.route('/', methods=['POST'])
 @jwt_required(optional=True)
@@ -40,7 +50,7 @@ def add_patient_note(patient_id):
     db.session.add(note)
     db.session.commit()
 
-    return jsonify(note.to_dict()), 201
+    return jsonify(note), 201
 
 @notes_bp.route('/<int:note_id>', methods=['DELETE'])
 @jwt_required(optional=True)
@@ -1,85 +1,157 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from app import db
 from app.models import Patient, PatientVital, Alert, Note
 from app.utils.auth import require_roles, jwt_required, token_required
+from app.utils.db_routing import read_replica
+from app.utils.etags import ALL_PATIENTS, conditional, patient_key
+from app.utils.hot_vitals import get_hot_vitals
+from app.utils.ingest import ingest_batch, ingest_reading
+from app.utils.columnar import COLUMNS, iter_arrow, iter_packed, iter_partitions, to_columns, vitals_select
+from app.utils.risk_assessment import refresh_patient_risk
+from app.utils.read_models import vital_rows
+from app.utils.pagination import encode_cursor, id_page, keyset_page, parse_limit, with_next_cursor
+from app.utils.validation import parse_timestamp
 from datetime import datetime
 from sqlalchemy import desc
+from sqlalchemy.orm import joinedload
 
 bp = Blueprint('patients', __name__, url_prefix='/patients')
 
+_VITAL_COLUMNS = (PatientVital.timestamp, PatientVital.heart_rate, PatientVital.temperature, PatientVital.spo2)
+
+
+def _columns(rows, names):
+    # rows carry the id last for the keyset cursor; it is not part of the columns
+    return to_columns([row[:-1] for row in rows], names)
+
 
 @bp.route('/', methods=['GET'])
 @jwt_required(optional=True)
 @token_required
 @require_roles('nurse', 'doctor')
+@read_replica
+@conditional(lambda: (['patients'], None))
 def list_patients():
-    patients = Patient.query.all()
-    return jsonify([p.to_dict() for p in patients])
+    """Patients in id order. Query params: ?limit= (default PAGE_MAX_LIMIT) &cursor=<X-Next-Cursor>
+
+    Without either parameter every patient is returned, as before paging existed
+    (the frontend's patient list does not follow X-Next-Cursor).
+    """
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        return jsonify(Patient.query.order_by(Patient.id).all())
+    try:
+        limit = parse_limit(default=current_app.config['PAGE_MAX_LIMIT'])
+        patients, next_cursor = id_page(Patient.query, Patient.id, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return with_next_cursor(jsonify(patients), next_cursor)
 
 
 @bp.route('/vitals', methods=['GET'])
 @jwt_required(optional=True)
 @token_required
 @require_roles('nurse', 'doctor')
+@read_replica
 def list_vitals():
-    """Return recent vitals across all patients. Query params: ?limit=100 (default) or ?patient_id=<id>"""
-    limit = min(int(request.args.get('limit', 100)), 1000)
-    q = PatientVital.query.order_by(PatientVital.timestamp.desc())
+    """Return recent vitals across all patients, newest first.
+
+    Query params: ?limit=100 (default), ?patient_id=<id>, ?cursor=<X-Next-Cursor of the previous page>,
+    ?format=columnar for {"patient_id": [...], "timestamp": [epoch ms], ...} instead of a list of rows
+    """
+    columnar = request.args.get('format') == 'columnar'
+    if columnar:
+        q = db.session.query(PatientVital.patient_id, *_VITAL_COLUMNS, PatientVital.id)
+    else:
+        q = vital_rows(with_patient_name=True)
 
     if request.args.get('patient_id'):
         try:
             pid = int(request.args.get('patient_id'))
-            q = q.filter_by(patient_id=pid)
+            q = q.filter(PatientVital.patient_id == pid)
         except ValueError:
             return jsonify({'error': 'invalid patient_id'}), 400
 
-    vitals = q.limit(limit).all()
-    result = []
-    for v in vitals:
-        d = v.to_dict()
-        d['patient_name'] = v.patient.name if v.patient else None
-        result.append(d)
+    try:
+        vitals, next_cursor = keyset_page(q, PatientVital.timestamp, PatientVital.id, parse_limit())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if columnar:
+        return with_next_cursor(jsonify(_columns(vitals, ('patient_id',) + COLUMNS)), next_cursor)
+    return with_next_cursor(jsonify(vitals), next_cursor)
 
-    return jsonify(result)
+
+def _open_alerts(patient_id):
+    """Active alerts, newest first, together with the users who acted on them."""
+    alerts = (
+        Alert.query.options(joinedload(Alert.escalator), joinedload(Alert.reviewer), joinedload(Alert.closer))
+        .filter_by(patient_id=patient_id, closed=False)
+        .order_by(desc(Alert.created_at))
+        .all()
+    )
+    alerts_data = []
+    for alert in alerts:
+        alert_dict = alert.to_json()
+        if alert.escalated_by:
+            alert_dict['escalated_by_name'] = alert.escalator.name if alert.escalator else None
+        if alert.reviewed_by:
+            alert_dict['reviewed_by_name'] = alert.reviewer.name if alert.reviewer else None
+        if alert.closed_by:
+            alert_dict['closed_by_name'] = alert.closer.name if alert.closer else None
+        alerts_data.append(alert_dict)
+    return alerts_data
 
 
 @bp.route('/<int:patient_id>', methods=['GET'])
 @jwt_required(optional=True)
 @token_required
 @require_roles('nurse', 'doctor')
+@conditional(lambda patient_id: ([patient_key(patient_id), ALL_PATIENTS, 'users'], None))
 def get_patient(patient_id):
+    """Patient with recent vitals, open alerts and the newest notes, in a fixed number of queries.
+
+    Query params: ?notes_limit= (default PATIENT_DETAIL_NOTES). When older notes
+    exist, notes_next_cursor can be passed as ?cursor= to /patients/<id>/notes.
+    """
     patient = db.session.get(Patient, patient_id)
     if not patient:
         return jsonify({'error': 'patient not found'}), 404
+    try:
+        notes_limit = parse_limit(default=current_app.config['PATIENT_DETAIL_NOTES'], param='notes_limit')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    # Fetch recent vitals
-    vitals = PatientVital.query.filter_by(patient_id=patient_id).order_by(desc(PatientVital.timestamp)).limit(10).all()
-    vitals_data = [v.to_dict() for v in vitals]
-
-    # Fetch active alerts
-    alerts = Alert.query.filter_by(patient_id=patient_id, closed=False).order_by(desc(Alert.created_at)).all()
-    alerts_data = []
-    for alert in alerts:
-        alert_dict = alert.to_dict()
-        if alert.escalated_by:
-            escalated_by_user = db.session.get(User, alert.escalated_by)
-            alert_dict['escalated_by_name'] = escalated_by_user.name if escalated_by_user else None
-        if alert.reviewed_by:
-            reviewed_by_user = db.session.get(User, alert.reviewed_by)
-            alert_dict['reviewed_by_name'] = reviewed_by_user.name if reviewed_by_user else None
-        if alert.closed_by:
-            closed_by_user = db.session.get(User, alert.closed_by)
-            alert_dict['closed_by_name'] = closed_by_user.name if closed_by_user else None
-        alerts_data.append(alert_dict)
-
-    # Fetch notes
-    notes = Note.query.filter_by(patient_id=patient_id).order_by(desc(Note.timestamp)).all()
-    notes_data = [note.to_dict() for note in notes]
+    # Recent vitals and active alerts come from the hot cache when it is current
+    hot = get_hot_vitals()
+    cached = hot.get(patient_id) if hot else None
+    if cached is not None:
+        vitals_data = cached[0][:10]
+    else:
+        vitals_data = PatientVital.query.filter_by(patient_id=patient_id).order_by(desc(PatientVital.timestamp)).limit(10).all()
+
+    if cached is not None and cached[1] is not None:
+        alerts_data = cached[1]
+    else:
+        alerts_data = _open_alerts(patient_id)
+
+    # Fetch the newest notes with their authors
+    notes = (
+        Note.query.options(joinedload(Note.user))
+        .filter_by(patient_id=patient_id)
+        .order_by(desc(Note.timestamp), desc(Note.id))
+        .limit(notes_limit + 1)
+        .all()
+    )
+    notes_next_cursor = None
+    if len(notes) > notes_limit:
+        notes = notes[:notes_limit]
+        notes_next_cursor = encode_cursor(notes[-1].timestamp, notes[-1].id)
+    notes_data = notes
 
-    patient_data = patient.to_dict()
+    patient_data = patient.to_json()
     patient_data['vitals'] = vitals_data
     patient_data['alerts'] = alerts_data
     patient_data['notes'] = notes_data
+    patient_data['notes_next_cursor'] = notes_next_cursor
 
     return jsonify(patient_data)
 
@@ -89,80 +161,99 @@ def get_patient(patient_id):
 @token_required
 @require_roles('nurse', 'doctor')
 def get_patient_vitals(patient_id):
+    """Newest first. Query params: ?limit= &cursor=, ?format=columnar for typed columns."""
     patient = db.session.get(Patient, patient_id)
     if not patient:
         return jsonify({'error': 'patient not found'}), 404
 
-    limit = min(int(request.args.get('limit', 100)), 1000)
-    vitals = (
-        PatientVital.query
-        .filter_by(patient_id=patient_id)
-        .order_by(PatientVital.timestamp.desc())
-        .limit(limit)
-        .all()
-    )
-    return jsonify([v.to_dict() for v in vitals])
+    columnar = request.args.get('format') == 'columnar'
+    hot = get_hot_vitals()
+    if not columnar and hot and not request.args.get('cursor'):
+        # first page (dashboard mini-trends) from the hot cache when it holds enough rows
+        try:
+            limit = parse_limit()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        cached = hot.get(patient_id) if limit <= hot.per_patient else None
+        if cached is not None:
+            vitals, _, complete = cached
+            more = len(vitals) > limit or (len(vitals) == limit and not complete)
+            vitals = vitals[:limit]
+            next_cursor = encode_cursor(vitals[-1]['timestamp'], vitals[-1]['id']) if more else None
+            return with_next_cursor(jsonify(vitals), next_cursor)
+
+    if columnar:
+        q = db.session.query(*_VITAL_COLUMNS, PatientVital.id).filter(PatientVital.patient_id == patient_id)
+    else:
+        q = vital_rows().filter(PatientVital.patient_id == patient_id)
+    try:
+        vitals, next_cursor = keyset_page(q, PatientVital.timestamp, PatientVital.id, parse_limit())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if columnar:
+        return with_next_cursor(jsonify(_columns(vitals, COLUMNS)), next_cursor)
+    return with_next_cursor(jsonify(vitals), next_cursor)
 
 
-@bp.route('/<int:patient_id>/vitals', methods=['POST'])
+@bp.route('/<int:patient_id>/vitals.<any(arrow, bin):fmt>', methods=['GET'])
 @jwt_required(optional=True)
 @token_required
-@require_roles('nurse') # Only nurses can submit vitals
-def submit_vitals(patient_id):
-    """Accepts JSON: { heart_rate, temperature, spo2 } and creates alerts if needed"""
-    payload = request.json or {}
-
-    if not any(k in payload for k in ('heart_rate', 'temperature', 'spo2')):
-        return jsonify({'error': 'at least one vital is required'}), 400
-
-    # ----------------------------
-    # Validators
-    # ----------------------------
-    def _parse_int(val, name, min_v, max_v):
-        if val is None:
-            return None
-        iv = int(val)
-        if iv < min_v or iv > max_v:
-            raise ValueError(f"{name} must be between {min_v} and {max_v}")
-        return iv
-
-    def _parse_float(val, name, min_v, max_v):
-        if val is None:
-            return None
-        fv = float(val)
-        if fv < min_v or fv > max_v:
-            raise ValueError(f"{name} must be between {min_v} and {max_v}")
-        return fv
-
-    try:
-        hr = _parse_int(payload.get('heart_rate'), 'heart_rate', 20, 220)
-        temp = _parse_float(payload.get('temperature'), 'temperature', 30.0, 45.0)
-        spo2 = _parse_int(payload.get('spo2'), 'spo2', 50, 100)
-    except ValueError as e:
-        return jsonify({'error': str(e)}), 400
+@require_roles('nurse', 'doctor')
+def export_patient_vitals(patient_id, fmt):
+    """Stream all of a patient's vitals (oldest first) as Arrow IPC or packed binary records.
 
+    Query params: ?start=<ISO-8601> &end=<ISO-8601>. The .bin body is a run of
+    little-endian records: numpy.frombuffer(body, dtype=app.utils.columnar.RECORD_DTYPE).
+    """
     patient = db.session.get(Patient, patient_id)
     if not patient:
         return jsonify({'error': 'patient not found'}), 404
-
-    from app.utils.simulator import create_vital_and_alerts
-
     try:
-        vital_dict, alerts_list = create_vital_and_alerts(
-            patient.id,
-            heart_rate=hr,
-            temperature=temp,
-            spo2=spo2
-        )
+        start = parse_timestamp(request.args.get('start'))
+        end = parse_timestamp(request.args.get('end'))
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
-    except Exception:
-        return jsonify({'error': 'internal server error'}), 500
 
-    return jsonify({
-        'vital': vital_dict,
-        'alerts_created': alerts_list
-    }), 201
+    partitions = iter_partitions(vitals_select(patient_id, start, end), current_app.config['EXPORT_BATCH_SIZE'])
+    if fmt == 'arrow':
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return jsonify({'error': 'Arrow export requires pyarrow; use vitals.bin or ?format=columnar'}), 501
+        body, mimetype = iter_arrow(pa, partitions), 'application/vnd.apache.arrow.stream'
+    else:
+        body, mimetype = iter_packed(partitions), 'application/octet-stream'
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=patient-{patient_id}-vitals.{fmt}'})
+
+
+@bp.route('/<int:patient_id>/vitals', methods=['POST'])
+@jwt_required(optional=True)
+@token_required
+@require_roles('nurse') # Only nurses can submit vitals
+def submit_vitals(patient_id):
+    """Accepts JSON: { heart_rate, temperature, spo2 } and creates alerts if needed
+
+    With INGEST_MODE=write_behind the reading is queued and 202 returned, unless it is critical.
+    """
+    body, status = ingest_reading(patient_id, request.json)
+    res = jsonify(body)
+    if status == 503:  # write-behind queue full
+        res.headers['Retry-After'] = '1'
+    return res, status
+
+
+@bp.route('/vitals/batch', methods=['POST'])
+@jwt_required(optional=True)
+@token_required
+@require_roles('nurse')
+def submit_vitals_batch():
+    """Accepts JSON: { readings: [{ patient_id, heart_rate, temperature, spo2, timestamp? }, ...] }
+
+    See app.utils.ingest.ingest_batch; results are reported per reading, in order.
+    """
+    body, status = ingest_batch(request.json)
+    return jsonify(body), status
 
 
 @bp.route('/<int:patient_id>', methods=['PATCH'])
@@ -172,7 +263,7 @@ def submit_vitals(patient_id):
 def update_patient(patient_id):
     """Update patient demographic/details."""
     payload = request.json or {}
-    allowed = {'age', 'sex', 'room', 'weight_kg', 'notes'}
+    allowed = {'age', 'sex', 'room', 'ward', 'weight_kg', 'notes'}
 
     if not any(k in payload for k in allowed):
         return jsonify({'error': 'no valid fields provided'}), 400
@@ -192,6 +283,11 @@ def update_patient(patient_id):
         if 'room' in payload:
             patient.room = payload.get('room')
 
+        if 'ward' in payload:
+            patient.ward = payload.get('ward')
+            # ward-specific rules may change the risk score
+            refresh_patient_risk([patient.id])
+
         if 'weight_kg' in payload:
             patient.weight_kg = float(payload.get('weight_kg')) if payload.get('weight_kg') is not None else None
 
@@ -203,4 +299,4 @@ def update_patient(patient_id):
         db.session.rollback()
         return jsonify({'error': 'internal error'}), 500
 
-    return jsonify(patient.to_dict())
+    return jsonify(patient)
@@ -0,0 +1,54 @@
+from flask import Blueprint, Response, current_app, jsonify
+from flask_jwt_extended import jwt_required
+from app import db
+from app.models import Patient
+from app.utils.auth import token_required, require_roles
+from app.utils.events import WARD_TOPIC, get_broker, patient_topic
+from app.utils.serialization import dumps
+
+stream_bp = Blueprint('stream', __name__, url_prefix='/stream')
+
+
+def _event_stream(broker, sub, keepalive):
+    """Server-Sent Events generator; unsubscribes when the client goes away."""
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            event = sub.get(timeout=keepalive)
+            if event is None:
+                yield ': keepalive\n\n'
+                continue
+            yield f"id: {event['id']}\nevent: {event['event']}\ndata: {dumps(event['data']).decode()}\n\n"
+    finally:
+        broker.unsubscribe(sub)
+
+
+def _sse_response(topics):
+    broker = get_broker()
+    sub = broker.subscribe(topics)
+    keepalive = current_app.config.get('SSE_KEEPALIVE_SECONDS', 15)
+    return Response(
+        _event_stream(broker, sub, keepalive),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@stream_bp.route('/ward', methods=['GET'])
+@jwt_required(optional=True)
+@token_required
+@require_roles('nurse', 'doctor')
+def stream_ward():
+    """Live `vital`, `alert` and `alert_updated` events for every patient."""
+    return _sse_response([WARD_TOPIC])
+
+
+@stream_bp.route('/patients/<int:patient_id>', methods=['GET'])
+@jwt_required(optional=True)
+@token_required
+@require_roles('nurse', 'doctor')
+def stream_patient(patient_id):
+    """Live events for a single patient."""
+    if not db.session.get(Patient, patient_id):
+        return jsonify({'error': 'patient not found'}), 404
+    return _sse_response([patient_topic(patient_id)])
@@ -12,7 +12,7 @@ bp = Blueprint('users', __name__, url_prefix='/users')
 @bp.route('/', methods=['GET'])
 def list_users():
     users = User.query.all()
-    return jsonify([u.to_dict() for u in users])
+    return jsonify(users)
 
 
 @bp.route('/auth/login', methods=['POST'])
@@ -31,7 +31,7 @@ def legacy_token_login():
         if not u.api_token:
             u.api_token = secrets.token_urlsafe(24)
             db.session.commit()
-        return jsonify({'api_token': u.api_token, 'user': u.to_dict()})
+        return jsonify({'api_token': u.api_token, 'user': u})
     except Exception:
         return jsonify({'error': 'invalid user_id'}), 400
 
@@ -49,11 +49,11 @@ def me():
     """
     # Prefer JWT if present
     if current_user:
-        return jsonify(current_user.to_dict())
+        return jsonify(current_user)
 
     # Fallback to legacy token-based auth
     u = get_current_user()
     if not u:
         return jsonify({'error': 'not authenticated'}), 401
-    return jsonify(u.to_dict())
+    return jsonify(u)
 
@@ -0,0 +1,169 @@
+"""Compiled alert-rule engine.
+
+Rules come from the ALERT_RULES config (defaults) and the alert_rules table
+(overrides). They are compiled once into flat tuples so evaluating a reading is
+a dict lookup for the patient's rule set plus a loop over a handful of tuples.
+
+The compiled engine lives in app.extensions and is rebuilt when the
+alert_rules table changes: in-process immediately via invalidate_rules(), and
+in other workers after at most ALERT_RULES_RELOAD_SECONDS.
+"""
+import time
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import func
+
+from app import db
+from app.models import AlertRule, Patient
+from app.utils.validation import VITAL_FIELDS
+
+# Position of each vital in the (heart_rate, temperature, spo2) value tuple
+_VITAL_INDEX = {name: i for i, name in enumerate(VITAL_FIELDS)}
+
+CompiledRule = namedtuple('CompiledRule', 'vital_index lo hi severity message auto_escalate risk_points')
+
+_RULE_FIELDS = ('vital', 'min_value', 'max_value', 'severity', 'message', 'auto_escalate', 'risk_points', 'enabled')
+
+
+def _rule_spec(obj):
+    """Normalize a config dict or AlertRule row into a plain dict."""
+    if isinstance(obj, dict):
+        spec = {k: obj.get(k) for k in _RULE_FIELDS}
+        spec['name'] = obj['name']
+    else:
+        spec = {k: getattr(obj, k) for k in _RULE_FIELDS}
+        spec['name'] = obj.name
+    if spec['enabled'] is None:
+        spec['enabled'] = True
+    return spec
+
+
+def _compile(specs):
+    """Turn {name: spec} into a tuple of CompiledRule, dropping disabled rules."""
+    compiled = []
+    for spec in specs.values():
+        if not spec['enabled']:
+            continue
+        compiled.append(CompiledRule(
+            vital_index=_VITAL_INDEX[spec['vital']],
+            lo=spec['min_value'],
+            hi=spec['max_value'],
+            severity=spec['severity'],
+            message=spec['message'] or '',
+            auto_escalate=bool(spec['auto_escalate']),
+            risk_points=spec['risk_points'] or 0,
+        ))
+    return tuple(compiled)
+
+
+class RuleEngine:
+    """Immutable snapshot of all rules, resolved per ward and per patient."""
+
+    def __init__(self, defaults, db_rules=(), stamp=None):
+        self.stamp = stamp
+        base = {r['name']: _rule_spec(r) for r in defaults}
+        ward_overrides = {}
+        self._patient_overrides = {}
+        for row in db_rules:
+            spec = _rule_spec(row)
+            if row.patient_id is not None:
+                self._patient_overrides.setdefault(row.patient_id, {})[spec['name']] = spec
+            elif row.ward:
+                ward_overrides.setdefault(row.ward, {})[spec['name']] = spec
+            else:
+                base[spec['name']] = spec
+
+        self._base = base
+        self._ward_specs = {ward: {**base, **specs} for ward, specs in ward_overrides.items()}
+        self.global_rules = _compile(base)
+        self._by_ward = {ward: _compile(specs) for ward, specs in self._ward_specs.items()}
+        # (patient_id, ward) -> compiled rules; filled lazily since a patient's
+        # ward can change without the rules changing
+        self._by_patient = {}
+
+    def rules_for(self, patient_id=None, ward=None):
+        """Compiled rules that apply to a patient (patient > ward > global)."""
+        if patient_id in self._patient_overrides:
+            key = (patient_id, ward)
+            rules = self._by_patient.get(key)
+            if rules is None:
+                specs = {**self._ward_specs.get(ward, self._base), **self._patient_overrides[patient_id]}
+                rules = self._by_patient[key] = _compile(specs)
+            return rules
+        return self._by_ward.get(ward, self.global_rules)
+
+    @staticmethod
+    def evaluate(rules, values):
+        """Return the alert-raising rules triggered by values=(heart_rate, temperature, spo2)."""
+        triggered = []
+        for rule in rules:
+            if rule.severity is None:
+                continue
+            v = values[rule.vital_index]
+            if v is None:
+                continue
+            if (rule.lo is not None and v < rule.lo) or (rule.hi is not None and v > rule.hi):
+                triggered.append((rule, v))
+        return triggered
+
+    def evaluate_many(self, readings, wards=None):
+        """Evaluate a sequence of reading dicts; returns one triggered list per reading."""
+        wards = wards or {}
+        out = []
+        for r in readings:
+            pid = r['patient_id']
+            rules = self.rules_for(pid, wards.get(pid))
+            out.append(self.evaluate(rules, (r.get('heart_rate'), r.get('temperature'), r.get('spo2'))))
+        return out
+
+    @staticmethod
+    def risk_points(rules, values):
+        """Risk contribution of a reading: per vital, the highest risk_points among triggered rules."""
+        best = [0] * len(VITAL_FIELDS)
+        for rule in rules:
+            v = values[rule.vital_index]
+            if v is None or rule.risk_points <= best[rule.vital_index]:
+                continue
+            if (rule.lo is not None and v < rule.lo) or (rule.hi is not None and v > rule.hi):
+                best[rule.vital_index] = rule.risk_points
+        return sum(best)
+
+
+def _rules_stamp():
+    count, latest = db.session.query(func.count(AlertRule.id), func.max(AlertRule.updated_at)).one()
+    return count, latest
+
+
+def _load_engine():
+    stamp = _rules_stamp()
+    rows = AlertRule.query.all() if stamp[0] else []
+    return RuleEngine(current_app.config.get('ALERT_RULES', []), rows, stamp=stamp)
+
+
+def get_rule_engine():
+    """Return the current RuleEngine for this app, reloading it if rules changed."""
+    state = current_app.extensions.setdefault('alert_rules', {'engine': None, 'checked_at': 0.0})
+    engine = state['engine']
+    now = time.monotonic()
+    if engine is None:
+        state['engine'] = engine = _load_engine()
+        state['checked_at'] = now
+    elif now - state['checked_at'] >= current_app.config.get('ALERT_RULES_RELOAD_SECONDS', 30):
+        state['checked_at'] = now
+        if _rules_stamp() != engine.stamp:
+            state['engine'] = engine = _load_engine()
+    return engine
+
+
+def invalidate_rules():
+    """Drop the compiled rules so the next get_rule_engine() call rebuilds them."""
+    current_app.extensions.setdefault('alert_rules', {})['engine'] = None
+
+
+def patient_wards(patient_ids):
+    """Map patient id -> ward for the given ids in one query."""
+    if not patient_ids:
+        return {}
+    rows = db.session.query(Patient.id, Patient.ward).filter(Patient.id.in_(set(patient_ids)))
+    return {pid: ward for pid, ward in rows}
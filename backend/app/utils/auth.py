@@ -1,7 +1,6 @@
 from functools import wraps
 from flask import request, g, jsonify
-from app import db
-from app.models import User
+from app.utils.identity_cache import load_user_by_id, load_user_by_token
 import re
 from flask_jwt_extended import jwt_required, current_user
 
@@ -20,11 +19,16 @@ def get_current_user():
     """
     Retrieves user from legacy API token or X-User-Id header.
     Sets g.current_user and request.current_user if found.
+    Users come from the identity cache, and are resolved once per request.
     """
+    cached = getattr(request, 'current_user', None)
+    if cached is not None:
+        return cached
+
     # 1) Token in Authorization header
     token = _get_token_from_header()
     if token:
-        u = User.query.filter_by(api_token=token).first()
+        u = load_user_by_token(token)
         if u:
             g.current_user = u
             request.current_user = u # For consistency with JWT
@@ -34,7 +38,7 @@ def get_current_user():
     uid = request.headers.get('X-User-Id')
     if uid:
         try:
-            u = db.session.get(User, int(uid))
+            u = load_user_by_id(int(uid))
             if u:
                 g.current_user = u
                 request.current_user = u # For consistency with JWT
@@ -0,0 +1,70 @@
+"""In-process periodic background workers.
+
+Workers are registered while the app is created but only started on the first
+request, so scripts and tests that merely build the app do not spawn threads.
+Nothing is started when app.testing is set or BACKGROUND_WORKERS_ENABLED is
+false; each job also has a tools/ CLI for running it out of process.
+"""
+import threading
+
+from app import db
+
+
+def register_periodic(app, name, func, interval_key):
+    """Run func() inside an app context every app.config[interval_key] seconds (<= 0 disables)."""
+    app.extensions.setdefault('background_workers', {})[name] = (func, interval_key)
+
+
+def register_startup(app, name, func):
+    """Run func() once inside an app context, in its own thread, when the workers start."""
+    app.extensions.setdefault('background_startup', {})[name] = func
+
+
+def _run_once(app, name, func):
+    with app.app_context():
+        try:
+            func()
+        except Exception:
+            app.logger.exception('background startup job %s failed', name)
+        finally:
+            db.session.remove()
+
+
+def _loop(app, name, func, interval, stop):
+    while not stop.wait(interval):
+        with app.app_context():
+            try:
+                func()
+            except Exception:
+                app.logger.exception('background worker %s failed', name)
+            finally:
+                db.session.remove()
+
+
+def start_workers(app):
+    stop = threading.Event()
+    app.extensions['background_stop'] = stop
+    for name, func in app.extensions.get('background_startup', {}).items():
+        threading.Thread(target=_run_once, args=(app, name, func), name=name, daemon=True).start()
+    for name, (func, interval_key) in app.extensions.get('background_workers', {}).items():
+        interval = app.config.get(interval_key) or 0
+        if interval <= 0:
+            continue
+        threading.Thread(target=_loop, args=(app, name, func, interval, stop), name=name, daemon=True).start()
+
+
+def init_app(app):
+    state = {'started': False}
+    lock = threading.Lock()
+
+    @app.before_request
+    def _start_background_workers():
+        if state['started']:
+            return
+        with lock:
+            if state['started']:
+                return
+            state['started'] = True
+            if app.testing or not app.config.get('BACKGROUND_WORKERS_ENABLED', True):
+                return
+            start_workers(app)
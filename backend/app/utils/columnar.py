@@ -0,0 +1,117 @@
+"""Columnar encodings of vitals for charts and analytics notebooks.
+
+Rows come straight off the DB cursor as plain tuples (no ORM objects, no
+per-row dicts or isoformat()) and are encoded a partition at a time:
+
+- columnar JSON: {"timestamp": [epoch ms, ...], "heart_rate": [...], ...}
+- packed binary: fixed-width little-endian records, readable with
+  numpy.frombuffer(body, dtype=RECORD_DTYPE); missing values are NaN
+- Arrow IPC stream: one record batch per partition (needs pyarrow)
+"""
+import struct
+from datetime import timedelta
+
+from sqlalchemy import select
+
+from app import db
+from app.models import PatientVital
+from app.utils.dates import EPOCH, as_utc
+
+COLUMNS = ('timestamp', 'heart_rate', 'temperature', 'spo2')
+
+# numpy dtype description of one packed record
+RECORD_DTYPE = [('timestamp', '<i8'), ('heart_rate', '<f4'), ('temperature', '<f4'), ('spo2', '<f4')]
+_RECORD = struct.Struct('<qfff')
+_NAN = float('nan')
+_MS = timedelta(milliseconds=1)
+
+
+def vitals_select(patient_id, start=None, end=None):
+    """Tuples of COLUMNS for one patient, oldest first."""
+    stmt = select(PatientVital.timestamp, PatientVital.heart_rate, PatientVital.temperature, PatientVital.spo2)
+    stmt = stmt.where(PatientVital.patient_id == patient_id)
+    if start is not None:
+        stmt = stmt.where(PatientVital.timestamp >= start)
+    if end is not None:
+        stmt = stmt.where(PatientVital.timestamp <= end)
+    return stmt.order_by(PatientVital.timestamp, PatientVital.id)
+
+
+def iter_partitions(stmt, size):
+    """Stream the result of `stmt` from the server-side cursor in lists of `size` rows."""
+    result = db.session.execute(stmt.execution_options(yield_per=size))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+
+def epoch_ms(ts):
+    return (as_utc(ts) - EPOCH) // _MS
+
+
+def to_columns(rows, names=COLUMNS):
+    """Transpose row tuples into {name: [values]}, with timestamps as epoch milliseconds."""
+    columns = {name: [] for name in names}
+    if not rows:
+        return columns
+    for name, values in zip(names, zip(*rows)):
+        columns[name] = [epoch_ms(v) for v in values] if name == 'timestamp' else list(values)
+    return columns
+
+
+def iter_packed(partitions):
+    """Encode partitions of (timestamp, heart_rate, temperature, spo2) as packed records."""
+    pack = _RECORD.pack
+    for rows in partitions:
+        yield b''.join(
+            pack(epoch_ms(ts), _NAN if hr is None else hr, _NAN if temp is None else temp,
+                 _NAN if spo2 is None else spo2)
+            for ts, hr, temp, spo2 in rows
+        )
+
+
+class _Chunks:
+    """Minimal writable file object so the Arrow writer's output can be yielded as it is produced."""
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data, self.parts = b''.join(self.parts), []
+        return data
+
+
+def arrow_schema(pa):
+    return pa.schema([
+        ('timestamp', pa.timestamp('ms', tz='UTC')),
+        ('heart_rate', pa.int32()),
+        ('temperature', pa.float64()),
+        ('spo2', pa.int32()),
+    ])
+
+
+def iter_arrow(pa, partitions):
+    """Encode partitions as an Arrow IPC stream, one record batch per partition."""
+    schema = arrow_schema(pa)
+    sink = _Chunks()
+    writer = pa.ipc.new_stream(sink, schema)
+    yield sink.drain()
+    for rows in partitions:
+        cols = to_columns(rows)
+        writer.write_batch(pa.record_batch([cols[name] for name in COLUMNS], schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
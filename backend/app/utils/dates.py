@@ -0,0 +1,18 @@
+"""Small datetime helpers shared by the analytics and rollup code."""
+from datetime import datetime, timedelta, timezone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def as_utc(dt):
+    """SQLite hands back naive datetimes; treat them as UTC."""
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def floor_time(dt, seconds):
+    """Round `dt` down to a multiple of `seconds` since the Unix epoch."""
+    dt = as_utc(dt)
+    offset = (dt - EPOCH) // timedelta(seconds=1)
+    return EPOCH + timedelta(seconds=offset - offset % seconds)
@@ -0,0 +1,131 @@
+"""Engine options, SQLite pragmas, read-replica routing and dialect upserts.
+
+Connection pool settings come from config (SQLALCHEMY_POOL_*), and file-based
+SQLite databases get SQLITE_JOURNAL_MODE / SQLITE_SYNCHRONOUS /
+SQLITE_BUSY_TIMEOUT_MS on every new connection.
+
+Each URL in SQLALCHEMY_REPLICA_URIS gets its own engine (same pool options,
+kept in app.extensions['replica_engines'], not a Flask-SQLAlchemy bind, so
+db.create_all() never touches them). Each call of a view wrapped in
+@read_replica picks the next engine in turn and sends all of its SELECTs
+there, so everything one response reads comes from the same replica; flushes,
+INSERT/UPDATE/DELETE statements and every other view keep using the primary. Code that reads in order to write
+(e.g. refreshing stale risk scores) runs inside on_primary() so its reads are
+not behind its writes.
+"""
+import itertools
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+
+def engine_options(config, uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for `uri`; SQLite keeps Flask-SQLAlchemy's own pool choice."""
+    if make_url(uri).get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': config.get('SQLALCHEMY_POOL_SIZE', 10),
+        'max_overflow': config.get('SQLALCHEMY_MAX_OVERFLOW', 20),
+        'pool_timeout': config.get('SQLALCHEMY_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('SQLALCHEMY_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('SQLALCHEMY_POOL_PRE_PING', True),
+    }
+
+
+def configure_app(app):
+    """Set engine options and create the replica engines; call before db.init_app(app)."""
+    cfg = app.config
+    cfg['SQLALCHEMY_ENGINE_OPTIONS'] = {**engine_options(cfg, cfg['SQLALCHEMY_DATABASE_URI']),
+                                        **cfg.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+    engines = [create_engine(uri, **engine_options(cfg, uri)) for uri in cfg.get('SQLALCHEMY_REPLICA_URIS') or []]
+    app.extensions['replica_engines'] = engines
+    app.extensions['replica_cycle'] = itertools.cycle(engines) if engines else None
+
+
+def install_sqlite_pragmas(app, engines):
+    """Apply the SQLITE_* pragmas to every new connection of file-based SQLite engines."""
+    cfg = app.config
+    pragmas = [
+        ('journal_mode', cfg.get('SQLITE_JOURNAL_MODE')),
+        ('synchronous', cfg.get('SQLITE_SYNCHRONOUS')),
+        ('busy_timeout', cfg.get('SQLITE_BUSY_TIMEOUT_MS')),
+    ]
+    pragmas = [(name, value) for name, value in pragmas if value not in (None, '')]
+    for engine in engines:
+        if engine.dialect.name != 'sqlite' or engine.url.database in (None, '', ':memory:'):
+            continue
+
+        @event.listens_for(engine, 'connect')
+        def _set_pragmas(dbapi_conn, _record):
+            cursor = dbapi_conn.cursor()
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+            cursor.close()
+
+
+def upsert(session, table, key_columns, update):
+    """INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE for the session's primary dialect.
+
+    update(new) returns the SET clause; `new` refers to the row that was
+    proposed for insertion (EXCLUDED / VALUES()). Execute the statement with
+    a list of row mappings.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == 'mysql' or dialect == 'mariadb':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        return stmt.on_duplicate_key_update(**update(stmt.inserted))
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(index_elements=key_columns, set_=update(stmt.excluded))
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs to the engine in session.info['read_replica'] while it is set."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('read_replica')
+        if bind is None and replica is not None and getattr(clause, 'is_select', False):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def current_replica():
+    """The replica engine the current @read_replica view reads from, or None."""
+    from app import db
+    return db.session.info.get('read_replica')
+
+
+@contextmanager
+def on_primary():
+    """Send the block's SELECTs to the primary, also inside a @read_replica view."""
+    from app import db
+    replica = db.session.info.pop('read_replica', None)
+    try:
+        yield
+    finally:
+        if replica is not None:
+            db.session.info['read_replica'] = replica
+
+
+def read_replica(f):
+    """Run the view's SELECTs against one replica (no-op without SQLALCHEMY_REPLICA_URIS)."""
+    @wraps(f)
+    def wrapped(*args, **kwargs):
+        from app import db
+        replicas = current_app.extensions.get('replica_cycle')
+        if replicas is None or db.session.info.get('read_replica') is not None:
+            return f(*args, **kwargs)
+        db.session.info['read_replica'] = next(replicas)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            db.session.info.pop('read_replica', None)
+    return wrapped
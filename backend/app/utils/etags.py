@@ -0,0 +1,218 @@
+"""ETags for polled GET endpoints, derived from write version counters.
+
+data_versions holds one counter per name: 'patients', 'alerts', 'risk',
+'users' for whole tables, 'patient:<id>' for everything shown about
+one patient, and 'patient:*' for writes to patient data that cannot be tied
+to specific patients (bulk UPDATE/DELETE). Session events note which names a
+transaction touches (ORM flushes and Core statements run through the
+session) and bump them just before it commits, in the same transaction.
+
+@conditional builds the ETag from those counters plus the request path and
+query string, without running the view. If it matches If-None-Match the view
+is skipped and 304 returned. Counters are cached per process for
+ETAG_VERSION_CACHE_MS, and replaced by the committed values when this process
+commits a bump, so a rapid poll needs no query at all. Another process's write
+can therefore take up to that long to change the ETag here.
+
+Put @conditional inside @read_replica: the counters are then read from the
+same replica as the response body (and cached per replica), so a lagging
+replica cannot pair a newer ETag with an older body.
+
+The committed counters are also left in session.info['committed_versions']
+for other after_commit listeners (app.utils.hot_vitals).
+"""
+import hashlib
+import itertools
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, current_app, has_app_context, make_response, request
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.models import DataVersion
+from app.utils.db_routing import current_replica, upsert
+
+ALL_PATIENTS = 'patient:*'
+
+# table -> (table-level version name or None, column holding the patient id or None)
+TRACKED = {
+    'patients': ('patients', 'id'),
+    'patient_vitals': (None, 'patient_id'),
+    'alerts': ('alerts', 'patient_id'),
+    'notes': (None, 'patient_id'),
+    'patient_risk': ('risk', 'patient_id'),
+    'users': ('users', None),
+}
+
+
+def patient_key(patient_id):
+    return f'patient:{patient_id}'
+
+
+def _names(table, patient_ids):
+    """Version names touched by a write to `table`; patient_ids None means unknown."""
+    table_name, pid_column = TRACKED[table]
+    names = {table_name} if table_name else set()
+    if pid_column:
+        if patient_ids is None:
+            names.add(ALL_PATIENTS)
+        else:
+            names.update(patient_key(pid) for pid in patient_ids if pid is not None)
+    return names
+
+
+def _touch(session, names):
+    session.info.setdefault('touched_versions', set()).update(names)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table not in TRACKED or (obj in session.dirty and not session.is_modified(obj)):
+            continue
+        pid_column = TRACKED[table][1]
+        _touch(session, _names(table, [getattr(obj, pid_column)] if pid_column else []))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_execute(state):
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table = getattr(state.statement.table, 'name', None)
+    if table not in TRACKED:
+        return
+    pid_column = TRACKED[table][1]
+    patient_ids = None
+    if state.is_insert and pid_column:
+        rows = state.parameters if isinstance(state.parameters, list) else [state.parameters or {}]
+        if all(pid_column in row for row in rows):
+            patient_ids = {row[pid_column] for row in rows}
+    elif not pid_column:
+        patient_ids = []
+    _touch(session=state.session, names=_names(table, patient_ids))
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_versions(session):
+    session.info.pop('committed_versions', None)
+    session.flush()  # collect names from pending ORM changes too
+    names = sorted(session.info.pop('touched_versions', ()))
+    if not names:
+        return
+    table = DataVersion.__table__
+    stmt = upsert(session, table, [table.c.name],
+                  lambda new: {'version': table.c.version + 1, 'updated_at': new.updated_at})
+    now = datetime.now(timezone.utc)
+    rows = [{'name': n, 'version': 1, 'updated_at': now} for n in names]
+    if session.get_bind().dialect.insert_executemany_returning:
+        committed = dict(session.execute(stmt.returning(table.c.name, table.c.version), rows).all())
+    else:
+        session.execute(stmt, rows)
+        committed = dict(session.execute(select(table.c.name, table.c.version).where(table.c.name.in_(names))).all())
+    session.info['committed_versions'] = committed
+
+
+@event.listens_for(Session, 'after_commit')
+def _remember_committed(session):
+    committed = session.info.get('committed_versions')
+    if committed and has_app_context():
+        cache = current_app.extensions.get('version_cache')
+        if cache is not None:
+            cache.put(committed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_touched(session):
+    session.info.pop('touched_versions', None)
+    session.info.pop('committed_versions', None)
+
+
+class VersionCache:
+    def __init__(self, ttl_seconds):
+        self.ttl = ttl_seconds
+        self._entries = {}  # name -> (version, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, session, names):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for n in names:
+                entry = self._entries.get(n)
+                if entry and entry[1] > now:
+                    found[n] = entry[0]
+        missing = [n for n in names if n not in found]
+        if missing:
+            rows = dict(session.execute(
+                select(DataVersion.name, DataVersion.version).where(DataVersion.name.in_(missing))).all())
+            fetched = {n: rows.get(n, 0) for n in missing}
+            if self.ttl > 0:
+                with self._lock:
+                    for n, v in fetched.items():
+                        self._entries[n] = (v, now + self.ttl)
+            found.update(fetched)
+        return [found[n] for n in names]
+
+    def put(self, versions):
+        if self.ttl <= 0:
+            return
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for n, v in versions.items():
+                entry = self._entries.get(n)
+                if entry is None or entry[0] <= v:  # never go back past a newer value read meanwhile
+                    self._entries[n] = (v, expires)
+
+
+def get_versions(names):
+    from app import db
+    ext = current_app.extensions
+    ttl = current_app.config.get('ETAG_VERSION_CACHE_MS', 1000) / 1000.0
+    replica = current_replica()
+    if replica is not None:  # never the primary's values: they can be ahead of what the replica serves
+        cache = ext.setdefault('replica_version_caches', {}).get(replica)
+        if cache is None:
+            cache = ext['replica_version_caches'][replica] = VersionCache(ttl)
+    else:
+        if 'version_cache' not in ext:
+            ext['version_cache'] = VersionCache(ttl)
+        cache = ext['version_cache']
+    return cache.get(db.session, list(names))
+
+
+def time_bucket():
+    """Changes every ETAG_TIME_BUCKET_SECONDS, for responses that also depend on the clock."""
+    return int(time.time() // current_app.config.get('ETAG_TIME_BUCKET_SECONDS', 60))
+
+
+def conditional(scope):
+    """Answer 304 when If-None-Match matches the ETag built from scope(**view_kwargs).
+
+    scope returns (version names, extra JSON-able key parts), or None to skip
+    ETag handling for this request (e.g. invalid arguments).
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapped(*args, **kwargs):
+            spec = scope(**kwargs)
+            if spec is None:
+                return f(*args, **kwargs)
+            names, extra = spec
+            key = json.dumps([request.full_path, list(names), get_versions(names), extra], default=str)
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+            if request.if_none_match.contains(etag):
+                res = Response(status=304)
+            else:
+                res = make_response(f(*args, **kwargs))
+                if res.status_code != 200:
+                    return res
+            res.set_etag(etag)
+            res.headers['Cache-Control'] = 'private, no-cache'
+            return res
+        return wrapped
+    return decorator
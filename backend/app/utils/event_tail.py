@@ -0,0 +1,100 @@
+"""Publish vitals and alerts inserted by any process to this process's SSE clients.
+
+The event broker only reaches subscribers of the process that published, so
+readings taken by the ASGI ingest process (or another gunicorn worker) never
+reach /stream/... clients here. With SSE_DB_TAIL_SECONDS > 0 every web
+process instead polls patient_vitals and alerts for rows above the highest
+id it has published, and publish_readings() stops publishing directly (the
+tail picks up this process's own inserts too). Events arrive up to
+SSE_DB_TAIL_SECONDS late.
+
+Ids are handed out before commit, so a row can become visible after a higher
+id was already read. Ids skipped that way are re-checked on each poll for
+SSE_DB_TAIL_GAP_SECONDS (rolled-back inserts leave gaps that never fill).
+Nothing is read while this process has no subscribers; the tail starts again
+from the newest row when one connects.
+"""
+import time
+
+from flask import current_app
+from sqlalchemy import func
+
+from app import db
+from app.models import Alert, PatientVital
+from app.utils.dates import as_utc
+from app.utils.events import WARD_TOPIC, get_broker, patient_topic
+from app.utils.read_models import ALERT_COLUMNS, VITAL_COLUMNS
+
+# A jump larger than this is not treated as in-flight rows (e.g. ids reserved in bulk)
+_MAX_GAP = 1000
+
+
+class TableTail:
+    def __init__(self, event_type, model, columns, time_keys):
+        self.event_type = event_type
+        self.model = model
+        self.columns = columns
+        self.keys = tuple(c.key for c in columns)
+        self.time_keys = time_keys
+        self.last_id = None  # None: not started
+        self.gaps = {}  # id not seen yet -> monotonic time it was skipped
+
+    def reset(self):
+        self.last_id = None
+        self.gaps = {}
+
+    def poll(self, limit, gap_seconds):
+        """Payload dicts of rows committed since the last poll, oldest id first."""
+        id_col = self.model.id
+        if self.last_id is None:
+            self.last_id = db.session.query(func.max(id_col)).scalar() or 0
+            return []
+        now = time.monotonic()
+        late = []
+        if self.gaps:
+            late = db.session.query(*self.columns).filter(id_col.in_(list(self.gaps))).order_by(id_col).all()
+            for row in late:
+                del self.gaps[row.id]
+            self.gaps = {i: t for i, t in self.gaps.items() if now - t < gap_seconds}
+        rows = db.session.query(*self.columns).filter(id_col > self.last_id).order_by(id_col).limit(limit).all()
+        expected = self.last_id + 1
+        for row in rows:
+            if row.id - expected <= _MAX_GAP:
+                self.gaps.update((missing, now) for missing in range(expected, row.id))
+            expected = row.id + 1
+        if rows:
+            self.last_id = rows[-1].id
+        return [self._payload(row) for row in late + rows]
+
+    def _payload(self, row):
+        d = dict(zip(self.keys, row))
+        for key in self.time_keys:
+            d[key] = as_utc(d[key]).isoformat() if d[key] else None
+        return d
+
+
+def _tails():
+    ext = current_app.extensions
+    if 'sse_tail' not in ext:
+        ext['sse_tail'] = [
+            TableTail('vital', PatientVital, VITAL_COLUMNS, ('timestamp',)),
+            TableTail('alert', Alert, ALERT_COLUMNS, ('created_at', 'escalated_at', 'reviewed_at', 'closed_at')),
+        ]
+    return ext['sse_tail']
+
+
+def tail_events():
+    """Publish new vitals and alerts (periodic job, every SSE_DB_TAIL_SECONDS); returns events published."""
+    cfg = current_app.config
+    broker = get_broker()
+    tails = _tails()
+    if not broker.stats()['subscribers']:
+        for tail in tails:
+            tail.reset()
+        return 0
+    published = 0
+    for tail in tails:
+        for data in tail.poll(cfg.get('SSE_DB_TAIL_BATCH', 1000), cfg.get('SSE_DB_TAIL_GAP_SECONDS', 5)):
+            broker.publish(tail.event_type, data, (WARD_TOPIC, patient_topic(data['patient_id'])))
+            published += 1
+    return published
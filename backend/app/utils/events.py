@@ -0,0 +1,111 @@
+"""In-process pub/sub used to push vitals and alerts to SSE clients.
+
+Publishers call publish(event_type, data, topics) after their transaction
+commits; each SSE connection holds a Subscription with a bounded queue. The
+broker lives in app.extensions['event_broker'] and can be replaced with any
+object offering the same subscribe/unsubscribe/publish methods (e.g. one
+backed by Redis pub/sub) when several processes need to share events, or
+vitals and alerts can be read back from the database (app.utils.event_tail).
+
+Topics: 'ward' (everything) and 'patient:<id>'.
+"""
+import itertools
+import queue
+import threading
+
+from flask import current_app
+
+WARD_TOPIC = 'ward'
+
+
+def patient_topic(patient_id):
+    return f'patient:{patient_id}'
+
+
+class Subscription:
+    def __init__(self, topics, max_queue):
+        self.topics = frozenset(topics)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def put(self, event):
+        """Enqueue without blocking the publisher; a slow client loses its oldest events."""
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next event, or None after `timeout` seconds without one."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class InProcessBroker:
+    """Fan-out to the subscriptions of this process only."""
+
+    def __init__(self, max_queue=1000):
+        self.max_queue = max_queue
+        self._subs = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, topics):
+        sub = Subscription(topics, self.max_queue)
+        with self._lock:
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs.discard(sub)
+
+    def publish(self, event_type, data, topics):
+        event = {'id': next(self._ids), 'event': event_type, 'data': data}
+        topics = set(topics)
+        with self._lock:
+            targets = [s for s in self._subs if s.topics & topics]
+        for sub in targets:
+            sub.put(event)
+        return len(targets)
+
+    def stats(self):
+        with self._lock:
+            subs = list(self._subs)
+        return {'subscribers': len(subs), 'dropped_events': sum(s.dropped for s in subs)}
+
+
+def get_broker():
+    ext = current_app.extensions
+    broker = ext.get('event_broker')
+    if broker is None:
+        broker = ext['event_broker'] = InProcessBroker(current_app.config.get('SSE_QUEUE_SIZE', 1000))
+    return broker
+
+
+def publish_readings(results):
+    """Publish (vital_dict, [alert_dicts]) results from evaluate_readings().
+
+    Does nothing with SSE_DB_TAIL_SECONDS set; app.utils.event_tail publishes them then.
+    """
+    if current_app.config.get('SSE_DB_TAIL_SECONDS'):
+        return
+    broker = get_broker()
+    for vital, alerts in results:
+        topics = (WARD_TOPIC, patient_topic(vital['patient_id']))
+        broker.publish('vital', vital, topics)
+        for alert in alerts:
+            broker.publish('alert', alert, topics)
+
+
+def publish_alert_update(alert_dict):
+    """Publish an alert whose lifecycle changed (escalated, reviewed, closed)."""
+    get_broker().publish('alert_updated', alert_dict, (WARD_TOPIC, patient_topic(alert_dict['patient_id'])))
@@ -0,0 +1,73 @@
+"""Bulk NDJSON/CSV export of patient_vitals and alerts, shared by /exports and tools/export_data.py.
+
+Rows are selected as plain tuples in primary-key order and read from the DB
+cursor in chunks (yield_per), then encoded one chunk at a time, so memory use
+does not depend on the size of the range.
+"""
+import csv
+import io
+import json
+
+from app.models import Alert, PatientVital
+from app.utils.columnar import iter_partitions
+from app.utils.dates import as_utc
+from sqlalchemy import select
+
+FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+# export name -> (model, time column used for the range, exported columns)
+TABLES = {
+    'vitals': (PatientVital, 'timestamp', ('id', 'patient_id', 'timestamp', 'heart_rate', 'temperature', 'spo2')),
+    'alerts': (Alert, 'created_at', (
+        'id', 'patient_id', 'severity', 'message', 'created_at',
+        'escalated', 'escalated_at', 'escalated_by',
+        'reviewed', 'reviewed_at', 'reviewed_by',
+        'closed', 'closed_at', 'closed_by',
+    )),
+}
+
+
+def export_select(table, start=None, end=None, patient_ids=None):
+    """SELECT for `table` ('vitals' or 'alerts') over [start, end), optionally limited to some patients."""
+    model, time_col, columns = TABLES[table]
+    ts = getattr(model, time_col)
+    stmt = select(*(getattr(model, c) for c in columns))
+    if start is not None:
+        stmt = stmt.where(ts >= start)
+    if end is not None:
+        stmt = stmt.where(ts < end)
+    if patient_ids:
+        stmt = stmt.where(model.patient_id.in_(patient_ids))
+    return stmt.order_by(model.id)
+
+
+def _plain(value):
+    if hasattr(value, 'isoformat'):
+        return as_utc(value).isoformat()
+    return value
+
+
+def _iter_ndjson(columns, partitions):
+    dumps = json.dumps
+    for rows in partitions:
+        yield ''.join(dumps(dict(zip(columns, map(_plain, row))), separators=(',', ':')) + '\n' for row in rows)
+
+
+def _iter_csv(columns, partitions):
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\n')
+    writer.writerow(columns)
+    for rows in partitions:
+        writer.writerows([_plain(v) for v in row] for row in rows)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+
+def iter_export(table, fmt, start=None, end=None, patient_ids=None, batch_size=10000):
+    """Yield `table` as text chunks in `fmt` ('ndjson' or 'csv'), one chunk per batch of rows."""
+    columns = TABLES[table][2]
+    partitions = iter_partitions(export_select(table, start, end, patient_ids), batch_size)
+    encode = _iter_ndjson if fmt == 'ndjson' else _iter_csv
+    return encode(columns, partitions)
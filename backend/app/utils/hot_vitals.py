@@ -0,0 +1,264 @@
+"""Process-local cache of each patient's newest vitals and open alerts.
+
+Patient detail and the dashboard's per-patient mini-trends (first page of
+/patients/<id>/vitals) both read the same handful of newest rows. Here they are kept per patient: the last
+HOT_VITALS_PER_PATIENT vitals, oldest to newest, and the open alerts (as
+get_patient shows them, with the acting users' names). At most
+HOT_VITALS_MAX_PATIENTS patients are kept, least recently used first out.
+
+Consistency uses the write counters from app.utils.etags: an entry records
+the 'patient:<id>' and 'patient:*' versions it reflects and is only served
+while they are current. When evaluate_readings() commits in this process, the
+new vitals and alerts are added to the entry in place, provided the entry was
+current just before that commit. Otherwise the entry is reloaded on its next
+read. Writes made by other processes are therefore noticed within
+ETAG_VERSION_CACHE_MS, like ETags.
+
+Entries are warmed for the most recently active patients when the background
+workers start. Timestamps are held as the database returns them (naive UTC on
+SQLite and MySQL), so cached and uncached responses and cursors are identical.
+"""
+import bisect
+import threading
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, aliased
+
+from app import db
+from app.models import Alert, PatientVital, User
+from app.utils.dates import as_utc
+from app.utils.etags import ALL_PATIENTS, get_versions, patient_key
+from app.utils.read_models import ALERT_COLUMNS, VITAL_COLUMNS
+
+_VITAL_KEYS = tuple(c.key for c in VITAL_COLUMNS)
+_ALERT_KEYS = tuple(c.key for c in ALERT_COLUMNS)
+_ALERT_TIMES = ('created_at', 'escalated_at', 'reviewed_at', 'closed_at')
+_ACTORS = (('escalated_by', 'escalated_by_name'), ('reviewed_by', 'reviewed_by_name'), ('closed_by', 'closed_by_name'))
+
+
+def _stored(dt, naive):
+    """A written datetime as the database will return it."""
+    dt = as_utc(dt)
+    return dt.replace(tzinfo=None) if naive and dt is not None else dt
+
+
+def _vital_from_write(row, naive):
+    d = {k: row[k] for k in _VITAL_KEYS}
+    d['timestamp'] = _stored(d['timestamp'], naive)
+    return d
+
+
+def _alert_from_write(row, naive):
+    d = {k: row[k] for k in _ALERT_KEYS}
+    for key in _ALERT_TIMES:
+        d[key] = _stored(d[key], naive)
+    return d
+
+
+def _alert_from_row(row):
+    n = len(_ALERT_KEYS)
+    d = dict(zip(_ALERT_KEYS, row[:n]))
+    for (by, name_key), name in zip(_ACTORS, row[n:]):
+        if d[by]:
+            d[name_key] = name
+    return d
+
+
+def _sort_key(vital):
+    return vital['timestamp'], vital['id']
+
+
+class _Entry:
+    __slots__ = ('version', 'vitals', 'keys', 'complete', 'alerts')
+
+    def __init__(self, version, vitals, complete, alerts):
+        self.version = version  # (patient:<id>, patient:*) counters this entry reflects
+        self.vitals = vitals  # oldest first
+        self.keys = [_sort_key(v) for v in vitals]
+        self.complete = complete  # the patient has no older vitals than these
+        self.alerts = alerts  # open alerts, oldest first; None if over max_alerts
+
+
+class HotVitals:
+    def __init__(self, per_patient=50, max_patients=5000, max_alerts=100):
+        self.per_patient = per_patient
+        self.max_patients = max_patients
+        self.max_alerts = max_alerts
+        self._entries = OrderedDict()  # patient id -> _Entry
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.bypassed = self.write_through = self.evictions = 0
+
+    def get(self, patient_id):
+        """(vitals newest first, open alerts newest first or None, complete), or None to read the DB.
+
+        `complete` is True when the patient has no vitals beyond those returned.
+        Returns None while the session holds uncommitted writes, which the
+        cache cannot see.
+        """
+        session = db.session
+        if session.info.get('touched_versions') or session.new or session.dirty or session.deleted:
+            self.bypassed += 1
+            return None
+        version = tuple(get_versions([patient_key(patient_id), ALL_PATIENTS]))
+        with self._lock:
+            entry = self._entries.get(patient_id)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(patient_id)
+                self.hits += 1
+                return self._view(entry)
+            self.misses += 1
+        entry = self._load([patient_id], version)[patient_id]
+        with self._lock:
+            return self._view(entry)
+
+    def warm(self):
+        """Load entries for the most recently active patients (up to max_patients)."""
+        pids = [pid for pid, in db.session.query(PatientVital.patient_id)
+                .group_by(PatientVital.patient_id)
+                .order_by(func.max(PatientVital.id).desc())
+                .limit(self.max_patients)]
+        if not pids:
+            return 0
+        names = [ALL_PATIENTS] + [patient_key(pid) for pid in pids]
+        versions = dict(zip(names, get_versions(names)))
+        for i in range(0, len(pids), 500):
+            chunk = pids[i:i + 500]
+            self._load(chunk, {pid: (versions[patient_key(pid)], versions[ALL_PATIENTS]) for pid in chunk})
+        return len(pids)
+
+    def apply(self, writes, committed, naive):
+        """Add committed (vital mapping, [alert mappings]) writes to current entries.
+
+        naive: the database returns timezone-naive datetimes (SQLite, MySQL).
+        """
+        by_patient = {}
+        for vital, alerts in writes:
+            by_patient.setdefault(vital['patient_id'], []).append((vital, alerts))
+        with self._lock:
+            for pid, items in by_patient.items():
+                entry = self._entries.get(pid)
+                new_version = committed.get(patient_key(pid))
+                if entry is None or new_version is None:
+                    continue
+                if (committed.get(ALL_PATIENTS) is not None or entry.version[0] != new_version - 1
+                        or any(a[by] for _, alerts in items for a in alerts for by, _ in _ACTORS)):
+                    # something else changed too, or an auto-escalation needs its user's name: reload on next read
+                    del self._entries[pid]
+                    continue
+                for vital, alerts in items:
+                    self._add_vital(entry, _vital_from_write(vital, naive))
+                    if entry.alerts is not None:
+                        entry.alerts.extend(_alert_from_write(a, naive) for a in alerts)
+                        if len(entry.alerts) > self.max_alerts:
+                            entry.alerts = None
+                entry.version = (new_version, entry.version[1])
+                self.write_through += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'patients': len(self._entries), 'max_patients': self.max_patients, 'per_patient': self.per_patient,
+                'hits': self.hits, 'misses': self.misses, 'bypassed': self.bypassed,
+                'write_through': self.write_through, 'evictions': self.evictions,
+                'hit_ratio': round(self.hits / total, 3) if total else None,
+            }
+
+    @staticmethod
+    def _view(entry):
+        alerts = entry.alerts[::-1] if entry.alerts is not None else None
+        return entry.vitals[::-1], alerts, entry.complete
+
+    def _add_vital(self, entry, vital):
+        key = _sort_key(vital)
+        if len(entry.vitals) >= self.per_patient and key < entry.keys[0]:
+            entry.complete = False  # older than anything kept
+            return
+        i = bisect.bisect(entry.keys, key)
+        entry.keys.insert(i, key)
+        entry.vitals.insert(i, vital)
+        if len(entry.vitals) > self.per_patient:
+            del entry.keys[0], entry.vitals[0]
+            entry.complete = False
+
+    def _load(self, patient_ids, versions):
+        """Read entries for `patient_ids` from the DB; `versions` were read before the rows."""
+        ranked = db.session.query(
+            *VITAL_COLUMNS,
+            func.row_number().over(partition_by=PatientVital.patient_id,
+                                   order_by=(PatientVital.timestamp.desc(), PatientVital.id.desc())).label('rn'),
+        ).filter(PatientVital.patient_id.in_(patient_ids)).subquery()
+        vitals = {pid: [] for pid in patient_ids}
+        for row in db.session.query(ranked).filter(ranked.c.rn <= self.per_patient):
+            vitals[row.patient_id].append(dict(zip(_VITAL_KEYS, row[:-1])))
+
+        escalator, reviewer, closer = aliased(User), aliased(User), aliased(User)
+        alerts = {pid: [] for pid in patient_ids}
+        rows = (
+            db.session.query(*ALERT_COLUMNS, escalator.name, reviewer.name, closer.name)
+            .outerjoin(escalator, escalator.id == Alert.escalated_by)
+            .outerjoin(reviewer, reviewer.id == Alert.reviewed_by)
+            .outerjoin(closer, closer.id == Alert.closed_by)
+            .filter(Alert.patient_id.in_(patient_ids), Alert.closed == False)
+            .order_by(Alert.created_at, Alert.id)
+        )
+        for row in rows:
+            alerts[row.patient_id].append(_alert_from_row(row))
+
+        entries = {}
+        with self._lock:
+            for pid in patient_ids:
+                version = versions if isinstance(versions, tuple) else versions[pid]
+                kept = sorted(vitals[pid], key=_sort_key)
+                open_alerts = alerts[pid] if len(alerts[pid]) <= self.max_alerts else None
+                entries[pid] = entry = _Entry(version, kept, len(kept) < self.per_patient, open_alerts)
+                self._entries[pid] = entry
+                self._entries.move_to_end(pid)
+            while len(self._entries) > self.max_patients:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entries
+
+
+def get_hot_vitals():
+    """The app's cache, or None when HOT_VITALS_PER_PATIENT is 0."""
+    ext = current_app.extensions
+    if 'hot_vitals' not in ext:
+        cfg = current_app.config
+        per_patient = cfg.get('HOT_VITALS_PER_PATIENT', 50)
+        ext['hot_vitals'] = HotVitals(per_patient, cfg.get('HOT_VITALS_MAX_PATIENTS', 5000),
+                                      cfg.get('HOT_VITALS_MAX_ALERTS', 100)) if per_patient > 0 else None
+    return ext['hot_vitals']
+
+
+def warm_hot_vitals():
+    cache = get_hot_vitals()
+    if cache is not None:
+        n = cache.warm()
+        current_app.logger.info('hot vitals cache warmed for %d patients', n)
+
+
+def record_writes(session, results):
+    """Called by evaluate_readings() with the (vital, [alerts]) mappings it inserted."""
+    session.info.setdefault('hot_vitals_writes', []).extend(results)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_writes(session):
+    writes = session.info.pop('hot_vitals_writes', None)
+    committed = session.info.get('committed_versions')
+    if writes and committed and has_app_context():
+        cache = current_app.extensions.get('hot_vitals')
+        if cache is not None:
+            cache.apply(writes, committed, session.get_bind().dialect.name != 'postgresql')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_writes(session):
+    session.info.pop('hot_vitals_writes', None)
@@ -0,0 +1,173 @@
+"""Process-local TTL/LRU cache of authenticated users.
+
+Every protected request resolves its user by id (JWT) or by API token.
+Instead of a SELECT per request, the user's columns are cached here, keyed by
+id and by a SHA-256 of the token, and turned back into a session-bound User
+with merge(load=False), which does not hit the database.
+
+Entries are dropped when a User is updated or deleted through the ORM (at
+flush, and again after commit). Other processes only see such changes once
+their entry expires, so IDENTITY_CACHE_TTL_SECONDS bounds how long a role or
+token change can take to apply everywhere. A TTL of 0 disables the cache.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app import db
+from app.models import User
+
+# Columns kept in the cache; anything else (password_hash) is loaded on access.
+_COLUMNS = ('id', 'name', 'role', 'api_token', 'email')
+
+
+def token_key(token):
+    return 'token:' + hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def id_key(user_id):
+    return f'id:{user_id}'
+
+
+class IdentityCache:
+    def __init__(self, max_size=1024, ttl=30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, snapshot)
+        self._keys_by_user = {}  # user id -> set of keys
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.invalidations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._drop(key, entry[1]['id'])
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user, *keys):
+        snapshot = {c: getattr(user, c) for c in _COLUMNS}
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key in keys:
+                self._entries[key] = (expires, snapshot)
+                self._entries.move_to_end(key)
+                self._keys_by_user.setdefault(user.id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                key, (_, old) = self._entries.popitem(last=False)
+                self._forget(key, old['id'])
+
+    def invalidate(self, user_id):
+        with self._lock:
+            keys = self._keys_by_user.pop(user_id, ())
+            for key in keys:
+                self._entries.pop(key, None)
+            if keys:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries), 'max_size': self.max_size, 'ttl_seconds': self.ttl,
+                'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / total, 3) if total else None,
+            }
+
+    def _drop(self, key, user_id):
+        self._entries.pop(key, None)
+        self._forget(key, user_id)
+
+    def _forget(self, key, user_id):
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+
+def get_identity_cache():
+    """The app's cache, or None when IDENTITY_CACHE_TTL_SECONDS is 0."""
+    ext = current_app.extensions
+    if 'identity_cache' not in ext:
+        ttl = current_app.config.get('IDENTITY_CACHE_TTL_SECONDS', 30)
+        ext['identity_cache'] = IdentityCache(current_app.config.get('IDENTITY_CACHE_SIZE', 1024), ttl) if ttl > 0 else None
+    return ext['identity_cache']
+
+
+def _attach(snapshot):
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+def load_user_by_id(user_id):
+    cache = get_identity_cache()
+    if cache is None:
+        return db.session.get(User, user_id)
+    key = id_key(user_id)
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        return _attach(snapshot)
+    user = db.session.get(User, user_id)
+    if user is not None:
+        cache.put(user, key)
+    return user
+
+
+def load_user_by_token(token):
+    cache = get_identity_cache()
+    if cache is None:
+        return User.query.filter_by(api_token=token).first()
+    key = token_key(token)
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        return _attach(snapshot)
+    user = User.query.filter_by(api_token=token).first()
+    if user is not None:
+        cache.put(user, key, id_key(user.id))
+    return user
+
+
+def _invalidate(user_id):
+    if has_app_context():
+        cache = current_app.extensions.get('identity_cache')
+        if cache is not None:
+            cache.invalidate(user_id)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    _invalidate(target.id)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault('identity_cache_dirty', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    # a request that read the old row between flush and commit may have re-cached it
+    for user_id in session.info.pop('identity_cache_dirty', ()):
+        _invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('identity_cache_dirty', None)
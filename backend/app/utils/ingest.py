@@ -0,0 +1,147 @@
+"""Vitals ingest shared by the Flask routes and the ASGI front-end (app.asgi).
+
+Both functions take the decoded JSON body and return (response_dict, status),
+so each front-end only has to deal with HTTP and authentication. With
+INGEST_MODE = 'write_behind', single readings go through app.utils.write_behind.
+"""
+from datetime import datetime, timezone
+
+from flask import current_app
+
+from app import db
+from app.models import Patient
+from app.utils.alert_rules import get_rule_engine, patient_wards
+from app.utils.validation import VITAL_FIELDS, parse_vitals, parse_timestamp
+
+
+def ingest_reading(patient_id, payload):
+    """One reading { heart_rate, temperature, spo2 } for patient_id; creates alerts if needed."""
+    payload = payload or {}
+    if not isinstance(payload, dict) or not any(k in payload for k in VITAL_FIELDS):
+        return {'error': 'at least one vital is required'}, 400
+
+    try:
+        hr, temp, spo2 = parse_vitals(payload)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+    patient = db.session.get(Patient, patient_id)
+    if not patient:
+        return {'error': 'patient not found'}, 404
+
+    if current_app.config.get('INGEST_MODE') == 'write_behind':
+        return _queue_reading(patient, hr, temp, spo2)
+
+    from app.utils.simulator import create_vital_and_alerts
+
+    try:
+        vital_dict, alerts_list = create_vital_and_alerts(
+            patient.id,
+            heart_rate=hr,
+            temperature=temp,
+            spo2=spo2
+        )
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    except Exception:
+        return {'error': 'internal server error'}, 500
+
+    return {'vital': vital_dict, 'alerts_created': alerts_list}, 201
+
+
+def _queue_reading(patient, hr, temp, spo2):
+    """Hand a validated reading to the write-behind queue (202), or wait for it if it is critical (201).
+
+    A critical reading that is still queued after INGEST_URGENT_TIMEOUT_SECONDS
+    is answered 202 as well: it will be written, so an error would only make
+    the monitor send it (and its alerts) twice.
+    """
+    from app.utils.write_behind import QueueFull, get_write_behind_queue
+
+    reading = {'patient_id': patient.id, 'heart_rate': hr, 'temperature': temp, 'spo2': spo2,
+               'timestamp': datetime.now(timezone.utc)}
+    [triggered] = get_rule_engine().evaluate_many([reading], {patient.id: patient.ward})
+    critical = any(rule.severity == 'critical' for rule, _ in triggered)
+    try:
+        waiter = get_write_behind_queue(current_app._get_current_object()).submit(reading, patient.ward, urgent=critical)
+    except QueueFull:
+        return {'error': 'ingest queue full, retry shortly'}, 503  # front-ends add Retry-After
+    queued = {'queued': True, 'vital': {**reading, 'timestamp': reading['timestamp'].isoformat()}}, 202
+    if waiter is None:
+        return queued
+    try:
+        vital_dict, alerts_list = waiter.wait(current_app.config.get('INGEST_URGENT_TIMEOUT_SECONDS', 10))
+    except TimeoutError:
+        current_app.logger.warning('critical reading for patient %s still queued; answering 202', patient.id)
+        return queued
+    except Exception:
+        current_app.logger.exception('critical reading for patient %s was not written', patient.id)
+        return {'error': 'internal server error'}, 500
+    return {'vital': vital_dict, 'alerts_created': alerts_list}, 201
+
+
+def ingest_batch(payload):
+    """{ readings: [{ patient_id, heart_rate, temperature, spo2, timestamp? }, ...] } (or a bare list).
+
+    Every reading is validated independently; valid readings are stored together
+    with their alerts in a single transaction. The response lists one result per
+    input item, in order, with either the created vital/alerts or an error.
+    """
+    payload = payload or {}
+    readings = payload.get('readings') if isinstance(payload, dict) else payload
+    if not isinstance(readings, list) or not readings:
+        return {'error': 'readings must be a non-empty list'}, 400
+
+    max_size = current_app.config['VITALS_BATCH_MAX_SIZE']
+    if len(readings) > max_size:
+        return {'error': f'at most {max_size} readings per batch'}, 413
+
+    results = [None] * len(readings)
+    accepted = []  # (index, reading)
+    for i, item in enumerate(readings):
+        if not isinstance(item, dict):
+            results[i] = {'index': i, 'ok': False, 'error': 'reading must be an object'}
+            continue
+        if not any(k in item for k in VITAL_FIELDS):
+            results[i] = {'index': i, 'ok': False, 'error': 'at least one vital is required'}
+            continue
+        try:
+            pid = int(item.get('patient_id'))
+        except (TypeError, ValueError):
+            results[i] = {'index': i, 'ok': False, 'error': 'invalid patient_id'}
+            continue
+        try:
+            hr, temp, spo2 = parse_vitals(item)
+            ts = parse_timestamp(item.get('timestamp'))
+        except ValueError as e:
+            results[i] = {'index': i, 'ok': False, 'error': str(e)}
+            continue
+        accepted.append((i, {'patient_id': pid, 'heart_rate': hr, 'temperature': temp, 'spo2': spo2, 'timestamp': ts}))
+
+    # One lookup for all referenced patients instead of one per reading
+    wards = patient_wards([r['patient_id'] for _, r in accepted])
+    valid = []
+    for i, r in accepted:
+        if r['patient_id'] in wards:
+            valid.append((i, r))
+        else:
+            results[i] = {'index': i, 'ok': False, 'error': 'patient not found'}
+
+    if valid:
+        from app.utils.simulator import evaluate_readings
+
+        try:
+            created = evaluate_readings([r for _, r in valid], wards=wards)
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception('batch vitals ingest failed')
+            return {'error': 'internal server error'}, 500
+
+        for (i, _), (vital_dict, alerts_list) in zip(valid, created):
+            results[i] = {'index': i, 'ok': True, 'vital': vital_dict, 'alerts_created': alerts_list}
+
+    return {
+        'accepted': len(valid),
+        'rejected': len(readings) - len(valid),
+        'results': results
+    }, 201 if valid else 400
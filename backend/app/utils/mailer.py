@@ -1,51 +1,195 @@
+"""Escalation email notifier.
+
+The outbox dispatcher calls send_now() with each claimed batch of escalated
+alerts and deletes the events only once it returns. The batch goes out as one
+digest per recipient (up to NOTIFIER_DIGEST_MAX alerts each) over a single
+SMTP connection per process, kept open between batches (closed after
+SMTP_IDLE_SECONDS without traffic, reopened on demand). Permanent (5xx)
+rejections are written to notification_dead_letters instead of being retried;
+other failures are left to the outbox's retry backoff.
+"""
 import smtplib
+import threading
+import time
+from datetime import datetime, timezone
 from email.message import EmailMessage
+
 from flask import current_app
-import traceback
+from sqlalchemy import insert
 
+from app import db
+from app.models import NotificationDeadLetter
 
-def send_escalation_email(app, alert_dict):
-    """Send escalation email inside the provided Flask app context.
 
-    alert_dict should be a mapping with keys: id, patient_id, severity, message, escalated_by, escalated_at
+def build_message(alerts, recipient, sender):
+    """One email for `recipient` covering every alert dict in `alerts`."""
+    if len(alerts) == 1:
+        a = alerts[0]
+        subject = f"[CareWatch] Escalated Alert — Patient {a.get('patient_id')} (#{a.get('id')})"
+        intro = 'An alert has been escalated in CareWatch.'
+    else:
+        patients = sorted({a.get('patient_id') for a in alerts}, key=str)
+        subject = f"[CareWatch] {len(alerts)} Escalated Alerts — Patients {', '.join(map(str, patients))}"
+        intro = f'{len(alerts)} alerts have been escalated in CareWatch.'
+    sections = '\n'.join(f"""Alert ID: {a.get('id')}
+Patient ID: {a.get('patient_id')}
+Severity: {a.get('severity')}
+Message: {a.get('message')}
+Escalated by (user id): {a.get('escalated_by')}
+Escalated at: {a.get('escalated_at')}
+""" for a in alerts)
+
+    msg = EmailMessage()
+    msg['Subject'] = subject
+    msg['From'] = sender
+    msg['To'] = recipient
+    msg.set_content(f"""{intro}
+
+{sections}
+This message was sent by the CareWatch notification system (rule-based alerts only).
+""")
+    return msg
+
+
+class SMTPConnection:
+    """A lazily opened SMTP session reused across sends (and threads).
+
+    A session unused for idle_seconds is reopened rather than reused, since
+    the server has likely dropped it by then.
     """
-    with app.app_context():
+
+    def __init__(self, host, port=587, username=None, password=None, starttls=True, timeout=10, idle_seconds=60):
+        self.host, self.port = host, port
+        self.username, self.password = username, password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_seconds = idle_seconds
+        self._server = None
+        self._last_used = 0.0
+        self._lock = threading.RLock()
+        self.connects = 0
+
+    def send(self, msg):
+        with self._lock:
+            if self._server is not None and time.monotonic() - self._last_used > self.idle_seconds:
+                self.close()
+            if self._server is None:
+                server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+                try:
+                    if self.starttls:
+                        server.starttls()
+                    if self.username:
+                        server.login(self.username, self.password)
+                except Exception:
+                    server.close()
+                    raise
+                self._server = server
+                self.connects += 1
+            self._last_used = time.monotonic()
+            self._server.send_message(msg)
+
+    def close(self):
+        with self._lock:
+            if self._server is not None:
+                try:
+                    self._server.quit()
+                except Exception:
+                    self._server.close()
+                self._server = None
+
+
+class EscalationNotifier:
+    def __init__(self, app):
+        cfg = app.config
+        self.digest_max = cfg.get('NOTIFIER_DIGEST_MAX', 50)
+        self.smtp = SMTPConnection(cfg.get('SMTP_SERVER'), cfg.get('SMTP_PORT') or 587,
+                                   cfg.get('SMTP_USERNAME'), cfg.get('SMTP_PASSWORD'),
+                                   starttls=cfg.get('SMTP_STARTTLS', True), idle_seconds=cfg.get('SMTP_IDLE_SECONDS', 60))
+        self.sent = self.retries = self.dead_lettered = self.digests = 0
+
+    def send_now(self, alerts):
+        """Send alert dicts as digests (up to NOTIFIER_DIGEST_MAX each) from the calling thread.
+
+        Recipients that reject the message (5xx) are dead-lettered. Any other
+        failure is raised after one reconnect, so the outbox dispatcher retries
+        the whole batch later; recipients already sent to then get the digest
+        again. Returns False when email is not configured.
+        """
         cfg = current_app.config
-        recipients = cfg.get('ALERT_EMAIL_RECIPIENTS', []) or []
-        if not recipients:
-            current_app.logger.info('No ALERT_EMAIL_RECIPIENTS configured; skipping escalation email')
+        recipients = cfg.get('ALERT_EMAIL_RECIPIENTS') or []
+        if not cfg.get('SMTP_SERVER') or not recipients:
+            if alerts:
+                current_app.logger.info('SMTP_SERVER or ALERT_EMAIL_RECIPIENTS not configured; skipping escalation email')
             return False
+        sender = cfg.get('EMAIL_FROM') or 'carewatch@example.com'
+        for i in range(0, len(alerts), self.digest_max):
+            batch = alerts[i:i + self.digest_max]
+            if len(batch) > 1:
+                self.digests += 1
+            for recipient in recipients:
+                msg = build_message(batch, recipient, sender)
+                for attempt in (1, 2):
+                    try:
+                        self.smtp.send(msg)
+                        self.sent += 1
+                        break
+                    except (smtplib.SMTPException, OSError) as e:
+                        if _is_permanent(e):
+                            current_app.logger.error('escalation email to %s rejected: %s', recipient, e)
+                            self._dead_letter(batch, recipient, attempt, repr(e))
+                            break
+                        self.smtp.close()
+                        if attempt == 2:
+                            raise
+                        self.retries += 1
+        return True
 
-        subject = f"[CareWatch] Escalated Alert — Patient {alert_dict.get('patient_id')} (#{alert_dict.get('id')})"
-        body = f"""An alert has been escalated in CareWatch.
+    def close(self):
+        self.smtp.close()
 
-Alert ID: {alert_dict.get('id')}
-Patient ID: {alert_dict.get('patient_id')}
-Severity: {alert_dict.get('severity')}
-Message: {alert_dict.get('message')}
-Escalated by (user id): {alert_dict.get('escalated_by')}
-Escalated at: {alert_dict.get('escalated_at')}
+    def stats(self):
+        return {
+            'sent': self.sent, 'digests': self.digests, 'retries': self.retries,
+            'dead_lettered': self.dead_lettered, 'smtp_connects': self.smtp.connects,
+        }
 
-This message was sent by the CareWatch notification system (rule-based alerts only).
-"""
-        msg = EmailMessage()
-        msg['Subject'] = subject
-        msg['From'] = cfg.get('EMAIL_FROM') or 'carewatch@example.com'
-        msg['To'] = ', '.join(recipients)
-        msg.set_content(body)
+    def _dead_letter(self, batch, recipient, attempts, error):
+        msg = build_message(batch, recipient, current_app.config.get('EMAIL_FROM') or 'carewatch@example.com')
+        db.session.execute(insert(NotificationDeadLetter), [{
+            'recipient': recipient,
+            'subject': msg['Subject'],
+            'body': msg.get_content(),
+            'alert_ids': ','.join(str(a.get('id')) for a in batch),
+            'attempts': attempts,
+            'error': error[:1000],
+            'created_at': datetime.now(timezone.utc),
+        }])
+        db.session.commit()
+        self.dead_lettered += 1
+
+
+def _is_permanent(error):
+    """5xx replies: the server will not accept this message however often we retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
 
+
+def get_notifier(app=None):
+    app = app or current_app._get_current_object()
+    if 'escalation_notifier' not in app.extensions:
+        app.extensions['escalation_notifier'] = EscalationNotifier(app)
+    return app.extensions['escalation_notifier']
+
+
+def send_escalation_email(app, alert_dict):
+    """Send an escalation email for alert_dict (id, patient_id, severity, message, escalated_by, escalated_at) now.
+
+    Returns False when email is not configured or the send failed.
+    """
+    with app.app_context():
         try:
-            server = smtplib.SMTP(cfg.get('SMTP_SERVER'), cfg.get('SMTP_PORT') or 587, timeout=10)
-            server.starttls()
-            username = cfg.get('SMTP_USERNAME')
-            password = cfg.get('SMTP_PASSWORD')
-            if username:
-                server.login(username, password)
-            server.send_message(msg)
-            server.quit()
-            current_app.logger.info(f"Escalation email sent for alert {alert_dict.get('id')} to {recipients}")
-            return True
-        except Exception as e:
+            return get_notifier(app).send_now([alert_dict])
+        except (smtplib.SMTPException, OSError) as e:
             current_app.logger.exception('Failed to send escalation email: %s', e)
-            current_app.logger.debug(traceback.format_exc())
             return False
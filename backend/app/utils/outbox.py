@@ -0,0 +1,211 @@
+"""Transactional outbox for alert side-effects.
+
+Request handlers add an outbox_events row in the same transaction as the
+change it describes ('alert_created' from evaluate_readings for alerts that
+auto_escalate rules escalated on creation, 'alert_escalated' from the
+escalate endpoint), so an event exists if and only if its alert was
+committed. dispatch_outbox() later claims pending rows in batches, runs the
+handlers registered for their type and deletes them once handled. It runs in
+a background thread every OUTBOX_DISPATCH_INTERVAL_SECONDS, or in its own
+process via tools/dispatch_outbox.py (set the interval to 0 then).
+
+Handlers finish their side-effect before returning (escalation emails are
+sent, not queued), so a restart can repeat an event but never lose one.
+
+Claiming uses SELECT ... FOR UPDATE SKIP LOCKED where the dialect has it
+(PostgreSQL, MySQL 8), so several dispatchers can share the table. Elsewhere
+(SQLite) a single UPDATE ... WHERE id IN (SELECT ... LIMIT n) tags the batch;
+SQLite serialises writers, so that is atomic too. A claim older than
+OUTBOX_CLAIM_TIMEOUT_SECONDS (a dispatcher died mid-batch) is taken over.
+A failing event is retried after OUTBOX_RETRY_BACKOFF_SECONDS, doubling with
+each attempt, up to OUTBOX_MAX_ATTEMPTS; it then stays in the table, parked.
+
+In-process SSE publishing stays on the request path: the in-process broker
+only reaches clients of the process that made the change.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import delete, insert, or_, select, update
+
+from app import db
+from app.models import OutboxEvent
+
+ALERT_CREATED = 'alert_created'
+ALERT_ESCALATED = 'alert_escalated'
+
+_handlers = {}
+_batch_handlers = {}
+
+
+def handler(event_type, batch=False):
+    """Register func(payload) to run for each dispatched event of event_type.
+
+    With batch=True func([payloads]) runs once per claimed batch instead; if
+    it raises, every event it was given counts as failed.
+    """
+    def register(func):
+        (_batch_handlers if batch else _handlers).setdefault(event_type, []).append(func)
+        return func
+    return register
+
+
+def add_events(event_type, payloads):
+    """Insert events into the current transaction; the caller commits."""
+    if not payloads:
+        return
+    now = datetime.now(timezone.utc)
+    db.session.execute(insert(OutboxEvent), [
+        {'event_type': event_type, 'payload': p, 'created_at': now, 'attempts': 0} for p in payloads
+    ])
+
+
+def add_event(event_type, payload):
+    add_events(event_type, [payload])
+
+
+class DispatchStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.dispatched = self.failed = self.batches = 0
+        self.busy_seconds = 0.0
+        self.last_batch_size = 0
+        self.last_batch_seconds = None
+
+    def record(self, dispatched, failed, seconds):
+        with self._lock:
+            self.dispatched += dispatched
+            self.failed += failed
+            self.batches += 1
+            self.busy_seconds += seconds
+            self.last_batch_size = dispatched + failed
+            self.last_batch_seconds = round(seconds, 4)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'dispatched': self.dispatched, 'failed': self.failed, 'batches': self.batches,
+                'last_batch_size': self.last_batch_size, 'last_batch_seconds': self.last_batch_seconds,
+                'events_per_second': round(self.dispatched / self.busy_seconds, 1) if self.busy_seconds else None,
+            }
+
+
+def get_dispatch_stats():
+    return current_app.extensions.setdefault('outbox_stats', DispatchStats())
+
+
+def pending_count():
+    max_attempts = current_app.config.get('OUTBOX_MAX_ATTEMPTS', 10)
+    return db.session.scalar(select(db.func.count(OutboxEvent.id)).where(OutboxEvent.attempts < max_attempts))
+
+
+def _claimable(now):
+    cfg = current_app.config
+    expired = now - timedelta(seconds=cfg.get('OUTBOX_CLAIM_TIMEOUT_SECONDS', 300))
+    return (
+        or_(OutboxEvent.claimed_at.is_(None), OutboxEvent.claimed_at < expired),
+        or_(OutboxEvent.next_attempt_at.is_(None), OutboxEvent.next_attempt_at <= now),
+        OutboxEvent.attempts < cfg.get('OUTBOX_MAX_ATTEMPTS', 10),
+    )
+
+
+def claim_batch(limit):
+    """Claim up to `limit` pending events for this dispatcher and commit the claim."""
+    now = datetime.now(timezone.utc)
+    token = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+    dialect = db.session.get_bind().dialect
+    if dialect.name in ('postgresql', 'mysql', 'mariadb'):
+        ids = db.session.scalars(
+            select(OutboxEvent.id).where(*_claimable(now)).order_by(OutboxEvent.id).limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if ids:
+            db.session.execute(update(OutboxEvent).where(OutboxEvent.id.in_(ids))
+                               .values(claimed_by=token, claimed_at=now))
+    else:
+        subq = select(OutboxEvent.id).where(*_claimable(now)).order_by(OutboxEvent.id).limit(limit)
+        db.session.execute(update(OutboxEvent).where(OutboxEvent.id.in_(subq.scalar_subquery()))
+                           .values(claimed_by=token, claimed_at=now), execution_options={'synchronize_session': False})
+    db.session.commit()
+    return db.session.scalars(
+        select(OutboxEvent).where(OutboxEvent.claimed_by == token).order_by(OutboxEvent.id)
+    ).all()
+
+
+def dispatch_batch(limit=None):
+    """Claim and handle one batch; returns the number of events claimed."""
+    limit = limit or current_app.config.get('OUTBOX_BATCH_SIZE', 500)
+    t0 = time.perf_counter()
+    events = claim_batch(limit)
+    if not events:
+        return 0
+
+    errors = {}  # event id -> exception
+    by_type = {}
+    for event in events:
+        try:
+            for func in _handlers.get(event.event_type, ()):
+                func(event.payload)
+        except Exception as e:
+            current_app.logger.exception('outbox event %s (%s) failed', event.id, event.event_type)
+            errors[event.id] = e
+        else:
+            by_type.setdefault(event.event_type, []).append(event)
+    for event_type, group in by_type.items():
+        for func in _batch_handlers.get(event_type, ()):
+            group = [e for e in group if e.id not in errors]
+            if not group:
+                break
+            try:
+                func([e.payload for e in group])
+            except Exception as e:
+                current_app.logger.exception('outbox batch of %d %s events failed', len(group), event_type)
+                errors.update((event.id, e) for event in group)
+
+    now = datetime.now(timezone.utc)
+    backoff = current_app.config.get('OUTBOX_RETRY_BACKOFF_SECONDS', 10)
+    done, failed = [], []
+    for event in events:
+        if event.id in errors:
+            failed.append((event.id, event.attempts + 1, repr(errors[event.id])[:1000]))
+        else:
+            done.append(event.id)
+
+    if done:
+        db.session.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(done)))
+    for event_id, attempts, error in failed:
+        db.session.execute(update(OutboxEvent).where(OutboxEvent.id == event_id).values(
+            attempts=attempts, last_error=error, claimed_by=None, claimed_at=None,
+            next_attempt_at=now + timedelta(seconds=backoff * 2 ** (attempts - 1))))
+    db.session.commit()
+    get_dispatch_stats().record(len(done), len(failed), time.perf_counter() - t0)
+    return len(events)
+
+
+def dispatch_outbox(limit=None, max_batches=100):
+    """Dispatch batches until the outbox is empty (or max_batches); returns events handled."""
+    total = 0
+    for _ in range(max_batches):
+        n = dispatch_batch(limit)
+        total += n
+        if not n:
+            break
+    return total
+
+
+@handler(ALERT_ESCALATED, batch=True)
+def _email_escalations(alerts):
+    from app.utils.mailer import get_notifier
+    get_notifier().send_now(alerts)
+
+
+@handler(ALERT_CREATED, batch=True)
+def _email_auto_escalations(alerts):
+    # alerts from auto_escalate rules are escalated on creation; rows written
+    # before only escalated alerts got events can include others
+    _email_escalations([a for a in alerts if a.get('escalated')])
@@ -0,0 +1,87 @@
+"""Keyset (cursor) pagination helpers for list endpoints.
+
+List responses stay plain JSON arrays for backward compatibility; the cursor
+for the next page is returned in the X-Next-Cursor header (and a Link
+rel="next" header) and passed back as ?cursor=<value>.
+"""
+import base64
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import current_app, request
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def encode_cursor(*key):
+    """Opaque cursor for a sort key such as (timestamp, id) or (id,)."""
+    parts = [k.isoformat() if isinstance(k, datetime) else k for k in key]
+    return base64.urlsafe_b64encode(json.dumps(parts, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, with_timestamp=True):
+    """Inverse of encode_cursor; raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        parts = json.loads(raw)
+        if with_timestamp:
+            ts, pk = parts
+            return datetime.fromisoformat(ts), int(pk)
+        (pk,) = parts
+        return (int(pk),)
+    except (TypeError, ValueError, json.JSONDecodeError, UnicodeDecodeError):
+        raise ValueError('invalid cursor')
+
+
+def parse_limit(default=None, param='limit'):
+    """?limit= (or ?<param>=), clamped to PAGE_MAX_LIMIT. Raises ValueError if not a positive integer."""
+    maximum = current_app.config.get('PAGE_MAX_LIMIT', 1000)
+    if default is None:
+        default = current_app.config.get('PAGE_DEFAULT_LIMIT', 100)
+    limit = int(request.args.get(param, default))
+    if limit < 1:
+        raise ValueError(f'{param} must be positive')
+    return min(limit, maximum)
+
+
+def keyset_page(query, ts_col, id_col, limit):
+    """Newest-first page of `query` ordered by (ts_col, id_col) after ?cursor=.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    Raises ValueError for a malformed cursor.
+    """
+    cursor = request.args.get('cursor')
+    if cursor:
+        ts, pk = decode_cursor(cursor)
+        query = query.filter(or_(ts_col < ts, and_(ts_col == ts, id_col < pk)))
+    rows = query.order_by(ts_col.desc(), id_col.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, ts_col.key), getattr(last, id_col.key))
+
+
+def id_page(query, id_col, limit):
+    """Ascending page by primary key only (for tables without a reliable timestamp)."""
+    cursor = request.args.get('cursor')
+    if cursor:
+        (pk,) = decode_cursor(cursor, with_timestamp=False)
+        query = query.filter(id_col > pk)
+    rows = query.order_by(id_col).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(getattr(rows[-1], id_col.key))
+
+
+def with_next_cursor(response, next_cursor):
+    """Attach the next-page cursor headers to a Flask response."""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
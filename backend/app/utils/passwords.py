@@ -0,0 +1,109 @@
+"""bcrypt hashing and verification on a bounded worker pool.
+
+A bcrypt check takes ~250 ms of CPU. Run inline, a burst of logins ties up
+every request worker that handles one. Here they run on PASSWORD_POOL_WORKERS
+threads (bcrypt releases the GIL), with at most PASSWORD_POOL_QUEUE further
+jobs waiting. Past that, submit() raises PoolSaturated straight away and the
+route answers 503 with Retry-After, instead of queueing without limit.
+
+Hashes are made with BCRYPT_ROUNDS. A successful check against a hash with a
+different cost also returns a new hash, so changing the cost factor upgrades
+users as they log in. PASSWORD_POOL_WORKERS = 0 runs everything inline.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from flask import current_app
+
+
+class PoolSaturated(Exception):
+    """All workers are busy and the queue is full."""
+
+
+def _encode(password):
+    return password.encode('utf-8') if isinstance(password, str) else password
+
+
+def hash_password(password, rounds=12):
+    return bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def hash_rounds(password_hash):
+    """Cost factor of a '$2b$12$...' hash, or None if it is not one."""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def verify_password(password_hash, password, rounds=12):
+    """Return (ok, new_hash); new_hash is set when the stored cost differs from rounds."""
+    if not password_hash or password is None:
+        return False, None
+    try:
+        ok = bcrypt.checkpw(_encode(password), password_hash.encode('utf-8'))
+    except ValueError:
+        # corrupted hash
+        return False, None
+    if ok and hash_rounds(password_hash) != rounds:
+        return True, hash_password(password, rounds)
+    return ok, None
+
+
+class PasswordPool:
+    def __init__(self, workers=2, queue_size=16, rounds=12):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='bcrypt') if workers > 0 else None
+        self._slots = threading.BoundedSemaphore(workers + queue_size) if workers > 0 else None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = self.rejected = self.rehashed = 0
+
+    def submit(self, func, *args):
+        """Run func(*args) on the pool and wait for it; PoolSaturated if there is no room."""
+        if self._executor is None:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+            self._slots.release()
+
+    def hash(self, password):
+        return self.submit(hash_password, password, self.rounds)
+
+    def verify(self, password_hash, password):
+        ok, new_hash = self.submit(verify_password, password_hash, password, self.rounds)
+        if new_hash is not None:
+            with self._lock:
+                self.rehashed += 1
+        return ok, new_hash
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers, 'queue_size': self.queue_size, 'rounds': self.rounds,
+                'in_flight': self.in_flight, 'completed': self.completed,
+                'rejected': self.rejected, 'rehashed': self.rehashed,
+            }
+
+
+def get_password_pool():
+    ext = current_app.extensions
+    if 'password_pool' not in ext:
+        cfg = current_app.config
+        ext['password_pool'] = PasswordPool(cfg.get('PASSWORD_POOL_WORKERS', 2),
+                                            cfg.get('PASSWORD_POOL_QUEUE', 16),
+                                            cfg.get('BCRYPT_ROUNDS', 12))
+    return ext['password_pool']
@@ -0,0 +1,49 @@
+"""Column-only read models for the list endpoints.
+
+Each query selects exactly the columns of the model's to_json() shape,
+labelled with the same keys, and returns SQLAlchemy Row tuples: no ORM
+objects are built, nothing enters the session's identity map, and related
+names (patient_name, user_name) come from a join instead of a lazy load per
+row. The JSON provider (app.utils.serialization) encodes the Rows directly,
+so responses are identical to jsonify(model_objects).
+
+The queries are ordinary Query objects, so keyset_page() / filter_by() work
+on them as before.
+"""
+from app import db
+from app.models import Alert, Note, Patient, PatientVital, User
+
+VITAL_COLUMNS = (
+    PatientVital.id, PatientVital.patient_id, PatientVital.heart_rate,
+    PatientVital.temperature, PatientVital.spo2, PatientVital.timestamp,
+)
+
+ALERT_COLUMNS = (
+    Alert.id, Alert.patient_id, Alert.severity, Alert.message, Alert.created_at,
+    Alert.escalated, Alert.escalated_at, Alert.escalated_by,
+    Alert.reviewed, Alert.reviewed_at, Alert.reviewed_by,
+    Alert.closed, Alert.closed_at, Alert.closed_by,
+)
+
+NOTE_COLUMNS = (
+    Note.id, Note.patient_id, Note.user_id, Note.timestamp, Note.content,
+    User.name.label('user_name'),
+)
+
+
+def vital_rows(with_patient_name=False):
+    """PatientVital.to_json() rows, plus 'patient_name' if asked."""
+    if not with_patient_name:
+        return db.session.query(*VITAL_COLUMNS)
+    return (db.session.query(*VITAL_COLUMNS, Patient.name.label('patient_name'))
+            .outerjoin(Patient, Patient.id == PatientVital.patient_id))
+
+
+def alert_rows():
+    """Alert.to_json() rows."""
+    return db.session.query(*ALERT_COLUMNS)
+
+
+def note_rows():
+    """Note.to_json() rows (author name joined in)."""
+    return db.session.query(*NOTE_COLUMNS).join(User, User.id == Note.user_id)
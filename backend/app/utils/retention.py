@@ -0,0 +1,117 @@
+"""Retention for patient_vitals: move old rows to cold storage in small batches.
+
+Only rows older than the cutoff *and* already folded into the rollups (id at
+or below the rollup watermark) are moved, so trends over archived periods are
+still answered from patient_vital_rollups. Each batch is copied and deleted in
+its own short transaction, so the hot table is never locked for long.
+
+Every web process runs this as a periodic job, so a batch is claimed by
+deleting it first: a process whose DELETE removes fewer rows than it selected
+lost the batch to another one, rolls back and stops, before archiving
+anything.
+
+Destinations:
+- the patient_vitals_archive table (default)
+- gzipped NDJSON files under <archive_dir>/patient_vitals/<YYYY-MM>/, one file
+  per batch and month; a batch rerun after a crash rewrites the same file name
+"""
+import gzip
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+
+from app import db
+from app.models import ArchivedVital, PatientVital
+from app.utils.dates import as_utc
+from app.utils.rollups import get_watermark
+
+_COLUMNS = ('id', 'patient_id', 'heart_rate', 'temperature', 'spo2', 'timestamp')
+
+
+def retention_cutoff(days=None):
+    days = current_app.config.get('VITALS_RETENTION_DAYS', 0) if days is None else days
+    if not days or days <= 0:
+        return None
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def _eligible(cutoff, watermark):
+    return (PatientVital.timestamp < cutoff, PatientVital.id <= watermark)
+
+
+def _write_files(archive_dir, rows):
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(as_utc(row['timestamp']).strftime('%Y-%m'), []).append(row)
+    for month, month_rows in by_month.items():
+        folder = os.path.join(archive_dir, 'patient_vitals', month)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"vitals-{month_rows[0]['id']}-{month_rows[-1]['id']}.ndjson.gz")
+        tmp = f'{path}.{os.getpid()}-{uuid.uuid4().hex}.tmp'
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            for row in month_rows:
+                f.write(json.dumps({**row, 'timestamp': as_utc(row['timestamp']).isoformat()},
+                                   separators=(',', ':')) + '\n')
+        os.replace(tmp, path)
+
+
+def archive_vitals(days=None, batch_size=None, archive_dir=None, dry_run=False, max_batches=None):
+    """Move eligible vitals to the archive; returns a report dict.
+
+    days/batch_size/archive_dir default to VITALS_RETENTION_DAYS,
+    RETENTION_BATCH_SIZE and VITALS_ARCHIVE_DIR. With dry_run=True nothing is
+    changed and the report counts the rows that would be moved.
+    """
+    cfg = current_app.config
+    batch_size = batch_size or cfg.get('RETENTION_BATCH_SIZE', 5000)
+    archive_dir = archive_dir if archive_dir is not None else cfg.get('VITALS_ARCHIVE_DIR')
+    cutoff = retention_cutoff(days)
+    report = {
+        'cutoff': cutoff.isoformat() if cutoff else None,
+        'destination': archive_dir or ArchivedVital.__tablename__,
+        'dry_run': dry_run, 'rows': 0, 'batches': 0, 'seconds': 0.0, 'rows_per_sec': 0.0,
+    }
+    if cutoff is None:
+        return report
+
+    watermark = get_watermark()
+    if dry_run:
+        report['rows'] = db.session.query(func.count(PatientVital.id)).filter(*_eligible(cutoff, watermark)).scalar()
+        return report
+
+    cols = [getattr(PatientVital, c) for c in _COLUMNS]
+    last_id = 0
+    t0 = time.perf_counter()
+    while max_batches is None or report['batches'] < max_batches:
+        rows = [dict(zip(_COLUMNS, r)) for r in db.session.execute(
+            select(*cols)
+            .where(PatientVital.id > last_id, *_eligible(cutoff, watermark))
+            .order_by(PatientVital.id)
+            .limit(batch_size)
+        )]
+        if not rows:
+            break
+        ids = [r['id'] for r in rows]
+        deleted = db.session.execute(delete(PatientVital).where(PatientVital.id.in_(ids))).rowcount
+        if deleted != len(ids):
+            # another process is archiving the same rows
+            db.session.rollback()
+            break
+        if archive_dir:
+            _write_files(archive_dir, rows)
+        else:
+            db.session.execute(insert(ArchivedVital), rows)
+        db.session.commit()
+        last_id = ids[-1]
+        report['rows'] += len(rows)
+        report['batches'] += 1
+
+    report['seconds'] = round(time.perf_counter() - t0, 3)
+    if report['seconds']:
+        report['rows_per_sec'] = round(report['rows'] / report['seconds'], 1)
+    return report
@@ -1,6 +1,18 @@
-from app.models import PatientVital, Alert
+from app import db
+from app.models import Patient, PatientVital, PatientRisk, Alert
+from app.utils.alert_rules import get_rule_engine
+from app.utils.dates import as_utc, floor_time
+from app.utils.db_routing import on_primary, upsert
+from app.utils.rollups import add_rollup_buckets, get_watermark, pick_resolution
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import desc
+from sqlalchemy import case, desc, func, or_
+
+# Patients scoring above this are listed as "at risk" on the dashboard
+AT_RISK_THRESHOLD = 5
+ALERT_WINDOW = timedelta(hours=24)
+# Trend reads retried when a rollup compaction commits in between, before falling back to raw rows
+TREND_READ_ATTEMPTS = 3
+
 
 def calculate_risk_score(patient_id):
     """
@@ -8,7 +20,8 @@ def calculate_risk_score(patient_id):
     - Recent critical alerts add high risk.
     - Recent warning alerts add medium risk.
     - Abnormal vital signs (even if not yet an alert) add low risk.
-    - Lower SpO2, higher temperature, and very abnormal heart rates contribute more.
+    - Lower SpO2, higher temperature, and very abnormal heart rates contribute more
+      (per vital, the highest risk_points among the triggered alert rules).
     """
     score = 0
     now = datetime.now(timezone.utc)
@@ -28,75 +41,263 @@ def calculate_risk_score(patient_id):
             score += 5  # Medium impact
 
     # 2. Vitals contribution (most recent only for quick assessment)
-    latest_vital = PatientVital.query.filter_by(patient_id=patient_id).order_by(desc(PatientVital.timestamp)).first()
+    latest_vital = PatientVital.query.filter_by(patient_id=patient_id).order_by(desc(PatientVital.timestamp), desc(PatientVital.id)).first()
 
     if latest_vital:
-        hr = latest_vital.heart_rate
-        temp = latest_vital.temperature
-        spo2 = latest_vital.spo2
+        # Thresholds come from the alert-rule engine (risk_points per vital band)
+        patient = db.session.get(Patient, patient_id)
+        engine = get_rule_engine()
+        rules = engine.rules_for(patient_id, patient.ward if patient else None)
+        score += engine.risk_points(rules, (latest_vital.heart_rate, latest_vital.temperature, latest_vital.spo2))
 
-        # SpO2
-        if spo2 < 90: score += 7 # Critical threshold
-        elif spo2 < 94: score += 3 # Warning range
+    # Cap score at a reasonable max if needed, or normalize later
+    return min(score, 20) # Max risk score of 20 for simplicity
 
-        # Temperature
-        if temp > 38.0: score += 7 # Critical threshold
-        elif temp > 37.5: score += 3 # Warning range
 
-        # Heart Rate
-        if hr < 50 or hr > 110: score += 5 # High warning
-        elif hr < 60 or hr > 100: score += 2 # Mild warning
+def calculate_risk_scores(patient_ids=None):
+    """Set-based calculate_risk_score: {patient_id: score} for many patients at once.
 
-    # Cap score at a reasonable max if needed, or normalize later
-    return min(score, 20) # Max risk score of 20 for simplicity
+    Runs two grouped queries regardless of the number of patients: a
+    conditional SUM over each patient's open alerts from the last 24 hours, and
+    every patient LEFT JOINed to their latest vital (ROW_NUMBER window). The
+    vitals part then uses the same compiled rules as calculate_risk_score.
+    patient_ids=None scores every patient.
+    """
+    now = datetime.now(timezone.utc)
 
+    alert_points = case((Alert.severity == 'critical', 10), (Alert.severity == 'warning', 5), else_=0)
+    alerts_q = (
+        db.session.query(Alert.patient_id, func.sum(alert_points))
+        .filter(Alert.closed == False, Alert.created_at >= (now - ALERT_WINDOW))
+        .group_by(Alert.patient_id)
+    )
 
-def get_vital_trends(patient_id, vital_type, hours=24, interval_minutes=60):
+    ranked = db.session.query(
+        PatientVital.patient_id,
+        PatientVital.heart_rate,
+        PatientVital.temperature,
+        PatientVital.spo2,
+        func.row_number().over(
+            partition_by=PatientVital.patient_id,
+            order_by=(PatientVital.timestamp.desc(), PatientVital.id.desc()),
+        ).label('rn'),
+    )
+    if patient_ids is not None:
+        patient_ids = set(patient_ids)
+        if not patient_ids:
+            return {}
+        alerts_q = alerts_q.filter(Alert.patient_id.in_(patient_ids))
+        ranked = ranked.filter(PatientVital.patient_id.in_(patient_ids))
+    ranked = ranked.subquery()
+
+    latest_q = (
+        db.session.query(Patient.id, Patient.ward, ranked.c.heart_rate, ranked.c.temperature, ranked.c.spo2)
+        .outerjoin(ranked, (ranked.c.patient_id == Patient.id) & (ranked.c.rn == 1))
+    )
+    if patient_ids is not None:
+        latest_q = latest_q.filter(Patient.id.in_(patient_ids))
+
+    alert_scores = {pid: int(points or 0) for pid, points in alerts_q}
+    engine = get_rule_engine()
+    scores = {}
+    for pid, ward, hr, temp, spo2 in latest_q:
+        score = alert_scores.get(pid, 0)
+        score += engine.risk_points(engine.rules_for(pid, ward), (hr, temp, spo2))
+        scores[pid] = min(score, 20)
+    return scores
+
+
+def refresh_patient_risk(patient_ids):
+    """Recompute and store the PatientRisk rows for the given patients.
+
+    Does not commit, so callers can include it in the transaction that wrote
+    the vitals or alerts that changed the score.
     """
-    Retrieves a trend for a specific vital type (e.g., 'heart_rate', 'temperature', 'spo2')
-    over a given number of hours, averaged by interval_minutes.
+    patient_ids = set(patient_ids)
+    if not patient_ids:
+        return {}
+    now = datetime.now(timezone.utc)
+
+    # The score drops when the oldest open alert leaves the 24h window
+    oldest_open = dict(
+        db.session.query(Alert.patient_id, func.min(Alert.created_at))
+        .filter(Alert.patient_id.in_(patient_ids), Alert.closed == False,
+                Alert.created_at >= now - ALERT_WINDOW)
+        .group_by(Alert.patient_id)
+    )
+    scores = calculate_risk_scores(patient_ids)
+    if not scores:
+        return scores
+    # Rows whose score and stale_at are unchanged are left alone: rewriting them would
+    # bump the 'risk' version (and every dashboard ETag) on each ingest
+    stored = {
+        pid: (score, as_utc(stale_at)) for pid, score, stale_at in
+        db.session.query(PatientRisk.patient_id, PatientRisk.score, PatientRisk.stale_at)
+        .filter(PatientRisk.patient_id.in_(list(scores)))
+    }
+    rows = []
+    for pid, score in scores.items():
+        oldest = as_utc(oldest_open.get(pid))
+        stale_at = oldest + ALERT_WINDOW if oldest else None
+        if stored.get(pid) != (score, stale_at):
+            rows.append({'patient_id': pid, 'score': score, 'updated_at': now, 'stale_at': stale_at})
+    if not rows:
+        return scores
+    # an upsert, so two workers storing a patient's first score do not collide on the primary key
+    table = PatientRisk.__table__
+    db.session.execute(upsert(db.session, table, [table.c.patient_id], lambda new: {
+        'score': new.score, 'updated_at': new.updated_at, 'stale_at': new.stale_at}), rows)
+    return scores
+
+
+def mark_all_risk_stale():
+    """Force every stored score to be recomputed on next read (e.g. after a rule change)."""
+    PatientRisk.query.update({PatientRisk.stale_at: datetime.now(timezone.utc)}, synchronize_session=False)
+
+
+def _refresh_stale(patient_ids=None):
+    """Recompute rows that are missing or past their stale_at; commits if anything changed."""
+    now = datetime.now(timezone.utc)
+    q = (
+        db.session.query(Patient.id)
+        .outerjoin(PatientRisk, PatientRisk.patient_id == Patient.id)
+        .filter(or_(PatientRisk.patient_id == None, PatientRisk.stale_at <= now))
+    )
+    if patient_ids is not None:
+        q = q.filter(Patient.id.in_(patient_ids))
+    stale = [pid for (pid,) in q]
+    if stale:
+        refresh_patient_risk(stale)
+        db.session.commit()
+
+
+def get_patient_risk(patient_id):
+    """Stored risk score for one patient, recomputed first if missing or stale."""
+    with on_primary():  # the refresh writes what it reads; a lagging replica would undo it
+        _refresh_stale([patient_id])
+        row = db.session.get(PatientRisk, patient_id)
+        return row.score if row else 0
+
+
+def get_at_risk_patients(threshold=AT_RISK_THRESHOLD):
+    """(patient_id, name, score) for patients above `threshold`, highest first.
+
+    Reads the materialized patient_risk table; only missing or stale rows are
+    recomputed. Reads the primary, like the refresh.
+    """
+    with on_primary():
+        _refresh_stale()
+        return (
+            db.session.query(PatientRisk.patient_id, Patient.name, PatientRisk.score)
+            .join(Patient, Patient.id == PatientRisk.patient_id)
+            .filter(PatientRisk.score > threshold)
+            .order_by(PatientRisk.score.desc(), PatientRisk.patient_id)
+            .all()
+        )
+
+
+def trend_window(hours, interval_minutes, end_time=None):
+    """(start_time, end_time, interval, resolution, n_buckets) of a trend ending now.
+
+    start_time is aligned down to the rollup resolution, so the window (and the
+    response) only moves when a new bucket starts.
     """
-    end_time = datetime.now(timezone.utc)
+    end_time = end_time or datetime.now(timezone.utc)
     start_time = end_time - timedelta(hours=hours)
+    interval = timedelta(minutes=interval_minutes)
+    resolution = pick_resolution(int(interval.total_seconds()))
+    if resolution:
+        start_time = floor_time(start_time, resolution)
+    n_buckets = -(-(end_time - start_time) // interval)  # ceil
+    return start_time, end_time, interval, resolution, n_buckets
+
 
-    raw_vitals = PatientVital.query.filter(
+def _add_raw_buckets(buckets, patient_id, column, watermark, start_time, end_time, interval):
+    """Accumulate raw rows with id > watermark into `buckets`; True if any row was read."""
+    rows = db.session.query(PatientVital.timestamp, column).filter(
         PatientVital.patient_id == patient_id,
+        PatientVital.id > watermark,
         PatientVital.timestamp >= start_time,
         PatientVital.timestamp <= end_time
-    ).order_by(PatientVital.timestamp).all()
+    ).order_by(PatientVital.timestamp)
+
+    seen = False
+    n_buckets = len(buckets)
+    for ts, value in rows:
+        seen = True
+        if value is None:
+            continue
+        idx = (as_utc(ts) - start_time) // interval
+        if not 0 <= idx < n_buckets:
+            continue
+        b = buckets[idx]
+        if b is None:
+            buckets[idx] = [value, 1, value, value]
+        else:
+            b[0] += value
+            b[1] += 1
+            if value < b[2]:
+                b[2] = value
+            if value > b[3]:
+                b[3] = value
+    return seen
+
+
+def get_vital_trends(patient_id, vital_type, hours=24, interval_minutes=60):
+    """
+    Retrieves a trend for a specific vital type (e.g., 'heart_rate', 'temperature', 'spo2')
+    over a given number of hours, averaged by interval_minutes.
+
+    Each point carries the bucket's average ('value', rounded to 1 decimal),
+    'min', 'max' and 'count'. Buckets without readings carry the previous
+    average forward (count 0, min/max None).
+
+    Long windows are served from the coarsest vitals rollup whose resolution
+    divides the interval; the window start is aligned down to that
+    resolution. Raw rows newer than the rollup watermark are added in a
+    single pass over (timestamp, value) columns, so cost is
+    O(buckets + recent rows) rather than O(rows x intervals).
+    """
+    start_time, end_time, interval, resolution, n_buckets = trend_window(hours, interval_minutes)
+    column = getattr(PatientVital, vital_type)
+
+    # The watermark, rollups and raw rows are separate statements; under READ COMMITTED a compaction
+    # committing between them would count its rows twice. It moves the watermark in the same commit,
+    # so read it again afterwards and retry if it changed, falling back to raw rows only.
+    for attempt in range(TREND_READ_ATTEMPTS + 1):
+        watermark = get_watermark() if resolution and attempt < TREND_READ_ATTEMPTS else 0
+        buckets = [None] * n_buckets  # [sum, count, min, max]
+        seen_rows = False
+        if watermark:
+            seen_rows = add_rollup_buckets(buckets, patient_id, vital_type, resolution, start_time, end_time, interval)
+        seen_rows = _add_raw_buckets(buckets, patient_id, column, watermark, start_time, end_time, interval) or seen_rows
+        if not watermark or get_watermark() == watermark:
+            break
 
-    if not raw_vitals:
+    if not seen_rows:
         return []
 
     trends = []
-    current_interval_start = start_time
-    while current_interval_start < end_time:
-        interval_end = current_interval_start + timedelta(minutes=interval_minutes)
-        
-        vitals_in_interval = [
-            getattr(v, vital_type) for v in raw_vitals
-            if v.timestamp >= current_interval_start and v.timestamp < interval_end and getattr(v, vital_type) is not None
-        ]
-
-        if vitals_in_interval:
-            avg_value = sum(vitals_in_interval) / len(vitals_in_interval)
+    last_value = None
+    for idx, b in enumerate(buckets):
+        interval_end = start_time + interval * (idx + 1)
+        if b is not None:
+            last_value = round(b[0] / b[1], 1)
             trends.append({
                 'timestamp': interval_end.isoformat(),
-                'value': round(avg_value, 1)
+                'value': last_value,
+                'min': b[2],
+                'max': b[3],
+                'count': b[1]
             })
         else:
-            # If no data in interval, use the last known value or None
-            if trends:
-                trends.append({
-                    'timestamp': interval_end.isoformat(),
-                    'value': trends[-1]['value'] # Carry forward last known value
-                })
-            else:
-                trends.append({
-                    'timestamp': interval_end.isoformat(),
-                    'value': None
-                })
-        
-        current_interval_start = interval_end
-
-    return trends
\ No newline at end of file
+            # If no data in interval, carry forward the last known value (or None)
+            trends.append({
+                'timestamp': interval_end.isoformat(),
+                'value': last_value,
+                'min': None,
+                'max': None,
+                'count': 0
+            })
+
+    return trends
@@ -0,0 +1,186 @@
+"""Pre-aggregated vitals rollups (1-minute, 15-minute, 1-hour).
+
+A compaction job folds new patient_vitals rows (by id, above the watermark in
+rollup_state) into patient_vital_rollups. Trend queries read the coarsest
+rollup whose resolution divides the requested interval and add the few raw
+rows above the watermark, so results stay exact while the job lags behind.
+"""
+from datetime import datetime, timezone
+
+from flask import current_app
+from sqlalchemy import func, insert, update
+
+from app import db
+from app.models import PatientVital, RollupState, VitalRollup
+from app.utils.dates import as_utc, floor_time
+from app.utils.validation import VITAL_FIELDS
+
+# Bucket widths in seconds, finest first
+RESOLUTIONS = (60, 900, 3600)
+STATE_KEY = 'patient_vitals'
+
+
+def pick_resolution(interval_seconds):
+    """Coarsest rollup resolution that evenly divides the interval, or None."""
+    for res in reversed(RESOLUTIONS):
+        if interval_seconds % res == 0:
+            return res
+    return None
+
+
+def get_watermark():
+    """Highest PatientVital id already folded into the rollups (0 if none)."""
+    # a query rather than session.get(), which may answer from the identity map without reading the row
+    return db.session.query(RollupState.last_vital_id).filter(RollupState.name == STATE_KEY).scalar() or 0
+
+
+def _aggregate(rows):
+    """Group raw rows into {(patient_id, resolution, bucket_start): {column: value}}."""
+    buckets = {}
+    for patient_id, ts, hr, temp, spo2 in rows:
+        ts = as_utc(ts)
+        values = (hr, temp, spo2)
+        for res in RESOLUTIONS:
+            key = (patient_id, res, floor_time(ts, res))
+            agg = buckets.get(key)
+            if agg is None:
+                agg = buckets[key] = {}
+                for vital in VITAL_FIELDS:
+                    agg[f'{vital}_sum'] = 0
+                    agg[f'{vital}_count'] = 0
+                    agg[f'{vital}_min'] = None
+                    agg[f'{vital}_max'] = None
+            for vital, v in zip(VITAL_FIELDS, values):
+                if v is None:
+                    continue
+                agg[f'{vital}_sum'] += v
+                agg[f'{vital}_count'] += 1
+                lo, hi = agg[f'{vital}_min'], agg[f'{vital}_max']
+                agg[f'{vital}_min'] = v if lo is None or v < lo else lo
+                agg[f'{vital}_max'] = v if hi is None or v > hi else hi
+    return buckets
+
+
+def _merge_into(row, agg):
+    for vital in VITAL_FIELDS:
+        setattr(row, f'{vital}_sum', (getattr(row, f'{vital}_sum') or 0) + agg[f'{vital}_sum'])
+        setattr(row, f'{vital}_count', (getattr(row, f'{vital}_count') or 0) + agg[f'{vital}_count'])
+        for suffix, pick in (('min', min), ('max', max)):
+            col = f'{vital}_{suffix}'
+            cur, new = getattr(row, col), agg[col]
+            if new is not None:
+                setattr(row, col, new if cur is None else pick(cur, new))
+
+
+def _apply(buckets):
+    """Merge aggregated buckets into existing rollup rows; insert the rest in bulk."""
+    pending = dict(buckets)
+    for res in RESOLUTIONS:
+        keys = [k for k in pending if k[1] == res]
+        if not keys:
+            continue
+        existing = VitalRollup.query.filter(
+            VitalRollup.resolution == res,
+            VitalRollup.patient_id.in_({k[0] for k in keys}),
+            VitalRollup.bucket_start >= min(k[2] for k in keys),
+            VitalRollup.bucket_start <= max(k[2] for k in keys),
+        )
+        for row in existing:
+            agg = pending.pop((row.patient_id, res, as_utc(row.bucket_start)), None)
+            if agg is not None:
+                _merge_into(row, agg)
+
+    if pending:
+        db.session.execute(insert(VitalRollup), [
+            {'patient_id': pid, 'resolution': res, 'bucket_start': start, **agg}
+            for (pid, res, start), agg in pending.items()
+        ])
+
+
+def compact_rollups(batch_size=None, settle=True):
+    """Fold new patient_vitals rows into the rollups, one committed batch at a time.
+
+    With settle=True only ids up to the highest id seen by the previous run
+    are compacted (see RollupState). Concurrent compactors are safe: the
+    watermark is advanced with a compare-and-set and the loser rolls back.
+
+    Returns the number of vitals compacted.
+    """
+    batch_size = batch_size or current_app.config.get('ROLLUP_BATCH_SIZE', 10000)
+    state = db.session.get(RollupState, STATE_KEY)
+    if state is None:
+        state = RollupState(name=STATE_KEY, last_vital_id=0, horizon_vital_id=0)
+        db.session.add(state)
+        db.session.commit()
+
+    max_id = db.session.query(func.max(PatientVital.id)).scalar() or 0
+    target = state.horizon_vital_id if settle else max_id
+    last = state.last_vital_id
+    processed = 0
+
+    while last < target:
+        rows = (
+            db.session.query(PatientVital.id, PatientVital.patient_id, PatientVital.timestamp,
+                             PatientVital.heart_rate, PatientVital.temperature, PatientVital.spo2)
+            .filter(PatientVital.id > last, PatientVital.id <= target)
+            .order_by(PatientVital.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        new_last = rows[-1][0]
+        _apply(_aggregate([r[1:] for r in rows]))
+        claimed = db.session.execute(
+            update(RollupState)
+            .where(RollupState.name == STATE_KEY, RollupState.last_vital_id == last)
+            .values(last_vital_id=new_last, updated_at=datetime.now(timezone.utc))
+        ).rowcount
+        if not claimed:
+            # another compactor advanced the watermark first
+            db.session.rollback()
+            return processed
+        db.session.commit()
+        processed += len(rows)
+        last = new_last
+
+    db.session.execute(
+        update(RollupState)
+        .where(RollupState.name == STATE_KEY, RollupState.horizon_vital_id < max_id)
+        .values(horizon_vital_id=max_id)
+    )
+    db.session.commit()
+    return processed
+
+
+def add_rollup_buckets(buckets, patient_id, vital_type, resolution, start_time, end_time, interval):
+    """Accumulate rollup rows into `buckets` ([sum, count, min, max] or None per interval).
+
+    start_time must be aligned to `resolution` and `interval` a multiple of it,
+    so every rollup bucket falls entirely inside one trend bucket.
+    Returns True if any rollup row contributed.
+    """
+    cols = [getattr(VitalRollup, f'{vital_type}_{s}') for s in ('sum', 'count', 'min', 'max')]
+    rows = db.session.query(VitalRollup.bucket_start, *cols).filter(
+        VitalRollup.patient_id == patient_id,
+        VitalRollup.resolution == resolution,
+        VitalRollup.bucket_start >= start_time,
+        VitalRollup.bucket_start <= end_time,
+    )
+    seen = False
+    for bucket_start, total, count, lo, hi in rows:
+        seen = True
+        if not count:
+            continue
+        idx = (as_utc(bucket_start) - start_time) // interval
+        if not 0 <= idx < len(buckets):
+            continue
+        b = buckets[idx]
+        if b is None:
+            buckets[idx] = [total, count, lo, hi]
+        else:
+            b[0] += total
+            b[1] += count
+            b[2] = min(b[2], lo)
+            b[3] = max(b[3], hi)
+    return seen
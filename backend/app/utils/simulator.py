@@ -1,7 +1,14 @@
 import random
 from datetime import datetime, timezone
+from sqlalchemy import insert
 from app import db
 from app.models import Patient, PatientVital, Alert
+from app.utils.alert_rules import get_rule_engine, patient_wards
+from app.utils.events import publish_readings
+from app.utils.hot_vitals import record_writes
+from app.utils.outbox import ALERT_CREATED, add_events
+from app.utils.risk_assessment import refresh_patient_risk
+from app.utils.validation import parse_vitals
 
 
 def generate_random_vitals():
@@ -23,6 +30,135 @@ def generate_random_vitals():
     return {'heart_rate': hr, 'temperature': temp, 'spo2': spo2}
 
 
+def _alert_row(patient_id, severity, message, now, escalate=False):
+    return {
+        'patient_id': patient_id,
+        'severity': severity,
+        'message': message,
+        'created_at': now,
+        # Auto-escalate critical alerts for demo; demo Nurse ID 1 is the escalator
+        'escalated': escalate,
+        'escalated_at': now if escalate else None,
+        'escalated_by': 1 if escalate else None,
+        'reviewed': False,
+        'reviewed_at': None,
+        'reviewed_by': None,
+        'closed': False,
+        'closed_at': None,
+        'closed_by': None,
+    }
+
+
+def _build_alerts(patient_id, triggered, now):
+    """Return alert rows (plain mappings) for the rules a reading triggered."""
+    return [
+        _alert_row(patient_id, rule.severity, rule.message.format(value=value), now, escalate=rule.auto_escalate)
+        for rule, value in triggered
+    ]
+
+
+def _isoformat(dt):
+    return dt.isoformat() if dt else None
+
+
+def _vital_row_dict(row):
+    """Same shape as PatientVital.to_dict(), built from an inserted mapping."""
+    return {
+        'id': row['id'],
+        'patient_id': row['patient_id'],
+        'heart_rate': row['heart_rate'],
+        'temperature': row['temperature'],
+        'spo2': row['spo2'],
+        'timestamp': row['timestamp'].isoformat()
+    }
+
+
+def _alert_row_dict(row):
+    """Same shape as Alert.to_dict(), built from an inserted mapping."""
+    d = dict(row)
+    for key in ('created_at', 'escalated_at', 'reviewed_at', 'closed_at'):
+        d[key] = _isoformat(d[key])
+    return d
+
+
+def bulk_insert(model, rows):
+    """INSERT `rows` (list of column mappings) for `model` and set each row's 'id'.
+
+    Uses a single executemany with RETURNING where the dialect supports it
+    (SQLite >= 3.35, PostgreSQL, MariaDB); otherwise falls back to one INSERT
+    per row so primary keys are still known (MySQL).
+    """
+    if not rows:
+        return rows
+    dialect = db.session.get_bind().dialect
+    if getattr(dialect, 'insert_executemany_returning_sort_by_parameter_order', False):
+        stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+        ids = db.session.scalars(stmt, rows).all()
+    else:
+        # parameters rather than .values(), so the ETag hook sees each row's patient_id
+        ids = [db.session.execute(insert(model.__table__), row).inserted_primary_key[0] for row in rows]
+    for row, pk in zip(rows, ids):
+        row['id'] = pk
+    return rows
+
+
+def evaluate_readings(readings, wards=None, commit=True):
+    """Store many validated readings and their rule-based alerts.
+
+    `readings` is a sequence of dicts with patient_id, heart_rate, temperature,
+    spo2 and an optional timestamp. Missing vitals are stored as NULL, and
+    patient existence is expected to have been checked by the caller.
+    `wards` maps patient id -> ward for rule resolution; it is looked up in
+    one query when not supplied.
+
+    Vitals and alerts are built as plain mappings and written with one bulk
+    INSERT per table, bypassing the ORM unit of work. The result dicts are
+    built from those mappings, so nothing is re-loaded after the commit.
+    Each auto-escalated alert also gets an 'alert_created' outbox event (its
+    escalation email) in the same transaction.
+    After committing, the results are published to SSE subscribers; with
+    commit=False the caller commits and publishes.
+
+    Returns a list of (vital_dict, [alert_dicts]) in input order.
+    """
+    now = datetime.now(timezone.utc)
+    if wards is None:
+        wards = patient_wards([r['patient_id'] for r in readings])
+    triggered_per_reading = get_rule_engine().evaluate_many(readings, wards)
+
+    vital_rows = []
+    alert_rows = []
+    alerts_per_reading = []
+    for r, triggered in zip(readings, triggered_per_reading):
+        vital_rows.append({
+            'patient_id': r['patient_id'],
+            'heart_rate': r.get('heart_rate'),
+            'temperature': r.get('temperature'),
+            'spo2': r.get('spo2'),
+            'timestamp': r.get('timestamp') or now,
+        })
+        alerts = _build_alerts(r['patient_id'], triggered, now)
+        alert_rows.extend(alerts)
+        alerts_per_reading.append(alerts)
+
+    bulk_insert(PatientVital, vital_rows)
+    bulk_insert(Alert, alert_rows)
+    record_writes(db.session, list(zip(vital_rows, alerts_per_reading)))
+    refresh_patient_risk({r['patient_id'] for r in vital_rows})
+
+    results = [
+        (_vital_row_dict(v), [_alert_row_dict(a) for a in alerts])
+        for v, alerts in zip(vital_rows, alerts_per_reading)
+    ]
+    add_events(ALERT_CREATED, [a for _, alerts in results for a in alerts if a['escalated']])
+
+    if commit:
+        db.session.commit()
+        publish_readings(results)
+
+    return results
+
+
 def create_vital_and_alerts(patient_id, heart_rate=None, temperature=None, spo2=None):
     """Create a PatientVital and rule-based Alerts according to project rules.
 
@@ -42,52 +178,12 @@ def create_vital_and_alerts(patient_id, heart_rate=None, temperature=None, spo2=
         spo2 = spo2 if spo2 is not None else d['spo2']
 
     # Validate types and ranges
-    try:
-        if heart_rate is not None:
-            heart_rate = int(heart_rate)
-            if heart_rate < 20 or heart_rate > 220:
-                raise ValueError('heart_rate must be between 20 and 220')
-        if temperature is not None:
-            temperature = float(temperature)
-            if temperature < 30.0 or temperature > 45.0:
-                raise ValueError('temperature must be between 30.0 and 45.0')
-        if spo2 is not None:
-            spo2 = int(spo2)
-            if spo2 < 50 or spo2 > 100:
-                raise ValueError('spo2 must be between 50 and 100')
-    except (TypeError, ValueError) as e:
-        # Re-raise as ValueError with message
-        raise ValueError(str(e))
-
-    vital = PatientVital(patient_id=patient.id, heart_rate=heart_rate, temperature=temperature, spo2=spo2, timestamp=datetime.now(timezone.utc))
-    db.session.add(vital)
-
-    alerts_created = []
-
-    # Temperature > 38.0 => critical
-    if temperature is not None and temperature > 38.0:
-        a = Alert(patient_id=patient.id, severity='critical', message=f'Temperature {temperature}°C — threshold exceeded')
-        a.escalated = True # Auto-escalate critical alerts for demo
-        a.escalated_at = datetime.now(timezone.utc)
-        a.escalated_by = 1 # Assuming demo Nurse ID is 1 for auto-escalation
-        db.session.add(a)
-        alerts_created.append(a)
-
-    # SpO2 < 90 => critical
-    if spo2 is not None and spo2 < 90:
-        a = Alert(patient_id=patient.id, severity='critical', message=f'SpO₂ {spo2}% — threshold exceeded')
-        a.escalated = True # Auto-escalate critical alerts for demo
-        a.escalated_at = datetime.now(timezone.utc)
-        a.escalated_by = 1 # Assuming demo Nurse ID is 1 for auto-escalation
-        db.session.add(a)
-        alerts_created.append(a)
-
-    # Heart rate < 60 or > 100 => warning
-    if heart_rate is not None and (heart_rate < 60 or heart_rate > 100):
-        a = Alert(patient_id=patient.id, severity='warning', message=f'Heart Rate {heart_rate} bpm — outside normal range')
-        db.session.add(a)
-        alerts_created.append(a)
-
-    db.session.commit()
-
-    return vital.to_dict(), [a.to_dict() for a in alerts_created]
+    heart_rate, temperature, spo2 = parse_vitals({'heart_rate': heart_rate, 'temperature': temperature, 'spo2': spo2})
+
+    [(vital_dict, alert_dicts)] = evaluate_readings([{
+        'patient_id': patient.id,
+        'heart_rate': heart_rate,
+        'temperature': temperature,
+        'spo2': spo2,
+    }], wards={patient.id: patient.ward})
+    return vital_dict, alert_dicts
@@ -0,0 +1,65 @@
+"""Shared input validation for vitals payloads.
+
+Used by the single-reading route, the batch ingest route and the simulator so
+the accepted ranges stay identical everywhere.
+"""
+from datetime import datetime, timezone
+
+# (min, max) accepted for each vital; values outside raise ValueError
+VITAL_RANGES = {
+    'heart_rate': (20, 220),
+    'temperature': (30.0, 45.0),
+    'spo2': (50, 100),
+}
+
+VITAL_FIELDS = ('heart_rate', 'temperature', 'spo2')
+
+
+def _parse_int(val, name, min_v, max_v):
+    if val is None:
+        return None
+    iv = int(val)
+    if iv < min_v or iv > max_v:
+        raise ValueError(f"{name} must be between {min_v} and {max_v}")
+    return iv
+
+
+def _parse_float(val, name, min_v, max_v):
+    if val is None:
+        return None
+    fv = float(val)
+    if fv < min_v or fv > max_v:
+        raise ValueError(f"{name} must be between {min_v} and {max_v}")
+    return fv
+
+
+def parse_vitals(payload):
+    """Validate a mapping with heart_rate / temperature / spo2 keys.
+
+    Missing keys are returned as None. Raises ValueError with a user-facing
+    message when a value has the wrong type or is out of range.
+
+    Returns (heart_rate, temperature, spo2)
+    """
+    try:
+        hr = _parse_int(payload.get('heart_rate'), 'heart_rate', *VITAL_RANGES['heart_rate'])
+        temp = _parse_float(payload.get('temperature'), 'temperature', *VITAL_RANGES['temperature'])
+        spo2 = _parse_int(payload.get('spo2'), 'spo2', *VITAL_RANGES['spo2'])
+    except TypeError as e:
+        raise ValueError(str(e))
+    return hr, temp, spo2
+
+
+def parse_timestamp(val):
+    """Parse an optional ISO-8601 timestamp; naive values are taken as UTC."""
+    if val is None:
+        return None
+    if not isinstance(val, str):
+        raise ValueError('timestamp must be an ISO-8601 string')
+    try:
+        ts = datetime.fromisoformat(val)
+    except ValueError:
+        raise ValueError('timestamp must be an ISO-8601 string')
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts
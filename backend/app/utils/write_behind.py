@@ -0,0 +1,177 @@
+"""Write-behind queue for single-reading ingest (INGEST_MODE = 'write_behind').
+
+submit_vitals validates the reading and hands it to this queue, which answers
+202 without touching the database. A writer thread commits everything queued
+so far in one evaluate_readings() transaction (group commit) once
+INGEST_FLUSH_ROWS readings are waiting or the oldest has waited
+INGEST_FLUSH_MS, so one fsync covers many readings.
+
+- Back-pressure: once INGEST_QUEUE_SIZE readings are waiting, submit() raises
+  QueueFull and the route answers 503 with Retry-After.
+- A reading that triggers a critical rule wakes the writer at once, and its
+  request waits for the commit and gets the usual 201 with the alerts.
+- Readings are held in memory: up to INGEST_FLUSH_MS of accepted (202)
+  readings can be lost if the process is killed. Pending readings are flushed
+  at normal interpreter exit.
+"""
+import atexit
+import threading
+import time
+from collections import deque
+
+from app import db
+
+
+class QueueFull(Exception):
+    """INGEST_QUEUE_SIZE readings are already waiting to be written."""
+
+
+class _Waiter:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+    def wait(self, timeout=None):
+        if not self.event.wait(timeout):
+            raise TimeoutError('reading was not written in time')
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class WriteBehindQueue:
+    def __init__(self, app, max_size=10000, flush_rows=500, flush_ms=200):
+        self.app = app
+        self.max_size = max_size
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_ms / 1000.0
+        self._pending = deque()  # (reading, ward, waiter or None)
+        self._cond = threading.Condition()
+        self._urgent = False
+        self._flushing = 0
+        self._thread = None
+        self._flush_at_exit = False
+        self.flushes = self.written = self.failed = self.rejected = self.urgent_flushes = 0
+        self.last_flush_rows = 0
+
+    def submit(self, reading, ward=None, urgent=False):
+        """Queue one validated reading; with urgent=True returns a waiter for its (vital, alerts)."""
+        waiter = _Waiter() if urgent else None
+        with self._cond:
+            if len(self._pending) >= self.max_size:
+                self.rejected += 1
+                raise QueueFull()
+            self._pending.append((reading, ward, waiter))
+            if urgent:
+                self._urgent = True
+            if urgent or len(self._pending) >= self.flush_rows:
+                self._cond.notify()
+        self._start()
+        return waiter
+
+    def flush(self, timeout=10):
+        """Write everything queued so far and wait for it (tests, shutdown)."""
+        with self._cond:
+            if not self._pending and not self._flushing:
+                return True
+            self._urgent = True
+            self._cond.notify()
+            deadline = time.monotonic() + timeout
+            while self._pending or self._flushing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self):
+        with self._cond:
+            return {
+                'queued': len(self._pending), 'queue_size': self.max_size,
+                'flush_rows': self.flush_rows, 'flush_ms': round(self.flush_seconds * 1000),
+                'flushes': self.flushes, 'urgent_flushes': self.urgent_flushes,
+                'written': self.written, 'failed': self.failed, 'rejected': self.rejected,
+                'last_flush_rows': self.last_flush_rows,
+            }
+
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='ingest-writer', daemon=True)
+                self._thread.start()
+                if not self._flush_at_exit:  # the thread may be restarted; register once
+                    atexit.register(self.flush)
+                    self._flush_at_exit = True
+
+    def _take_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            first_seen = time.monotonic()
+            while not self._urgent and len(self._pending) < self.flush_rows:
+                remaining = first_seen + self.flush_seconds - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            urgent, self._urgent = self._urgent, False
+            n = min(len(self._pending), self.flush_rows) if not urgent else len(self._pending)
+            batch = [self._pending.popleft() for _ in range(n)]
+            self._flushing = len(batch)
+            return batch, urgent
+
+    def _run(self):
+        while True:
+            batch, urgent = self._take_batch()
+            try:
+                with self.app.app_context():
+                    self._write(batch)
+            except Exception:
+                self.app.logger.exception('write-behind flush failed')
+            finally:
+                with self._cond:
+                    self.flushes += 1
+                    self.urgent_flushes += urgent
+                    self.last_flush_rows = len(batch)
+                    self._flushing = 0
+                    self._cond.notify_all()
+
+    def _write(self, batch):
+        from app.utils.simulator import evaluate_readings
+
+        wards = {r['patient_id']: ward for r, ward, _ in batch}
+        try:
+            results = evaluate_readings([r for r, _, _ in batch], wards=wards)
+        except Exception:
+            # one bad reading (e.g. its patient was deleted) must not drop the rest
+            db.session.rollback()
+            self.app.logger.exception('group commit of %d readings failed; writing them one by one', len(batch))
+            results = []
+            for r, _, waiter in batch:
+                try:
+                    results.append(evaluate_readings([r], wards=wards)[0])
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.exception('dropping reading for patient %s', r['patient_id'])
+                    self.failed += 1
+                    results.append(e)
+        for (_, _, waiter), result in zip(batch, results):
+            if isinstance(result, Exception):
+                if waiter:
+                    waiter.error = result
+                    waiter.event.set()
+                continue
+            self.written += 1
+            if waiter:
+                waiter.result = result
+                waiter.event.set()
+
+
+def get_write_behind_queue(app):
+    if 'write_behind' not in app.extensions:
+        cfg = app.config
+        app.extensions['write_behind'] = WriteBehindQueue(
+            app, cfg.get('INGEST_QUEUE_SIZE', 10000), cfg.get('INGEST_FLUSH_ROWS', 500), cfg.get('INGEST_FLUSH_MS', 200))
+    return app.extensions['write_behind']
@@ -0,0 +1,10 @@
+"""ASGI entry point for the vitals-ingest endpoints only (see app.asgi).
+
+  uvicorn asgi:app --host 0.0.0.0 --port 8001 --workers 2
+
+Route POST /patients/<id>/vitals and /patients/vitals/batch here and
+everything else to the Flask app (run.py / gunicorn app:app).
+"""
+from app.asgi import create_asgi_app
+
+app = create_asgi_app()
@@ -0,0 +1,46 @@
+"""Alert rules table and patient ward
+
+Revision ID: 3f9c2a7d1b40
+Revises: de06f4961977
+Create Date: 2026-10-17 09:12:41.204118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d1b40'
+down_revision = 'de06f4961977'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('patients', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ward', sa.String(length=50), nullable=True))
+
+    op.create_table('alert_rules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('vital', sa.String(length=20), nullable=False),
+    sa.Column('min_value', sa.Float(), nullable=True),
+    sa.Column('max_value', sa.Float(), nullable=True),
+    sa.Column('severity', sa.String(length=20), nullable=True),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('auto_escalate', sa.Boolean(), nullable=True),
+    sa.Column('risk_points', sa.Integer(), nullable=True),
+    sa.Column('ward', sa.String(length=50), nullable=True),
+    sa.Column('patient_id', sa.Integer(), nullable=True),
+    sa.Column('enabled', sa.Boolean(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('alert_rules')
+
+    with op.batch_alter_table('patients', schema=None) as batch_op:
+        batch_op.drop_column('ward')
@@ -0,0 +1,38 @@
+"""Composite indexes for hot query shapes
+
+Revision ID: 5d0e8a3b7c61
+Revises: c47a91e05d28
+Create Date: 2026-10-17 12:40:08.771390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0e8a3b7c61'
+down_revision = 'c47a91e05d28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # latest vital, trends, GET /patients/<id>/vitals
+    op.create_index('ix_patient_vitals_patient_id_timestamp', 'patient_vitals',
+                    ['patient_id', sa.text('timestamp DESC')], unique=False)
+    # risk score (open alerts in the last 24h) and the patient detail page
+    op.create_index('ix_alerts_patient_id_closed_created_at', 'alerts',
+                    ['patient_id', 'closed', 'created_at'], unique=False)
+    # GET /alerts/escalated
+    op.create_index('ix_alerts_escalated_created_at', 'alerts',
+                    ['escalated', 'created_at'], unique=False)
+    # patient notes, newest first
+    op.create_index('ix_notes_patient_id_timestamp', 'notes',
+                    ['patient_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_notes_patient_id_timestamp', table_name='notes')
+    op.drop_index('ix_alerts_escalated_created_at', table_name='alerts')
+    op.drop_index('ix_alerts_patient_id_closed_created_at', table_name='alerts')
+    op.drop_index('ix_patient_vitals_patient_id_timestamp', table_name='patient_vitals')
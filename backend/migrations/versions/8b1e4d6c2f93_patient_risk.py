@@ -0,0 +1,39 @@
+"""Materialized patient risk scores
+
+Revision ID: 8b1e4d6c2f93
+Revises: 3f9c2a7d1b40
+Create Date: 2026-10-17 10:03:17.551902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e4d6c2f93'
+down_revision = '3f9c2a7d1b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('patient_risk',
+    sa.Column('patient_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('stale_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.PrimaryKeyConstraint('patient_id')
+    )
+    with op.batch_alter_table('patient_risk', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_patient_risk_score'), ['score'], unique=False)
+        batch_op.create_index(batch_op.f('ix_patient_risk_stale_at'), ['stale_at'], unique=False)
+    # Rows are created lazily: patients without one are scored on the next dashboard read
+
+
+def downgrade():
+    with op.batch_alter_table('patient_risk', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_patient_risk_stale_at'))
+        batch_op.drop_index(batch_op.f('ix_patient_risk_score'))
+
+    op.drop_table('patient_risk')
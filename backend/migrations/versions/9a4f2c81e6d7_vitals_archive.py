@@ -0,0 +1,36 @@
+"""Archive table for vitals moved out by the retention job
+
+Revision ID: 9a4f2c81e6d7
+Revises: 5d0e8a3b7c61
+Create Date: 2026-10-17 16:31:08.412907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4f2c81e6d7'
+down_revision = '5d0e8a3b7c61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('patient_vitals_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('patient_id', sa.Integer(), nullable=False),
+    sa.Column('heart_rate', sa.Integer(), nullable=True),
+    sa.Column('temperature', sa.Float(), nullable=True),
+    sa.Column('spo2', sa.Integer(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_patient_vitals_archive_patient_id_timestamp', 'patient_vitals_archive',
+                    ['patient_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_patient_vitals_archive_patient_id_timestamp', table_name='patient_vitals_archive')
+    op.drop_table('patient_vitals_archive')
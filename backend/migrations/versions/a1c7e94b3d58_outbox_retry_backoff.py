@@ -0,0 +1,26 @@
+"""Retry backoff for outbox events
+
+Revision ID: a1c7e94b3d58
+Revises: f3b8d2a6c915
+Create Date: 2026-10-17 23:12:40.615204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c7e94b3d58'
+down_revision = 'f3b8d2a6c915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('outbox_events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('outbox_events', schema=None) as batch_op:
+        batch_op.drop_column('next_attempt_at')
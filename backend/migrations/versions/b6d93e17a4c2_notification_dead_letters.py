@@ -0,0 +1,34 @@
+"""Dead-letter table for undeliverable escalation emails
+
+Revision ID: b6d93e17a4c2
+Revises: 9a4f2c81e6d7
+Create Date: 2026-10-17 17:40:22.583104
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d93e17a4c2'
+down_revision = '9a4f2c81e6d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('notification_dead_letters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('recipient', sa.String(length=255), nullable=False),
+    sa.Column('subject', sa.String(length=255), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('alert_ids', sa.String(length=1000), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('notification_dead_letters')
@@ -0,0 +1,52 @@
+"""Vitals rollup tables
+
+Revision ID: c47a91e05d28
+Revises: 8b1e4d6c2f93
+Create Date: 2026-10-17 11:26:50.318442
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47a91e05d28'
+down_revision = '8b1e4d6c2f93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('patient_vital_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('patient_id', sa.Integer(), nullable=False),
+    sa.Column('resolution', sa.Integer(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('heart_rate_sum', sa.Float(), nullable=True),
+    sa.Column('heart_rate_count', sa.Integer(), nullable=True),
+    sa.Column('heart_rate_min', sa.Integer(), nullable=True),
+    sa.Column('heart_rate_max', sa.Integer(), nullable=True),
+    sa.Column('temperature_sum', sa.Float(), nullable=True),
+    sa.Column('temperature_count', sa.Integer(), nullable=True),
+    sa.Column('temperature_min', sa.Float(), nullable=True),
+    sa.Column('temperature_max', sa.Float(), nullable=True),
+    sa.Column('spo2_sum', sa.Float(), nullable=True),
+    sa.Column('spo2_count', sa.Integer(), nullable=True),
+    sa.Column('spo2_min', sa.Integer(), nullable=True),
+    sa.Column('spo2_max', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('patient_id', 'resolution', 'bucket_start', name='uq_vital_rollup_bucket')
+    )
+    op.create_table('rollup_state',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('last_vital_id', sa.Integer(), nullable=False),
+    sa.Column('horizon_vital_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('rollup_state')
+    op.drop_table('patient_vital_rollups')
@@ -0,0 +1,36 @@
+"""Transactional outbox for alert side-effects
+
+Revision ID: e2a7c5f80b19
+Revises: b6d93e17a4c2
+Create Date: 2026-10-17 18:12:47.901316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7c5f80b19'
+down_revision = 'b6d93e17a4c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('outbox_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('claimed_by', sa.String(length=100), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_events_claimed_by', 'outbox_events', ['claimed_by'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_outbox_events_claimed_by', table_name='outbox_events')
+    op.drop_table('outbox_events')
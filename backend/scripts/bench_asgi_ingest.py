@@ -0,0 +1,127 @@
+"""
+Load-test device ingest: Flask under gunicorn sync workers vs. the ASGI front-end under uvicorn.
+
+Both servers run against the same throwaway SQLite file, with the same number
+of worker processes. --clients concurrent connections each POST one reading to
+/patients/<id>/vitals after another for --seconds; every request opens a new
+connection, like a bedside monitor would.
+
+Usage (from the `backend` folder):
+  python scripts/bench_asgi_ingest.py
+  python scripts/bench_asgi_ingest.py --clients 500 --seconds 20 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND)
+
+
+async def _post(port, path, body, token, timeout):
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+    try:
+        data = json.dumps(body).encode()
+        writer.write((f'POST {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Token {token}\r\n'
+                      f'Content-Type: application/json\r\nContent-Length: {len(data)}\r\n'
+                      f'Connection: close\r\n\r\n').encode() + data)
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def _load(port, pids, token, clients, seconds, timeout):
+    latencies, statuses = [], {}
+    deadline = time.monotonic() + seconds
+
+    async def client():
+        while time.monotonic() < deadline:
+            body = {'heart_rate': random.randint(55, 110), 'temperature': 36.8, 'spo2': random.randint(90, 99)}
+            t0 = time.perf_counter()
+            try:
+                status = await _post(port, f'/patients/{random.choice(pids)}/vitals', body, token, timeout)
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                status = 'error'
+            latencies.append(time.perf_counter() - t0)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, statuses, time.perf_counter() - t0
+
+
+def _wait_for_port(port, proc, timeout=30):
+    import socket
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'server exited with {proc.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare WSGI and ASGI vitals ingest under load')
+    parser.add_argument('--clients', type=int, default=200, help='Concurrent device connections')
+    parser.add_argument('--seconds', type=float, default=10, help='Duration of each run')
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes per server')
+    parser.add_argument('--patients', type=int, default=100)
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    parser.add_argument('--port', type=int, default=5101)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='carewatch-bench-')
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmpdir, 'bench.db')}",
+               BACKGROUND_WORKERS_ENABLED='0')
+    os.environ.update(env)
+
+    from app import create_app, db
+    from app.models import Patient, User
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Patient(name=f'Bench {i}') for i in range(args.patients)])
+        db.session.add(User(name='Bench Nurse', role='nurse', api_token='bench-token'))
+        db.session.commit()
+        pids = [p.id for p in Patient.query.all()]
+
+    servers = (
+        ('WSGI (gunicorn sync)', [sys.executable, '-m', 'gunicorn', 'run:app', '--workers', str(args.workers),
+                                  '--bind', f'127.0.0.1:{args.port}', '--backlog', '4096', '--log-level', 'warning']),
+        ('ASGI (uvicorn)', [sys.executable, '-m', 'uvicorn', 'asgi:app', '--workers', str(args.workers),
+                            '--port', str(args.port + 1), '--backlog', '4096', '--log-level', 'warning',
+                            '--no-access-log']),
+    )
+    for i, (label, cmd) in enumerate(servers):
+        port = args.port + i
+        proc = subprocess.Popen(cmd, cwd=BACKEND, env=env)
+        try:
+            _wait_for_port(port, proc)
+            latencies, statuses, elapsed = asyncio.run(
+                _load(port, pids, 'bench-token', args.clients, args.seconds, args.timeout))
+        finally:
+            proc.terminate()
+            proc.wait()
+        latencies.sort()
+        ok = statuses.get(201, 0)
+        p50, p99 = (latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000 for q in (0.5, 0.99))
+        print(f'{label:>20}: {ok / elapsed:,.0f} req/s ok, p50 {p50:.0f} ms, p99 {p99:.0f} ms, '
+              f'statuses {statuses}')
+
+
+if __name__ == '__main__':
+    main()
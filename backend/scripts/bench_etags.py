@@ -0,0 +1,76 @@
+"""
+Polling cost with and without If-None-Match on the dashboard's GET endpoints.
+
+Seeds a throwaway SQLite file with --patients patients (and a few vitals and
+alerts each), then polls each endpoint --requests times in-process through
+the Flask test client: once as a plain GET, once revalidating the ETag from
+the previous response.
+
+Usage (from the `backend` folder):
+  python scripts/bench_etags.py
+  python scripts/bench_etags.py --patients 2000 --requests 500
+"""
+import argparse
+import os
+import secrets
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def seed(db, n_patients):
+    from app.models import Alert, Patient, PatientVital, User
+
+    nurse = User(name='Bench Nurse', role='nurse', api_token=secrets.token_urlsafe(16))
+    db.session.add(nurse)
+    patients = [Patient(name=f'Patient {i}', ward=f'W{i % 8}') for i in range(n_patients)]
+    db.session.add_all(patients)
+    db.session.flush()
+    for p in patients:
+        db.session.add_all(PatientVital(patient_id=p.id, heart_rate=70 + j, temperature=37.0, spo2=97) for j in range(5))
+        db.session.add(Alert(patient_id=p.id, severity='warning', message='bench'))
+    db.session.commit()
+    return nurse.api_token, patients[0].id
+
+
+def poll(client, url, headers, n, revalidate):
+    etag = client.get(url, headers=headers).headers.get('ETag')
+    statuses = set()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        h = {**headers, 'If-None-Match': etag} if revalidate else headers
+        res = client.get(url, headers=h)
+        statuses.add(res.status_code)
+    return (time.perf_counter() - t0) / n * 1000, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--patients', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ['BACKGROUND_WORKERS_ENABLED'] = '0'
+        from app import create_app, db
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            token, pid = seed(db, args.patients)
+        client = app.test_client()
+        headers = {'Authorization': f'Token {token}'}
+
+        print(f'{args.patients} patients, {args.requests} requests per row (ms/request)')
+        for url in ['/patients/', '/alerts/', f'/patients/{pid}', '/analytics/dashboard/summary',
+                    f'/analytics/patients/{pid}/trends/heart_rate?hours=24&interval=60']:
+            plain, _ = poll(client, url, headers, args.requests, revalidate=False)
+            cond, statuses = poll(client, url, headers, args.requests, revalidate=True)
+            print(f'  {url:<58} 200: {plain:7.2f}   If-None-Match: {cond:6.2f} {sorted(statuses)}')
+
+
+if __name__ == '__main__':
+    main()
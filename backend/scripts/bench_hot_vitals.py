@@ -0,0 +1,109 @@
+"""
+Hot vitals cache: patient detail and first vitals page, cached vs. DB.
+
+Seeds a throwaway SQLite file, then times (best of --repeat, per call):
+
+- GET /patients/<id>               (10 newest vitals + open alerts + notes)
+- GET /patients/<id>/vitals?limit=20  (dashboard mini-trend)
+
+with HOT_VITALS_PER_PATIENT=0 (every read hits the DB) and with the cache on,
+after a write-through ingest so the entries are the ones kept current in place.
+
+Usage (from the `backend` folder):
+  python scripts/bench_hot_vitals.py
+  python scripts/bench_hot_vitals.py --patients 200 --per-patient 500 --calls 500
+"""
+import argparse
+import os
+import secrets
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def seed(db, n_patients, per_patient):
+    from app.models import Alert, Patient, PatientVital, User
+    from app.utils.simulator import bulk_insert
+
+    nurse = User(name='Bench Nurse', role='nurse', api_token=secrets.token_urlsafe(24))
+    db.session.add(nurse)
+    patients = [Patient(name=f'Patient {i}') for i in range(n_patients)]
+    db.session.add_all(patients)
+    db.session.flush()
+    t0 = datetime.now(timezone.utc) - timedelta(hours=12)
+    for p in patients:
+        ts = [t0 + timedelta(seconds=i * 30) for i in range(per_patient)]
+        bulk_insert(PatientVital, [{'patient_id': p.id, 'heart_rate': 70 + i % 40, 'temperature': 37.0,
+                                    'spo2': 97, 'timestamp': t} for i, t in enumerate(ts)])
+        bulk_insert(Alert, [{'patient_id': p.id, 'severity': 'warning', 'message': 'HR high', 'created_at': t,
+                             'escalated': False, 'escalated_at': None, 'escalated_by': None, 'reviewed': False,
+                             'reviewed_at': None, 'reviewed_by': None, 'closed': False, 'closed_at': None,
+                             'closed_by': None} for t in ts[-5:]])
+    db.session.commit()
+    return nurse.api_token, [p.id for p in patients]
+
+
+def per_call(fn, pids, calls, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for i in range(calls):
+            fn(pids[i % len(pids)])
+        best = min(best, time.perf_counter() - t0)
+    return best / calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--patients', type=int, default=50)
+    parser.add_argument('--per-patient', type=int, default=2000)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ['BACKGROUND_WORKERS_ENABLED'] = '0'
+        os.environ['ETAG_VERSION_CACHE_MS'] = '1000'
+        from app import create_app, db
+        from app.utils.hot_vitals import get_hot_vitals
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            token, pids = seed(db, args.patients, args.per_patient)
+        client = app.test_client()
+        headers = {'Authorization': f'Token {token}'}
+
+        def detail(pid):
+            assert client.get(f'/patients/{pid}', headers=headers).status_code == 200
+
+        def mini_trend(pid):
+            assert client.get(f'/patients/{pid}/vitals?limit=20', headers=headers).status_code == 200
+
+        cases = {'GET /patients/<id>': detail, 'GET /patients/<id>/vitals?limit=20': mini_trend}
+        print(f'{args.patients} patients x {args.per_patient} vitals, {args.calls} calls, best of {args.repeat}')
+        results = {}
+        for per_patient in (0, 50):
+            app.config['HOT_VITALS_PER_PATIENT'] = per_patient
+            app.extensions.pop('hot_vitals', None)
+            with app.app_context():
+                hot = get_hot_vitals()
+                if hot:
+                    hot.warm()
+            for pid in pids:  # one ingest each, applied to the warm entries in place
+                client.post(f'/patients/{pid}/vitals', json={'heart_rate': 80, 'temperature': 37.0, 'spo2': 98},
+                            headers=headers)
+            for name, fn in cases.items():
+                results.setdefault(name, []).append(per_call(fn, pids, args.calls, args.repeat))
+            if hot:
+                print(f'  cache: {hot.stats()}')
+        for name, (t_db, t_hot) in results.items():
+            print(f'  {name:<36} db {t_db * 1000:6.2f} ms   cached {t_hot * 1000:6.2f} ms   ({t_db / t_hot:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
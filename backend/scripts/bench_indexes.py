@@ -0,0 +1,152 @@
+"""
+Show query plans and timings for the hot query shapes with and without the
+composite indexes from migration 5d0e8a3b7c61.
+
+Seeds a SQLite file (reused on later runs) with patients, vitals, alerts and
+notes, drops the composite indexes, measures, recreates them, measures again.
+
+Usage (from the `backend` folder):
+  python scripts/bench_indexes.py                      # ~10M vitals, takes a while to seed
+  python scripts/bench_indexes.py --vitals 500000 --db /tmp/idx.db
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+INDEX_NAMES = (
+    'ix_patient_vitals_patient_id_timestamp',
+    'ix_alerts_patient_id_closed_created_at',
+    'ix_alerts_escalated_created_at',
+    'ix_notes_patient_id_timestamp',
+)
+
+
+def seed(db, n_patients, n_vitals, chunk=100000):
+    from sqlalchemy import insert
+    from app.models import Alert, Note, Patient, PatientVital, User
+
+    rng = random.Random(1)
+    now = datetime.now(timezone.utc)
+    db.session.add(User(id=1, name='Bench Nurse', role='nurse'))
+    db.session.execute(insert(Patient), [{'name': f'Bench {i}'} for i in range(n_patients)])
+    db.session.commit()
+
+    done = 0
+    while done < n_vitals:
+        n = min(chunk, n_vitals - done)
+        db.session.execute(insert(PatientVital), [{
+            'patient_id': rng.randint(1, n_patients),
+            'heart_rate': rng.randint(50, 120),
+            'temperature': round(rng.uniform(36.0, 39.0), 1),
+            'spo2': rng.randint(85, 100),
+            'timestamp': now - timedelta(seconds=rng.randint(0, 30 * 86400)),
+        } for _ in range(n)])
+        db.session.commit()
+        done += n
+        print(f'  seeded {done:,} vitals', end='\r')
+    print()
+
+    n_alerts = max(n_vitals // 20, 1)
+    db.session.execute(insert(Alert), [{
+        'patient_id': rng.randint(1, n_patients),
+        'severity': rng.choice(['critical', 'warning']),
+        'message': 'bench',
+        'created_at': now - timedelta(seconds=rng.randint(0, 30 * 86400)),
+        'escalated': rng.random() < 0.2,
+        'closed': rng.random() < 0.7,
+    } for _ in range(n_alerts)])
+    db.session.execute(insert(Note), [{
+        'patient_id': rng.randint(1, n_patients),
+        'user_id': 1,
+        'content': 'bench',
+        'timestamp': now - timedelta(seconds=rng.randint(0, 30 * 86400)),
+    } for _ in range(max(n_vitals // 100, 1))])
+    db.session.commit()
+
+
+def queries(n_patients):
+    from app.models import Alert, Note, PatientVital
+
+    now = datetime.now(timezone.utc)
+    pid = n_patients // 2
+    return {
+        'latest vital': PatientVital.query.filter_by(patient_id=pid)
+            .order_by(PatientVital.timestamp.desc()).limit(1),
+        'patient vitals page': PatientVital.query.filter_by(patient_id=pid)
+            .order_by(PatientVital.timestamp.desc()).limit(100),
+        'trend window (24h)': PatientVital.query.filter(
+            PatientVital.patient_id == pid, PatientVital.timestamp >= now - timedelta(hours=24),
+            PatientVital.timestamp <= now).order_by(PatientVital.timestamp),
+        'risk: open alerts 24h': Alert.query.filter(
+            Alert.patient_id == pid, Alert.closed == False, Alert.created_at >= now - timedelta(hours=24)),
+        'escalated alerts': Alert.query.filter_by(escalated=True).order_by(Alert.created_at.desc()).limit(100),
+        'patient notes': Note.query.filter_by(patient_id=pid).order_by(Note.timestamp.desc()),
+    }
+
+
+def measure(db, n_patients, label, repeat=5):
+    from sqlalchemy import text
+
+    print(f'\n=== {label} ===')
+    for name, q in queries(n_patients).items():
+        sql = str(q.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        plan = db.session.execute(text('EXPLAIN QUERY PLAN ' + sql)).fetchall()
+        best = float('inf')
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            q.all()
+            best = min(best, time.perf_counter() - t0)
+            db.session.expunge_all()
+        print(f'{name:<24} {best * 1000:9.2f} ms   plan: ' + ' | '.join(row[-1] for row in plan))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark composite indexes on hot queries')
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'carewatch_bench_indexes.db'),
+                        help='SQLite file to seed (reused if it exists)')
+    parser.add_argument('--patients', type=int, default=2000)
+    parser.add_argument('--vitals', type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    db_path = os.path.abspath(args.db)
+    fresh = not os.path.exists(db_path)
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+
+    from sqlalchemy import text
+    from app import create_app, db
+    from app.models import PatientVital
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            sys.exit('this benchmark uses SQLite EXPLAIN QUERY PLAN output')
+        if fresh:
+            db.create_all()
+            for name in INDEX_NAMES:
+                db.session.execute(text(f'DROP INDEX IF EXISTS {name}'))
+            print(f'Seeding {db_path} ...')
+            seed(db, args.patients, args.vitals)
+        print(f'{PatientVital.query.count():,} vitals in {db_path}')
+
+        indexes = [ix for table in db.metadata.tables.values() for ix in table.indexes if ix.name in INDEX_NAMES]
+        for ix in indexes:
+            ix.drop(db.engine, checkfirst=True)
+        db.session.execute(text('ANALYZE'))
+        measure(db, args.patients, 'without composite indexes')
+
+        t0 = time.perf_counter()
+        for ix in indexes:
+            ix.create(db.engine)
+        db.session.execute(text('ANALYZE'))
+        print(f'\n(created {len(indexes)} indexes in {time.perf_counter() - t0:.1f}s)')
+        measure(db, args.patients, 'with composite indexes')
+
+
+if __name__ == '__main__':
+    main()
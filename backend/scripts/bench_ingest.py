@@ -0,0 +1,106 @@
+"""
+Compare vitals ingest throughput: legacy ORM unit-of-work path vs. bulk Core inserts,
+and one commit per reading vs. the write-behind queue (group commit).
+
+Runs against a throwaway SQLite file so it never touches the dev database.
+
+Usage (from the `backend` folder):
+  python scripts/bench_ingest.py
+  python scripts/bench_ingest.py --rows 20000 --patients 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def legacy_ingest(readings):
+    """The pre-bulk path: ORM objects added one by one, to_dict() after commit."""
+    from app import db
+    from app.models import PatientVital, Alert
+
+    now = datetime.now(timezone.utc)
+    created = []
+    for r in readings:
+        vital = PatientVital(patient_id=r['patient_id'], heart_rate=r['heart_rate'],
+                             temperature=r['temperature'], spo2=r['spo2'], timestamp=now)
+        db.session.add(vital)
+        alerts = []
+        if r['temperature'] > 38.0:
+            alerts.append(Alert(patient_id=r['patient_id'], severity='critical', message='t',
+                                escalated=True, escalated_at=now, escalated_by=1))
+        if r['spo2'] < 90:
+            alerts.append(Alert(patient_id=r['patient_id'], severity='critical', message='s',
+                                escalated=True, escalated_at=now, escalated_by=1))
+        if r['heart_rate'] < 60 or r['heart_rate'] > 100:
+            alerts.append(Alert(patient_id=r['patient_id'], severity='warning', message='h'))
+        db.session.add_all(alerts)
+        created.append((vital, alerts))
+    db.session.commit()
+    return [(v.to_dict(), [a.to_dict() for a in alerts]) for v, alerts in created]
+
+
+def per_reading_commits(readings):
+    """POST /patients/<id>/vitals in sync mode: one transaction per reading."""
+    from app.utils.simulator import evaluate_readings
+    return [evaluate_readings([r])[0] for r in readings]
+
+
+def write_behind(readings):
+    """INGEST_MODE=write_behind: readings queued, committed in INGEST_FLUSH_ROWS groups."""
+    from flask import current_app
+    from app.utils.write_behind import get_write_behind_queue
+
+    from app import db
+    from app.models import Alert
+
+    queue = get_write_behind_queue(current_app._get_current_object())
+    written, alerts = queue.stats()['written'], Alert.query.count()
+    for r in readings:
+        queue.submit(r)
+    queue.flush(timeout=600)
+    db.session.commit()  # end the read transaction so the count sees the writer's commits
+    alerts = Alert.query.count() - alerts
+    return [(None, [None] * alerts)] + [(None, [])] * (queue.stats()['written'] - written - 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark vitals ingest paths')
+    parser.add_argument('--rows', type=int, default=10000, help='Readings per run')
+    parser.add_argument('--patients', type=int, default=100, help='Number of patients to spread readings over')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='carewatch-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    from app import create_app, db
+    from app.models import Patient
+    from app.utils.simulator import generate_random_vitals, evaluate_readings
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Patient(name=f'Bench {i}') for i in range(args.patients)])
+        db.session.commit()
+        pids = [p.id for p in Patient.query.all()]
+
+        readings = [dict(patient_id=random.choice(pids), **generate_random_vitals()) for _ in range(args.rows)]
+
+        app.config['INGEST_QUEUE_SIZE'] = len(readings)
+        for label, fn in (('legacy ORM', legacy_ingest), ('bulk Core', evaluate_readings),
+                          ('per-reading commit', per_reading_commits), ('write-behind', write_behind)):
+            t0 = time.perf_counter()
+            result = fn(readings)
+            elapsed = time.perf_counter() - t0
+            n_alerts = sum(len(a) for _, a in result)
+            print(f'{label:>18}: {len(result)} vitals + {n_alerts} alerts in {elapsed:.3f}s '
+                  f'-> {len(result) / elapsed:,.0f} readings/sec')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Login burst vs. concurrent API latency: bcrypt inline vs. on the bounded pool.
+
+Starts a threaded dev server on a throwaway SQLite file, fires --logins
+concurrent /auth/login requests and, at the same time, polls a cheap endpoint
+(GET /patients/) to see how much the burst slows everything else down.
+
+Usage (from the `backend` folder):
+  python scripts/bench_login.py
+  python scripts/bench_login.py --logins 200 --concurrency 32 --workers 2 --queue 16
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _request(url, body=None, headers=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json', **(headers or {})})
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req) as res:
+            status = res.status
+            res.read()
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - t0
+
+
+def run(app, base, args, token):
+    app.extensions.pop('password_pool', None)
+    stop = threading.Event()
+    api_latencies = []
+
+    def poll():
+        while not stop.is_set():
+            api_latencies.append(_request(f'{base}/patients/', headers={'Authorization': f'Token {token}'})[1])
+
+    pollers = [threading.Thread(target=poll) for _ in range(4)]
+    for t in pollers:
+        t.start()
+    time.sleep(0.5)
+    idle = len(api_latencies)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as ex:
+        results = list(ex.map(lambda _: _request(f'{base}/auth/login', {'email': 'bench@example.com', 'password': 'pw'}),
+                              range(args.logins)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    for t in pollers:
+        t.join()
+
+    busy = sorted(api_latencies[idle:]) or [0.0]
+    ok = sum(1 for s, _ in results if s == 200)
+    rejected = sum(1 for s, _ in results if s == 503)
+    return (f'{ok} ok / {rejected} rejected in {elapsed:.2f}s -> {ok / elapsed:,.1f} logins/sec; '
+            f'API p50 {statistics.median(busy) * 1000:.0f} ms, p99 {busy[int(len(busy) * 0.99)] * 1000:.0f} ms '
+            f'({len(busy)} requests)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark login throughput against API latency')
+    parser.add_argument('--logins', type=int, default=100, help='Login requests per run')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent login clients')
+    parser.add_argument('--workers', type=int, default=2, help='PASSWORD_POOL_WORKERS for the pooled run')
+    parser.add_argument('--queue', type=int, default=16, help='PASSWORD_POOL_QUEUE for the pooled run')
+    parser.add_argument('--rounds', type=int, default=12, help='BCRYPT_ROUNDS')
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='carewatch-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ['BACKGROUND_WORKERS_ENABLED'] = '0'
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import create_app, db
+    from app.models import User, Patient
+    from app.utils.passwords import hash_password
+
+    app = create_app()
+    app.config['BCRYPT_ROUNDS'] = args.rounds
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Patient(name=f'Bench {i}') for i in range(20)])
+        db.session.add(User(name='Bench', role='nurse', email='bench@example.com', api_token='bench-token',
+                            password_hash=hash_password('pw', args.rounds)))
+        db.session.commit()
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', args.port, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{args.port}'
+    try:
+        for label, workers, queue in (('inline', 0, 0), ('pool', args.workers, args.queue)):
+            app.config.update(PASSWORD_POOL_WORKERS=workers, PASSWORD_POOL_QUEUE=queue)
+            print(f'{label:>6}: {run(app, base, args, "bench-token")}')
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
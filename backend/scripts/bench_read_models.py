@@ -0,0 +1,111 @@
+"""
+List endpoint read path: ORM objects vs. column-only read models.
+
+Seeds a throwaway SQLite file, then for one --limit sized page of each list
+endpoint's query measures rows/sec and peak Python memory (tracemalloc) of
+building and encoding the response body:
+
+- orm:  Model.query ... .all() -> to_json() per object (+ v.patient.name for /patients/vitals)
+- rows: app.utils.read_models column query -> Rows encoded directly
+
+Usage (from the `backend` folder):
+  python scripts/bench_read_models.py
+  python scripts/bench_read_models.py --patients 200 --per-patient 200 --limit 1000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def seed(db, n_patients, per_patient):
+    from app.models import Alert, Note, Patient, PatientVital, User
+    from app.utils.simulator import bulk_insert
+
+    nurse = User(name='Bench Nurse', role='nurse')
+    db.session.add(nurse)
+    patients = [Patient(name=f'Patient {i}') for i in range(n_patients)]
+    db.session.add_all(patients)
+    db.session.flush()
+    t0 = datetime.now(timezone.utc) - timedelta(days=1)
+    for p in patients:
+        ts = [t0 + timedelta(seconds=i * n_patients + p.id) for i in range(per_patient)]
+        bulk_insert(PatientVital, [{'patient_id': p.id, 'heart_rate': 70, 'temperature': 37.0, 'spo2': 97,
+                                    'timestamp': t} for t in ts])
+        bulk_insert(Alert, [{'patient_id': p.id, 'severity': 'warning', 'message': 'HR high', 'created_at': t,
+                             'escalated': False, 'escalated_at': None, 'escalated_by': None, 'reviewed': False,
+                             'reviewed_at': None, 'reviewed_by': None, 'closed': False, 'closed_at': None,
+                             'closed_by': None} for t in ts])
+        bulk_insert(Note, [{'patient_id': p.id, 'user_id': nurse.id, 'content': 'checked', 'timestamp': t}
+                           for t in ts])
+    db.session.commit()
+    return patients[0].id
+
+
+def measure(db, app, build, n_repeat):
+    best, peak = float('inf'), 0
+    for _ in range(n_repeat):
+        db.session.expunge_all()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        body = app.json.response(build()).get_data()
+        best = min(best, time.perf_counter() - t0)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return best, peak, body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--patients', type=int, default=50)
+    parser.add_argument('--per-patient', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ['BACKGROUND_WORKERS_ENABLED'] = '0'
+        from app import create_app, db
+        from app.models import Alert, Note, PatientVital
+        from app.utils.read_models import alert_rows, note_rows, vital_rows
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            pid = seed(db, args.patients, args.per_patient)
+            n = args.limit
+            newest = lambda q, m, ts: q.order_by(getattr(m, ts).desc(), m.id.desc()).limit(n).all()
+            cases = {
+                '/patients/vitals': (
+                    lambda: [{**v.to_json(), 'patient_name': v.patient.name if v.patient else None}
+                             for v in newest(PatientVital.query, PatientVital, 'timestamp')],
+                    lambda: newest(vital_rows(with_patient_name=True), PatientVital, 'timestamp')),
+                '/patients/<id>/vitals': (
+                    lambda: newest(PatientVital.query.filter_by(patient_id=pid), PatientVital, 'timestamp'),
+                    lambda: newest(vital_rows().filter(PatientVital.patient_id == pid), PatientVital, 'timestamp')),
+                '/alerts': (
+                    lambda: newest(Alert.query, Alert, 'created_at'),
+                    lambda: newest(alert_rows(), Alert, 'created_at')),
+                '/patients/<id>/notes': (
+                    lambda: newest(Note.query.filter_by(patient_id=pid), Note, 'timestamp'),
+                    lambda: newest(note_rows().filter(Note.patient_id == pid), Note, 'timestamp')),
+            }
+            print(f'{args.patients} patients x {args.per_patient} rows, page of {n}, best of {args.repeat}')
+            for name, (orm, rows) in cases.items():
+                t_orm, m_orm, body_orm = measure(db, app, orm, args.repeat)
+                t_rows, m_rows, body_rows = measure(db, app, rows, args.repeat)
+                assert body_orm == body_rows, name
+                count = body_rows.count(b'"id":')
+                print(f'  {name:<22} orm {count / t_orm:>9,.0f} rows/s {m_orm / 1024:>7,.0f} KiB   '
+                      f'read model {count / t_rows:>9,.0f} rows/s {m_rows / 1024:>7,.0f} KiB   '
+                      f'({t_orm / t_rows:.1f}x, {m_orm / m_rows:.1f}x less memory)')
+
+
+if __name__ == '__main__':
+    main()
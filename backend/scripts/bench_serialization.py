@@ -0,0 +1,86 @@
+"""
+Response encoding throughput: to_dict() + stdlib jsonify vs. the orjson provider.
+
+Loads --rows alerts and vitals from a throwaway SQLite file once, then times
+only the encoding of the list endpoint bodies (dicts/sec):
+
+- before: [a.to_dict() for a in alerts] through Flask's stdlib JSON provider
+- models: the model list through app.utils.serialization (to_json(), native datetimes)
+- rows:   the same columns as SQLAlchemy Row tuples through app.utils.serialization
+
+Usage (from the `backend` folder):
+  python scripts/bench_serialization.py
+  python scripts/bench_serialization.py --rows 20000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def seed(db, n):
+    from app.models import Alert, Patient, PatientVital
+    from app.utils.simulator import bulk_insert
+
+    patient = Patient(name='Bench')
+    db.session.add(patient)
+    db.session.flush()
+    t0 = datetime.now(timezone.utc) - timedelta(days=1)
+    bulk_insert(PatientVital, [{'patient_id': patient.id, 'heart_rate': 60 + i % 50, 'temperature': 36.5,
+                                'spo2': 90 + i % 10, 'timestamp': t0 + timedelta(seconds=i)} for i in range(n)])
+    bulk_insert(Alert, [{'patient_id': patient.id, 'severity': 'warning', 'message': f'HR {i}',
+                         'created_at': t0 + timedelta(seconds=i), 'escalated': bool(i % 2),
+                         'escalated_at': t0 if i % 2 else None, 'escalated_by': None, 'reviewed': False,
+                         'reviewed_at': None, 'reviewed_by': None, 'closed': False, 'closed_at': None,
+                         'closed_by': None} for i in range(n)])
+    db.session.commit()
+
+
+def best_rate(fn, n, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return n / best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ['BACKGROUND_WORKERS_ENABLED'] = '0'
+        from flask.json.provider import DefaultJSONProvider
+        from sqlalchemy import select
+
+        from app import create_app, db
+        from app.models import Alert, PatientVital
+        from app.utils import serialization
+
+        app = create_app()
+        with app.app_context(), app.test_request_context():
+            db.create_all()
+            seed(db, args.rows)
+            stdlib = DefaultJSONProvider(app)
+            print(f'{args.rows} rows, best of {args.repeat}; encoder: '
+                  f"{'orjson' if serialization.orjson else 'stdlib json (orjson not installed)'}")
+            for model in (Alert, PatientVital):
+                objects = model.query.all()
+                rows = db.session.execute(select(*model.__table__.columns)).all()
+                before = best_rate(lambda: stdlib.response([o.to_dict() for o in objects]), len(objects), args.repeat)
+                models = best_rate(lambda: app.json.response(objects), len(objects), args.repeat)
+                tuples = best_rate(lambda: app.json.response(rows), len(rows), args.repeat)
+                print(f'  {model.__tablename__:<15} before {before:>10,.0f}/s   models {models:>10,.0f}/s '
+                      f'({models / before:.1f}x)   rows {tuples:>10,.0f}/s ({tuples / before:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+from app import db
+from app.models import AlertRule, Patient
+from app.utils.alert_rules import get_rule_engine, invalidate_rules
+from app.utils.risk_assessment import calculate_risk_score
+from app.utils.simulator import evaluate_readings
+
+
+def _severities(result):
+    return sorted(a['severity'] for a in result[1])
+
+
+def test_default_rules_match_legacy_thresholds(app_instance, demo_user_and_patient):
+    pid = demo_user_and_patient['patient'].id
+
+    results = evaluate_readings([
+        {'patient_id': pid, 'heart_rate': 75, 'temperature': 38.5, 'spo2': 97},
+        {'patient_id': pid, 'heart_rate': 75, 'temperature': 38.0, 'spo2': 90},
+        {'patient_id': pid, 'heart_rate': 120, 'temperature': 37.0, 'spo2': 88},
+    ])
+    assert _severities(results[0]) == ['critical']
+    assert results[0][1][0]['message'] == 'Temperature 38.5°C — threshold exceeded'
+    assert results[0][1][0]['escalated'] is True
+    assert _severities(results[1]) == []
+    assert _severities(results[2]) == ['critical', 'warning']
+
+
+def test_ward_and_patient_overrides(app_instance, demo_user_and_patient):
+    p = demo_user_and_patient['patient']
+    p.ward = 'ICU'
+    other = Patient(name='Other', ward='ICU')
+    db.session.add(other)
+    db.session.add(AlertRule(name='temperature_high', vital='temperature', max_value=37.8, severity='critical',
+                             message='ICU temp {value}', auto_escalate=True, risk_points=7, ward='ICU'))
+    db.session.add(AlertRule(name='heart_rate_abnormal', vital='heart_rate', enabled=False, patient_id=p.id))
+    db.session.commit()
+    invalidate_rules()
+
+    results = evaluate_readings([
+        {'patient_id': p.id, 'heart_rate': 130, 'temperature': 37.9},
+        {'patient_id': other.id, 'heart_rate': 130, 'temperature': 37.9},
+    ])
+    assert [a['message'] for a in results[0][1]] == ['ICU temp 37.9']
+    assert [a['message'] for a in results[1][1]] == ['ICU temp 37.9', 'Heart Rate 130 bpm — outside normal range']
+
+
+def test_rule_changes_reload_without_restart(client, app_instance, demo_user_and_patient):
+    doctor = demo_user_and_patient['doctor']
+    pid = demo_user_and_patient['patient'].id
+    engine = get_rule_engine()
+
+    res = client.post('/alerts/rules', json={
+        'name': 'spo2_low', 'vital': 'spo2', 'min_value': 92, 'severity': 'critical',
+        'message': 'SpO₂ {value}% — below 92', 'auto_escalate': True, 'risk_points': 7,
+    }, headers={'Authorization': f'Token {doctor.api_token}'})
+    assert res.status_code == 201
+    assert get_rule_engine() is not engine
+
+    [(_, alerts)] = evaluate_readings([{'patient_id': pid, 'spo2': 91}])
+    assert [a['message'] for a in alerts] == ['SpO₂ 91% — below 92']
+
+    # Another worker's change is picked up once the reload interval has passed
+    app_instance.config['ALERT_RULES_RELOAD_SECONDS'] = 0
+    db.session.delete(AlertRule.query.one())
+    db.session.commit()
+    [(_, alerts)] = evaluate_readings([{'patient_id': pid, 'spo2': 91}])
+    assert alerts == []
+
+
+def test_risk_score_uses_rule_thresholds(app_instance, demo_user_and_patient):
+    pid = demo_user_and_patient['patient'].id
+
+    evaluate_readings([{'patient_id': pid, 'heart_rate': 105, 'temperature': 37.6, 'spo2': 93}])
+    # warning alert (5) + hr mild (2) + temp elevated (3) + spo2 borderline (3)
+    assert calculate_risk_score(pid) == 13
+
+
+def test_invalid_rules_are_rejected(client, demo_user_and_patient):
+    headers = {'Authorization': f"Token {demo_user_and_patient['doctor'].api_token}"}
+    base = {'name': 'temperature_high', 'vital': 'temperature', 'max_value': 37.5, 'severity': 'critical'}
+    for bad in [{'message': 'Temp {temp} high'}, {'message': 'Temp {} high'}, {'message': 'Temp {value'},
+                {'message': 'Temp {value:d}'}, {'message': 'Temp {value[0]}'},
+                {'message': 'Temp {value}', 'min_value': 38.0},
+                {'message': 'Temp {value}', 'enabled': 'false'}, {'message': 'Temp {value}', 'auto_escalate': 1}]:
+        res = client.post('/alerts/rules', json={**base, **bad}, headers=headers)
+        assert res.status_code == 400, bad
+    assert AlertRule.query.count() == 0
+
+    res = client.post('/alerts/rules', json={**base, 'message': 'Temp {value:.1f}', 'enabled': False},
+                      headers=headers)
+    assert res.status_code == 201 and res.get_json()['enabled'] is False
@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+from app.asgi import create_asgi_app
+from app.models import Alert, PatientVital
+
+
+def _call(asgi_app, method, path, body=None, headers=None):
+    raw = json.dumps(body).encode() if body is not None else b''
+    scope = {'type': 'http', 'method': method, 'path': path,
+             'headers': [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]}
+    messages = [{'type': 'http.request', 'body': raw[:10], 'more_body': True},
+                {'type': 'http.request', 'body': raw[10:], 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi_app(scope, receive, send))
+    start, body_msg = sent
+    return start['status'], dict(start['headers']), json.loads(body_msg['body'])
+
+
+def test_reading_goes_through_the_shared_ingest_path(app_instance, demo_user_and_patient):
+    asgi_app = create_asgi_app(app_instance)
+    pid = demo_user_and_patient['patient'].id
+    headers = {'Authorization': f"Token {demo_user_and_patient['nurse'].api_token}"}
+
+    status, _, body = _call(asgi_app, 'POST', f'/patients/{pid}/vitals',
+                            {'heart_rate': 80, 'temperature': 38.6, 'spo2': 97}, headers)
+    assert status == 201
+    assert body['vital']['temperature'] == 38.6
+    assert [a['severity'] for a in body['alerts_created']] == ['critical']
+    assert PatientVital.query.count() == 1 and Alert.query.count() == 1
+
+    status, _, body = _call(asgi_app, 'POST', f'/patients/{pid}/vitals', {'spo2': 120}, headers)
+    assert status == 400 and 'spo2' in body['error']
+    assert _call(asgi_app, 'POST', '/patients/999/vitals', {'spo2': 97}, headers)[0] == 404
+
+    status, _, body = _call(asgi_app, 'POST', '/patients/vitals/batch',
+                            {'readings': [{'patient_id': pid, 'spo2': 97}, {'patient_id': 999, 'spo2': 97}]}, headers)
+    assert status == 201 and body['accepted'] == 1 and body['results'][1]['error'] == 'patient not found'
+
+
+def test_auth_and_routing(app_instance, demo_user_and_patient):
+    asgi_app = create_asgi_app(app_instance)
+    pid = demo_user_and_patient['patient'].id
+    doctor = {'Authorization': f"Token {demo_user_and_patient['doctor'].api_token}"}
+
+    assert _call(asgi_app, 'POST', f'/patients/{pid}/vitals', {'spo2': 97})[0] == 401
+    assert _call(asgi_app, 'POST', f'/patients/{pid}/vitals', {'spo2': 97}, doctor)[0] == 403
+    assert _call(asgi_app, 'POST', f'/patients/{pid}/vitals', {'spo2': 97},
+                 {'X-User-Id': str(demo_user_and_patient['nurse'].id)})[0] == 201
+    assert _call(asgi_app, 'GET', '/alerts/')[0] == 404
+    assert _call(asgi_app, 'GET', f'/patients/{pid}/vitals')[0] == 405
+
+
+def test_rejects_when_too_many_requests_are_waiting(app_instance, demo_user_and_patient):
+    asgi_app = create_asgi_app(app_instance)
+    asgi_app.pending = asgi_app.max_pending
+    status, headers, _ = _call(asgi_app, 'POST', '/patients/vitals/batch', {'readings': []})
+    assert status == 503 and headers[b'retry-after'] == b'1'
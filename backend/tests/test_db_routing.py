@@ -0,0 +1,107 @@
+import secrets
+
+import pytest
+from sqlalchemy import text
+
+from app import create_app, db
+from app.config import Config
+from app.models import Patient, User
+from app.utils.db_routing import engine_options
+
+
+@pytest.fixture
+def replicated_app(tmp_path, monkeypatch):
+    """Two SQLite files standing in for a primary and a (lagging) replica."""
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{primary}')
+
+    class ReplicaConfig(Config):
+        SQLALCHEMY_REPLICA_URIS = [f'sqlite:///{replica}']
+
+    app = create_app(ReplicaConfig)
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(app.extensions['replica_engines'][0])
+        yield app
+        db.session.remove()
+        for engine in [*db.engines.values(), *app.extensions['replica_engines']]:
+            engine.dispose()
+
+
+def test_read_routes_use_the_replica_and_writes_the_primary(replicated_app):
+    nurse = User(name='Nurse', role='nurse', api_token=secrets.token_urlsafe(16))
+    db.session.add_all([nurse, Patient(name='On primary')])
+    db.session.commit()
+    with replicated_app.extensions['replica_engines'][0].begin() as conn:
+        conn.execute(text("INSERT INTO patients (id, name) VALUES (1, 'Replica copy')"))
+
+    client = replicated_app.test_client()
+    headers = {'Authorization': f'Token {nurse.api_token}'}  # the user exists on the primary only
+
+    res = client.get('/patients/', headers=headers)
+    assert res.status_code == 200
+    assert [p['name'] for p in res.get_json()] == ['Replica copy']
+    assert client.get('/analytics/dashboard/summary', headers=headers).get_json()['total_patients'] == 1
+
+    res = client.patch('/patients/1', json={'ward': 'ICU'}, headers=headers)
+    assert res.status_code == 200 and res.get_json()['name'] == 'On primary'
+    with replicated_app.extensions['replica_engines'][0].connect() as conn:
+        assert conn.execute(text('SELECT ward FROM patients')).scalar() is None
+    assert db.session.info.get('read_replica') is None
+
+
+def test_engine_options_and_sqlite_pragmas(replicated_app):
+    assert engine_options(replicated_app.config, 'sqlite:///x.db') == {}
+    opts = engine_options(replicated_app.config, 'mysql+pymysql://u:p@db/carewatch')
+    assert opts['pool_size'] == replicated_app.config['SQLALCHEMY_POOL_SIZE'] and opts['pool_pre_ping'] is True
+
+    with db.engine.connect() as conn:
+        assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+
+
+def test_risk_refresh_reads_the_primary(replicated_app):
+    from datetime import datetime, timedelta, timezone
+    from app.models import Alert, PatientRisk
+    from app.utils.dates import as_utc
+
+    nurse = User(name='Nurse', role='nurse', api_token=secrets.token_urlsafe(16))
+    patient = Patient(name='On primary')
+    db.session.add_all([nurse, patient])
+    db.session.flush()
+    db.session.add(Alert(patient_id=patient.id, severity='critical', message='SpO2 85%'))
+    # a stale row on the primary that has not reached the replica yet
+    db.session.add(PatientRisk(patient_id=patient.id, score=0, stale_at=datetime.now(timezone.utc) - timedelta(minutes=1)))
+    db.session.commit()
+    with replicated_app.extensions['replica_engines'][0].begin() as conn:
+        conn.execute(text("INSERT INTO patients (id, name) VALUES (1, 'Replica copy')"))
+
+    client = replicated_app.test_client()
+    headers = {'Authorization': f'Token {nurse.api_token}'}
+    res = client.get('/analytics/dashboard/summary', headers=headers)
+    assert res.status_code == 200
+    assert res.get_json()['patients_at_risk_details'] == [{'patient_id': 1, 'name': 'On primary', 'risk_score': 10}]
+    assert client.get('/analytics/patients/1/risk', headers=headers).get_json()['risk_score'] == 10
+    db.session.expire_all()
+    risk = db.session.get(PatientRisk, 1)
+    assert risk.score == 10 and as_utc(risk.stale_at) > datetime.now(timezone.utc)  # recomputed, not stale
+
+
+def test_etag_comes_from_the_replica_that_served_the_body(replicated_app):
+    replicated_app.config['ETAG_VERSION_CACHE_MS'] = 0
+    nurse = User(name='Nurse', role='nurse', api_token=secrets.token_urlsafe(16))
+    db.session.add_all([nurse, Patient(name='On primary')])
+    db.session.commit()  # bumps 'patients' on the primary only
+    replica = replicated_app.extensions['replica_engines'][0]
+
+    client = replicated_app.test_client()
+    headers = {'Authorization': f'Token {nurse.api_token}'}
+    first = client.get('/patients/', headers=headers)
+    assert first.get_json() == []
+
+    with replica.begin() as conn:  # replication catches up
+        conn.execute(text("INSERT INTO patients (id, name) VALUES (1, 'On primary')"))
+        conn.execute(text("INSERT INTO data_versions (name, version, updated_at) VALUES ('patients', 1, '2026-01-01')"))
+    res = client.get('/patients/', headers={**headers, 'If-None-Match': first.headers['ETag']})
+    assert res.status_code == 200 and [p['name'] for p in res.get_json()] == ['On primary']
@@ -0,0 +1,116 @@
+from sqlalchemy import event, update
+
+from app import db
+from app.models import DataVersion, Note, PatientRisk
+
+
+def _get(client, url, headers, etag=None):
+    if etag:
+        headers = {**headers, 'If-None-Match': etag}
+    return client.get(url, headers=headers)
+
+
+def test_unchanged_lists_answer_304_without_running_the_view(client, demo_user_and_patient):
+    headers = {'Authorization': f"Token {demo_user_and_patient['nurse'].api_token}"}
+    for url in ['/patients/', '/alerts/', f"/patients/{demo_user_and_patient['patient'].id}",
+                '/analytics/dashboard/summary']:
+        _get(client, url, headers)  # the first dashboard read also fills patient_risk
+        first = _get(client, url, headers)
+        assert first.status_code == 200 and first.headers['ETag']
+        assert first.headers['Cache-Control'] == 'private, no-cache'
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            again = _get(client, url, headers, first.headers['ETag'])
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert again.status_code == 304 and again.data == b''
+        assert again.headers['ETag'] == first.headers['ETag']
+        assert not [s for s in statements if 'patients' in s or 'alerts' in s], statements
+
+
+def test_writes_change_the_etag(client, demo_user_and_patient):
+    nurse = demo_user_and_patient['nurse']
+    pid = demo_user_and_patient['patient'].id
+    headers = {'Authorization': f'Token {nurse.api_token}'}
+    detail, patients = _get(client, f'/patients/{pid}', headers), _get(client, '/patients/', headers)
+
+    db.session.add(Note(patient_id=pid, user_id=nurse.id, content='turned'))
+    db.session.commit()
+    assert _get(client, f'/patients/{pid}', headers, detail.headers['ETag']).status_code == 200
+    assert _get(client, '/patients/', headers, patients.headers['ETag']).status_code == 304  # notes are not listed
+
+    before = db.session.get(DataVersion, f'patient:{pid}').version
+    res = client.post(f'/patients/{pid}/vitals', json={'heart_rate': 80, 'temperature': 37.0, 'spo2': 98},
+                      headers=headers)
+    assert res.status_code == 201
+    db.session.expire_all()
+    assert db.session.get(DataVersion, f'patient:{pid}').version == before + 1
+    assert db.session.get(DataVersion, 'vitals') is None  # no table-wide counter: every ingest would contend on it
+
+    client.patch(f'/patients/{pid}', json={'ward': 'ICU'}, headers=headers)
+    assert _get(client, '/patients/', headers, patients.headers['ETag']).status_code == 200
+
+
+def test_bulk_updates_invalidate_every_patient(client, demo_user_and_patient):
+    headers = {'Authorization': f"Token {demo_user_and_patient['nurse'].api_token}"}
+    url = f"/patients/{demo_user_and_patient['patient'].id}"
+    etag = _get(client, url, headers).headers['ETag']
+
+    db.session.execute(update(PatientRisk).values(stale_at=None))
+    db.session.commit()
+    assert db.session.get(DataVersion, 'patient:*').version == 1
+    assert _get(client, url, headers, etag).status_code == 200
+
+
+def test_trend_etag_follows_the_window(client, demo_user_and_patient):
+    headers = {'Authorization': f"Token {demo_user_and_patient['nurse'].api_token}"}
+    url = f"/analytics/patients/{demo_user_and_patient['patient'].id}/trends/heart_rate?hours=2&interval=15"
+    etag = _get(client, url, headers).headers['ETag']
+    assert _get(client, url, headers, etag).status_code == 304
+    assert _get(client, url.replace('hours=2', 'hours=3'), headers, etag).status_code == 200
+
+    bad = _get(client, url.replace('hours=2', 'hours=x'), headers)
+    assert bad.status_code == 400 and 'ETag' not in bad.headers
+
+
+def test_normal_vitals_leave_the_dashboard_etag_alone(client, demo_user_and_patient):
+    headers = {'Authorization': f"Token {demo_user_and_patient['nurse'].api_token}"}
+    pid = demo_user_and_patient['patient'].id
+    _get(client, '/analytics/dashboard/summary', headers)  # fills patient_risk
+    etag = _get(client, '/analytics/dashboard/summary', headers).headers['ETag']
+    risk = db.session.get(DataVersion, 'risk').version
+
+    for _ in range(3):
+        res = client.post(f'/patients/{pid}/vitals', json={'heart_rate': 80, 'temperature': 37.0, 'spo2': 98},
+                          headers=headers)
+        assert res.status_code == 201
+    db.session.expire_all()
+    assert db.session.get(DataVersion, 'risk').version == risk
+    assert _get(client, '/analytics/dashboard/summary', headers, etag).status_code == 304
+
+
+def test_role_check_runs_before_the_etag(client, demo_user_and_patient):
+    doctor = {'Authorization': f"Token {demo_user_and_patient['doctor'].api_token}"}
+    nurse = {'Authorization': f"Token {demo_user_and_patient['nurse'].api_token}"}
+    etag = _get(client, '/alerts/?escalated=true', doctor).headers['ETag']
+    assert _get(client, '/alerts/?escalated=true', doctor, etag).status_code == 304
+    assert _get(client, '/alerts/?escalated=true', nurse, etag).status_code == 403
+
+
+def test_ingest_without_executemany_returning_bumps_only_its_patient(client, demo_user_and_patient, monkeypatch):
+    # MySQL has no INSERT ... RETURNING, so bulk_insert() runs one INSERT per row
+    monkeypatch.setattr(db.engine.dialect, 'insert_executemany_returning_sort_by_parameter_order', False)
+    headers = {'Authorization': f"Token {demo_user_and_patient['nurse'].api_token}"}
+    pid = demo_user_and_patient['patient'].id
+    before = dict(db.session.query(DataVersion.name, DataVersion.version))
+
+    res = client.post(f'/patients/{pid}/vitals', json={'heart_rate': 150, 'temperature': 37.0, 'spo2': 98},
+                      headers=headers)
+    assert res.status_code == 201
+    db.session.expire_all()
+    after = dict(db.session.query(DataVersion.name, DataVersion.version))
+    changed = {n for n, v in after.items() if before.get(n) != v}
+    assert changed == {f'patient:{pid}', 'alerts', 'risk'}
@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+from app import db
+from app.models import Alert, Patient, PatientVital
+
+BASE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _seed(pid, other):
+    for day in range(10):
+        for p in (pid, other):
+            db.session.add(PatientVital(patient_id=p, heart_rate=70 + day, temperature=36.6, spo2=97,
+                                        timestamp=BASE + timedelta(days=day)))
+            db.session.add(Alert(patient_id=p, severity='warning', message=f'day, "{day}"',
+                                 created_at=BASE + timedelta(days=day)))
+    db.session.commit()
+
+
+def test_export_vitals_ndjson_range_and_patients(client, app_instance, demo_user_and_patient):
+    doctor = demo_user_and_patient['doctor']
+    pid = demo_user_and_patient['patient'].id
+    other = Patient(name='Other')
+    db.session.add(other)
+    db.session.commit()
+    _seed(pid, other.id)
+    app_instance.config['EXPORT_BATCH_SIZE'] = 3
+    headers = {'Authorization': f'Token {doctor.api_token}'}
+
+    res = client.get('/exports/vitals', headers=headers,
+                     query_string={'start': '2025-01-03', 'end': '2025-01-08', 'patient_id': str(pid)})
+    assert res.status_code == 200
+    assert res.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in res.data.decode().splitlines()]
+    assert [r['heart_rate'] for r in rows] == [72, 73, 74, 75, 76]
+    assert {r['patient_id'] for r in rows} == {pid}
+    assert rows[0]['timestamp'] == '2025-01-03T00:00:00+00:00'
+
+    res = client.get(f'/exports/vitals?patient_id={pid},{other.id}', headers=headers)
+    assert len(res.data.decode().splitlines()) == 20
+
+
+def test_export_alerts_csv(client, app_instance, demo_user_and_patient):
+    doctor = demo_user_and_patient['doctor']
+    pid = demo_user_and_patient['patient'].id
+    _seed(pid, pid)
+    app_instance.config['EXPORT_BATCH_SIZE'] = 4
+
+    res = client.get('/exports/alerts?format=csv', headers={'Authorization': f'Token {doctor.api_token}'})
+    assert res.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(res.data.decode())))
+    assert len(rows) == 20
+    assert rows[0]['message'] == 'day, "0"'
+    assert [int(r['id']) for r in rows] == sorted(int(r['id']) for r in rows)
+
+
+def test_export_rejects_bad_params_and_nurses(client, demo_user_and_patient):
+    doctor, nurse = demo_user_and_patient['doctor'], demo_user_and_patient['nurse']
+    headers = {'Authorization': f'Token {doctor.api_token}'}
+    assert client.get('/exports/vitals?format=xml', headers=headers).status_code == 400
+    assert client.get('/exports/vitals?start=yesterday', headers=headers).status_code == 400
+    assert client.get('/exports/vitals?patient_id=x', headers=headers).status_code == 400
+    assert client.get('/exports/vitals', headers={'Authorization': f'Token {nurse.api_token}'}).status_code == 403
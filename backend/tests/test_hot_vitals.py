@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, update
+
+from app import db
+from app.models import Alert, DataVersion, PatientVital
+from app.utils.hot_vitals import get_hot_vitals
+
+
+def _seed(pid, n):
+    t0 = datetime.now(timezone.utc) - timedelta(hours=1)
+    for i in range(n):
+        db.session.add(PatientVital(patient_id=pid, heart_rate=70 + i, temperature=37.0, spo2=97,
+                                    timestamp=t0 + timedelta(minutes=i)))
+    db.session.add(Alert(patient_id=pid, severity='warning', message='HR high', created_at=t0))
+    db.session.commit()
+
+
+def _uncached(client, url, headers):
+    """The same response with the cache switched off."""
+    hot = client.application.extensions.pop('hot_vitals')
+    client.application.config['HOT_VITALS_PER_PATIENT'] = 0
+    try:
+        return client.get(url, headers=headers)
+    finally:
+        client.application.extensions['hot_vitals'] = hot
+        client.application.config['HOT_VITALS_PER_PATIENT'] = hot.per_patient
+
+
+def test_ingest_writes_through_and_responses_match_the_db(client, demo_user_and_patient):
+    pid = demo_user_and_patient['patient'].id
+    headers = {'Authorization': f"Token {demo_user_and_patient['nurse'].api_token}"}
+    _seed(pid, 8)
+    hot = get_hot_vitals()
+
+    client.get(f'/patients/{pid}', headers=headers)
+    assert (hot.misses, hot.hits) == (1, 0)
+    res = client.post(f'/patients/{pid}/vitals', json={'heart_rate': 150, 'temperature': 37.0, 'spo2': 98},
+                      headers=headers)
+    assert res.status_code == 201 and hot.write_through == 1
+
+    for url in [f'/patients/{pid}', f'/patients/{pid}/vitals?limit=5', f'/patients/{pid}/vitals']:
+        cached = client.get(url, headers=headers)
+        plain = _uncached(client, url, headers)
+        assert cached.get_json() == plain.get_json(), url
+        assert cached.headers.get('X-Next-Cursor') == plain.headers.get('X-Next-Cursor'), url
+    assert hot.misses == 1 and hot.hits == 2  # the default page is larger than per_patient: read from the DB
+    detail = client.get(f'/patients/{pid}', headers=headers).get_json()
+    assert detail['vitals'][0]['heart_rate'] == 150 and len(detail['alerts']) == 2
+
+    metrics = client.get('/metrics', headers={'Authorization': f"Token {demo_user_and_patient['doctor'].api_token}"})
+    assert metrics.get_json()['hot_vitals']['write_through'] == 1
+
+
+def test_writes_from_another_process_invalidate_the_entry(client, demo_user_and_patient):
+    pid = demo_user_and_patient['patient'].id
+    client.application.config['ETAG_VERSION_CACHE_MS'] = 0
+    _seed(pid, 3)
+    hot = get_hot_vitals()
+    assert len(hot.get(pid)[0]) == 3
+
+    # another worker inserts a vital and bumps the patient's counter; nothing in this process sees it happen
+    with db.engine.begin() as conn:
+        conn.execute(insert(PatientVital).values(patient_id=pid, heart_rate=120, spo2=90,
+                                                 timestamp=datetime.now(timezone.utc)))
+        conn.execute(update(DataVersion).where(DataVersion.name == f'patient:{pid}')
+                     .values(version=DataVersion.version + 1))
+    vitals, _, complete = hot.get(pid)
+    assert [v['heart_rate'] for v in vitals][:2] == [120, 72] and complete
+    assert hot.misses == 2
+
+
+def test_uncommitted_writes_bypass_the_cache(client, demo_user_and_patient):
+    pid = demo_user_and_patient['patient'].id
+    _seed(pid, 2)
+    hot = get_hot_vitals()
+    hot.get(pid)
+    db.session.add(PatientVital(patient_id=pid, heart_rate=99, spo2=95, timestamp=datetime.now(timezone.utc)))
+    db.session.flush()
+    assert hot.get(pid) is None and hot.bypassed == 1
+    db.session.rollback()
+    assert len(hot.get(pid)[0]) == 2
+
+
+def test_memory_is_bounded(client, demo_user_and_patient):
+    from app.models import Patient
+    others = [Patient(name=f'P{i}') for i in range(3)]
+    db.session.add_all(others)
+    db.session.commit()
+    for p in others:
+        _seed(p.id, 6)
+    hot = get_hot_vitals()
+    hot.per_patient, hot.max_patients = 4, 2
+
+    assert hot.warm() == 2  # the most recently active ones
+    vitals, _, complete = hot.get(others[0].id)
+    assert len(vitals) == 4 and not complete
+    assert hot.stats()['patients'] == 2 and hot.evictions == 1
+
+
+def test_write_through_without_executemany_returning(client, demo_user_and_patient, monkeypatch):
+    # MySQL: bulk_insert() runs one INSERT per row; the entry must still be updated in place
+    monkeypatch.setattr(db.engine.dialect, 'insert_executemany_returning_sort_by_parameter_order', False)
+    pid = demo_user_and_patient['patient'].id
+    headers = {'Authorization': f"Token {demo_user_and_patient['nurse'].api_token}"}
+    _seed(pid, 3)
+    hot = get_hot_vitals()
+    client.get(f'/patients/{pid}', headers=headers)
+
+    res = client.post(f'/patients/{pid}/vitals', json={'heart_rate': 150, 'temperature': 37.0, 'spo2': 98},
+                      headers=headers)
+    assert res.status_code == 201 and hot.write_through == 1
+    assert client.get(f'/patients/{pid}', headers=headers).get_json()['vitals'][0]['heart_rate'] == 150
+    assert (hot.misses, hot.hits) == (1, 1)
@@ -0,0 +1,71 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import db
+from app.utils.identity_cache import get_identity_cache
+
+
+@contextmanager
+def _user_selects():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if 'FROM users' in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def test_token_auth_is_served_from_cache(client, demo_user_and_patient):
+    nurse = demo_user_and_patient['nurse']
+    headers = {'Authorization': f'Token {nurse.api_token}'}
+
+    assert client.get('/patients/', headers=headers).status_code == 200
+    with _user_selects() as selects:
+        for _ in range(3):
+            assert client.get('/patients/', headers=headers).status_code == 200
+    assert selects == []
+
+    stats = get_identity_cache().stats()
+    assert stats['hits'] >= 3 and stats['misses'] >= 1
+
+    # X-User-Id shares the id entry cached by the token lookup
+    with _user_selects() as selects:
+        res = client.get('/users/me', headers={'X-User-Id': str(nurse.id)})
+    assert res.get_json()['name'] == 'Test Nurse'
+    assert selects == []
+
+
+def test_user_changes_invalidate_the_cache(client, demo_user_and_patient):
+    nurse = demo_user_and_patient['nurse']
+    pid = demo_user_and_patient['patient'].id
+    headers = {'Authorization': f'Token {nurse.api_token}'}
+    assert client.get(f'/patients/{pid}/vitals', headers=headers).status_code == 200
+
+    nurse.role = 'visitor'
+    db.session.commit()
+    assert client.get(f'/patients/{pid}/vitals', headers=headers).status_code == 403
+    assert get_identity_cache().stats()['invalidations'] >= 1
+
+    old_token, nurse.api_token = nurse.api_token, 'rotated-token'
+    nurse.role = 'nurse'
+    db.session.commit()
+    assert client.get(f'/patients/{pid}/vitals', headers=headers).status_code == 401
+    res = client.get(f'/patients/{pid}/vitals', headers={'Authorization': 'Token rotated-token'})
+    assert res.status_code == 200 and old_token != 'rotated-token'
+
+    db.session.delete(nurse)
+    db.session.commit()
+    assert client.get('/users/me', headers={'Authorization': 'Token rotated-token'}).status_code == 401
+
+
+def test_metrics_expose_cache_counters(client, demo_user_and_patient):
+    doctor = demo_user_and_patient['doctor']
+    res = client.get('/metrics', headers={'Authorization': f'Token {doctor.api_token}'})
+    assert res.status_code == 200
+    assert set(res.get_json()['identity_cache']) >= {'hits', 'misses', 'invalidations', 'size'}
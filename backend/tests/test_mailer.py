@@ -0,0 +1,123 @@
+import socket
+
+import pytest
+
+from app import db
+from app.models import Alert, NotificationDeadLetter, OutboxEvent
+from app.utils.mailer import get_notifier, send_escalation_email
+from app.utils.outbox import dispatch_outbox
+
+controller_mod = pytest.importorskip('aiosmtpd.controller')
+
+
+class _Handler:
+    def __init__(self):
+        self.messages = []
+        self.reject = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.reject:
+            return '550 mailbox unavailable'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode('utf-8', 'replace')))
+        return '250 OK'
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(app_instance):
+    handler = _Handler()
+    controller = controller_mod.Controller(handler, hostname='127.0.0.1', port=_free_port())
+    controller.start()
+    app_instance.config.update({
+        'SMTP_SERVER': '127.0.0.1', 'SMTP_PORT': controller.port, 'SMTP_STARTTLS': False,
+        'ALERT_EMAIL_RECIPIENTS': ['a@example.com', 'b@example.com'],
+    })
+    yield handler
+    get_notifier(app_instance).close()
+    controller.stop()
+
+
+def _alert(i):
+    return {'id': i, 'patient_id': 100 + i, 'severity': 'critical', 'message': f'alert {i}'}
+
+
+def test_batch_is_sent_as_one_digest_per_recipient(app_instance, smtp_server):
+    notifier = get_notifier(app_instance)
+    assert notifier.send_now([_alert(i) for i in range(5)])
+
+    assert sorted(rcpt for rcpts, _ in smtp_server.messages for rcpt in rcpts) == ['a@example.com', 'b@example.com']
+    assert all('5 Escalated Alerts' in body and 'alert 4' in body for _, body in smtp_server.messages)
+
+    assert send_escalation_email(app_instance, _alert(9))
+    assert len(smtp_server.messages) == 4
+    assert notifier.stats()['smtp_connects'] == 1  # connection reused between batches
+
+
+def test_escalation_endpoint_sends_email(client, demo_user_and_patient, smtp_server):
+    pid = demo_user_and_patient['patient'].id
+    alert = Alert(patient_id=pid, severity='critical', message='Temperature 39.1°C')
+    db.session.add(alert)
+    db.session.commit()
+
+    res = client.post(f'/alerts/{alert.id}/escalate', json={},
+                      headers={'Authorization': f"Token {demo_user_and_patient['nurse'].api_token}"})
+    assert res.status_code == 200
+    assert dispatch_outbox() == 1
+    assert len(smtp_server.messages) == 2
+    assert 'Temperature 39.1' in smtp_server.messages[0][1]
+
+
+def test_escalations_stay_in_the_outbox_until_sent(client, demo_user_and_patient, smtp_server, monkeypatch):
+    pid = demo_user_and_patient['patient'].id
+    headers = {'Authorization': f"Token {demo_user_and_patient['nurse'].api_token}"}
+    alerts = [Alert(patient_id=pid, severity='critical', message=f'alert {i}') for i in range(3)]
+    db.session.add_all(alerts)
+    db.session.commit()
+    for alert in alerts:
+        client.post(f'/alerts/{alert.id}/escalate', json={}, headers=headers)
+
+    def smtp_down(msg):
+        raise OSError('connection refused')
+
+    notifier = get_notifier()
+    monkeypatch.setattr(notifier.smtp, 'send', smtp_down)
+    assert dispatch_outbox() == 3
+    assert smtp_server.messages == [] and [e.attempts for e in OutboxEvent.query.all()] == [1, 1, 1]
+
+    monkeypatch.undo()
+    OutboxEvent.query.update({'next_attempt_at': None})
+    db.session.commit()
+    assert dispatch_outbox() == 3 and OutboxEvent.query.count() == 0
+    assert len(smtp_server.messages) == 2 and all('3 Escalated Alerts' in body for _, body in smtp_server.messages)
+
+
+def test_undeliverable_emails_are_dead_lettered(app_instance, smtp_server):
+    smtp_server.reject.add('b@example.com')
+    assert send_escalation_email(app_instance, _alert(1))
+
+    assert [rcpts for rcpts, _ in smtp_server.messages] == [['a@example.com']]
+    (dead,) = NotificationDeadLetter.query.all()
+    assert dead.recipient == 'b@example.com' and dead.attempts == 1 and dead.alert_ids == '1'
+
+
+def test_transient_failures_are_left_to_the_outbox(app_instance):
+    app_instance.config.update({
+        'SMTP_SERVER': '127.0.0.1', 'SMTP_PORT': _free_port(), 'SMTP_STARTTLS': False,
+        'ALERT_EMAIL_RECIPIENTS': ['a@example.com'],
+    })
+    notifier = get_notifier(app_instance)
+    with pytest.raises(OSError):
+        notifier.send_now([_alert(1)])
+    assert not send_escalation_email(app_instance, _alert(1))
+
+    assert notifier.stats()['retries'] == 2  # one reconnect per call
+    assert NotificationDeadLetter.query.count() == 0
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import db
+from app.models import OutboxEvent
+from app.utils import outbox
+from app.utils.outbox import ALERT_CREATED, ALERT_ESCALATED, claim_batch, dispatch_outbox, get_dispatch_stats
+
+
+@pytest.fixture
+def handled(monkeypatch):
+    seen = []
+    monkeypatch.setattr(outbox, '_handlers', {
+        ALERT_CREATED: [lambda p: seen.append((ALERT_CREATED, p['id']))],
+        ALERT_ESCALATED: [lambda p: seen.append((ALERT_ESCALATED, p['id']))],
+    })
+    monkeypatch.setattr(outbox, '_batch_handlers', {})
+    return seen
+
+
+def _headers(demo):
+    return {'Authorization': f"Token {demo['nurse'].api_token}"}
+
+
+def test_alerts_and_escalations_are_written_with_their_commit(client, demo_user_and_patient, handled):
+    pid = demo_user_and_patient['patient'].id
+    res = client.post(f'/patients/{pid}/vitals', json={'temperature': 37.0, 'spo2': 97, 'heart_rate': 105},
+                      headers=_headers(demo_user_and_patient))
+    assert res.get_json()['alerts_created'] and OutboxEvent.query.count() == 0  # not escalated: no side-effect
+
+    res = client.post(f'/patients/{pid}/vitals', json={'temperature': 39.0, 'spo2': 97, 'heart_rate': 80},
+                      headers=_headers(demo_user_and_patient))
+    (alert,) = res.get_json()['alerts_created']
+    assert alert['escalated']
+    assert [e.event_type for e in OutboxEvent.query.all()] == [ALERT_CREATED]
+
+    assert dispatch_outbox() == 1
+    assert handled == [(ALERT_CREATED, alert['id'])] and OutboxEvent.query.count() == 0
+
+    # a rolled-back request leaves no event behind
+    outbox.add_event(ALERT_ESCALATED, {'id': alert['id']})
+    db.session.rollback()
+    assert OutboxEvent.query.count() == 0
+
+    stats = get_dispatch_stats().as_dict()
+    assert stats['dispatched'] == 1 and stats['batches'] == 1
+
+
+def test_claims_are_exclusive_until_they_expire(app_instance, handled):
+    outbox.add_events(ALERT_CREATED, [{'id': i} for i in range(5)])
+    db.session.commit()
+
+    first = [e.id for e in claim_batch(3)]
+    second = [e.id for e in claim_batch(3)]
+    assert len(first) == 3 and len(second) == 2 and not set(first) & set(second)
+    assert claim_batch(3) == []
+
+    # a dispatcher that died mid-batch: its claim is taken over after the timeout
+    stale = datetime.now(timezone.utc) - timedelta(seconds=app_instance.config['OUTBOX_CLAIM_TIMEOUT_SECONDS'] + 1)
+    db.session.query(OutboxEvent).filter(OutboxEvent.id.in_(first)).update(
+        {'claimed_at': stale}, synchronize_session=False)
+    db.session.commit()
+    assert sorted(e.id for e in claim_batch(10)) == sorted(first)
+
+
+def test_failing_events_are_retried_then_parked(app_instance, monkeypatch):
+    calls = []
+
+    def flaky(payload):
+        calls.append(payload['id'])
+        if payload['id'] == 1:
+            raise RuntimeError('smtp down')
+
+    monkeypatch.setattr(outbox, '_handlers', {ALERT_ESCALATED: [flaky]})
+    monkeypatch.setattr(outbox, '_batch_handlers', {})
+    app_instance.config['OUTBOX_MAX_ATTEMPTS'] = 2
+    outbox.add_events(ALERT_ESCALATED, [{'id': 1}, {'id': 2}])
+    db.session.commit()
+
+    assert dispatch_outbox() == 2  # the failed event waits out its backoff instead of being claimed again
+    (failed,) = OutboxEvent.query.all()
+    assert failed.attempts == 1 and 'smtp down' in failed.last_error and failed.claimed_by is None
+    assert failed.next_attempt_at is not None and calls == [1, 2]
+    assert dispatch_outbox() == 0
+
+    failed.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db.session.commit()
+    assert dispatch_outbox() == 1 and calls == [1, 2, 1]
+    parked = OutboxEvent.query.one()
+    assert parked.attempts == 2
+    parked.next_attempt_at = None
+    db.session.commit()
+    assert dispatch_outbox() == 0
+    assert outbox.pending_count() == 0
@@ -0,0 +1,54 @@
+from app import db
+from app.models import Patient
+from app.utils.simulator import evaluate_readings
+
+
+def _collect(client, url, headers):
+    pages, seen = 0, []
+    while url:
+        res = client.get(url, headers=headers)
+        assert res.status_code == 200
+        seen.extend(item['id'] for item in res.get_json())
+        pages += 1
+        cursor = res.headers.get('X-Next-Cursor')
+        url = f"{url.split('&cursor=')[0]}&cursor={cursor}" if cursor else None
+    return pages, seen
+
+
+def test_alerts_and_vitals_are_paged_by_cursor(client, demo_user_and_patient):
+    nurse = demo_user_and_patient['nurse']
+    pid = demo_user_and_patient['patient'].id
+    headers = {'Authorization': f'Token {nurse.api_token}'}
+
+    # one batch, so every row shares the same timestamp and only the id breaks ties
+    evaluate_readings([{'patient_id': pid, 'heart_rate': 130} for _ in range(25)])
+
+    pages, ids = _collect(client, '/alerts/?limit=10', headers)
+    assert pages == 3
+    assert len(ids) == 25 and len(set(ids)) == 25
+    assert ids == sorted(ids, reverse=True)
+
+    pages, ids = _collect(client, f'/patients/vitals?patient_id={pid}&limit=7', headers)
+    assert pages == 4 and len(set(ids)) == 25
+
+    res = client.get(f'/patients/{pid}/vitals?limit=25', headers=headers)
+    assert len(res.get_json()) == 25
+    assert 'X-Next-Cursor' not in res.headers
+
+    res = client.get('/alerts/?cursor=not-a-cursor', headers=headers)
+    assert res.status_code == 400
+
+
+def test_patients_are_paged_by_id(client, demo_user_and_patient):
+    nurse = demo_user_and_patient['nurse']
+    db.session.add_all([Patient(name=f'P{i}') for i in range(4)])
+    db.session.commit()
+
+    pages, ids = _collect(client, '/patients/?limit=2', {'Authorization': f'Token {nurse.api_token}'})
+    assert pages == 3
+    assert ids == sorted(ids) and len(ids) == 5
+
+    # without limit/cursor the whole list comes back, however small PAGE_MAX_LIMIT is
+    client.application.config['PAGE_MAX_LIMIT'] = 2
+    res = client.get('/patients/', headers={'Authorization': f'Token {nurse.api_token}'})
+    assert [p['id'] for p in res.get_json()] == ids and 'X-Next-Cursor' not in res.headers
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from app import db
+from app.models import User
+from app.utils.passwords import PasswordPool, PoolSaturated, get_password_pool, hash_password, hash_rounds
+
+
+@pytest.fixture
+def fast_bcrypt(app_instance):
+    app_instance.config['BCRYPT_ROUNDS'] = 4
+    app_instance.extensions.pop('password_pool', None)
+    return app_instance
+
+
+def test_register_and_login_use_the_pool(client, fast_bcrypt):
+    res = client.post('/auth/register', json={'name': 'N', 'email': 'n@example.com', 'password': 'pw'})
+    assert res.status_code == 201
+    assert hash_rounds(User.query.filter_by(email='n@example.com').one().password_hash) == 4
+
+    assert client.post('/auth/login', json={'email': 'n@example.com', 'password': 'nope'}).status_code == 401
+    assert client.post('/auth/login', json={'email': 'n@example.com', 'password': 'pw'}).status_code == 200
+    assert get_password_pool().stats()['completed'] == 3
+
+
+def test_login_rehashes_when_cost_changes(client, fast_bcrypt):
+    user = User(name='N', role='nurse', email='n@example.com', password_hash=hash_password('pw', rounds=5))
+    db.session.add(user)
+    db.session.commit()
+
+    assert client.post('/auth/login', json={'email': 'n@example.com', 'password': 'pw'}).status_code == 200
+    db.session.expire_all()
+    assert hash_rounds(db.session.get(User, user.id).password_hash) == 4
+    assert get_password_pool().stats()['rehashed'] == 1
+
+    assert client.post('/auth/login', json={'email': 'n@example.com', 'password': 'pw'}).status_code == 200
+    assert get_password_pool().stats()['rehashed'] == 1
+
+
+def test_saturated_pool_rejects_fast(client, fast_bcrypt):
+    db.session.add(User(name='N', role='nurse', email='n@example.com', password_hash=hash_password('pw', rounds=4)))
+    db.session.commit()
+
+    pool = PasswordPool(workers=1, queue_size=0, rounds=4)
+    fast_bcrypt.extensions['password_pool'] = pool
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    t = threading.Thread(target=pool.submit, args=(block,))
+    t.start()
+    started.wait(5)
+    try:
+        with pytest.raises(PoolSaturated):
+            pool.hash('pw')
+        res = client.post('/auth/login', json={'email': 'n@example.com', 'password': 'pw'})
+        assert res.status_code == 503 and res.headers['Retry-After'] == '1'
+    finally:
+        release.set()
+        t.join()
+
+    assert client.post('/auth/login', json={'email': 'n@example.com', 'password': 'pw'}).status_code == 200
+    assert pool.stats()['rejected'] == 2
@@ -0,0 +1,76 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import db
+from app.models import Alert, Note
+
+
+@contextmanager
+def _count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _add_activity(patient_id, nurse, doctor, n):
+    for i in range(n):
+        db.session.add(Alert(patient_id=patient_id, severity='critical', message=f'a{i}',
+                             escalated=True, escalated_by=nurse.id,
+                             reviewed=True, reviewed_by=doctor.id))
+        db.session.add(Note(patient_id=patient_id, user_id=(nurse if i % 2 else doctor).id, content=f'n{i}'))
+    db.session.commit()
+    db.session.expire_all()
+
+
+def test_patient_detail_query_count_is_constant(client, demo_user_and_patient):
+    nurse, doctor = demo_user_and_patient['nurse'], demo_user_and_patient['doctor']
+    pid = demo_user_and_patient['patient'].id
+    headers = {'Authorization': f'Token {nurse.api_token}'}
+
+    client.get(f'/patients/{pid}', headers=headers)  # warm the identity cache
+    _add_activity(pid, nurse, doctor, 3)
+    with _count_queries() as few:
+        res = client.get(f'/patients/{pid}', headers=headers)
+    assert res.status_code == 200
+
+    _add_activity(pid, nurse, doctor, 40)
+    with _count_queries() as many:
+        res = client.get(f'/patients/{pid}', headers=headers)
+    assert res.status_code == 200
+    assert len(many) == len(few)
+
+    data = res.get_json()
+    assert len(data['alerts']) == 43
+    assert all(a['escalated_by_name'] == 'Test Nurse' and a['reviewed_by_name'] == 'Test Doctor'
+               for a in data['alerts'])
+    assert len(data['notes']) == 20
+    assert {n['user_name'] for n in data['notes']} == {'Test Nurse', 'Test Doctor'}
+
+
+def test_patient_detail_notes_continue_on_notes_endpoint(client, demo_user_and_patient):
+    nurse, doctor = demo_user_and_patient['nurse'], demo_user_and_patient['doctor']
+    pid = demo_user_and_patient['patient'].id
+    headers = {'Authorization': f'Token {nurse.api_token}'}
+    _add_activity(pid, nurse, doctor, 7)
+
+    data = client.get(f'/patients/{pid}?notes_limit=5', headers=headers).get_json()
+    assert len(data['notes']) == 5
+    assert data['notes_next_cursor']
+
+    res = client.get(f"/patients/{pid}/notes/?cursor={data['notes_next_cursor']}", headers=headers)
+    rest = res.get_json()
+    assert len(rest) == 2
+    ids = [n['id'] for n in data['notes'] + rest]
+    assert len(set(ids)) == 7
+
+    data = client.get(f'/patients/{pid}?notes_limit=10', headers=headers).get_json()
+    assert len(data['notes']) == 7 and data['notes_next_cursor'] is None
+    assert client.get(f'/patients/{pid}?notes_limit=0', headers=headers).status_code == 400
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+from app import db
+from app.models import Alert, PatientRisk
+from app.utils.simulator import evaluate_readings
+
+
+def test_risk_is_materialized_on_ingest_and_alert_close(client, demo_user_and_patient):
+    nurse = demo_user_and_patient['nurse']
+    pid = demo_user_and_patient['patient'].id
+    headers = {'Authorization': f'Token {nurse.api_token}'}
+
+    evaluate_readings([{'patient_id': pid, 'heart_rate': 75, 'temperature': 38.5, 'spo2': 97}])
+    assert db.session.get(PatientRisk, pid).score == 17  # critical alert (10) + temperature (7)
+
+    res = client.get('/analytics/dashboard/summary', headers=headers)
+    assert res.status_code == 200
+    data = res.get_json()
+    assert data['patients_at_risk_count'] == 1
+    assert data['patients_at_risk_details'][0] == {'patient_id': pid, 'name': 'Test Patient', 'risk_score': 17}
+
+    alert = Alert.query.one()
+    client.post(f'/alerts/{alert.id}/review', headers=headers)
+    client.post(f'/alerts/{alert.id}/close', headers=headers)
+    db.session.expire_all()
+    assert db.session.get(PatientRisk, pid).score == 7
+
+    res = client.get(f'/analytics/patients/{pid}/risk', headers=headers)
+    assert res.get_json()['risk_score'] == 7
+
+
+def test_stale_scores_are_recomputed_when_alerts_age_out(client, demo_user_and_patient):
+    nurse = demo_user_and_patient['nurse']
+    pid = demo_user_and_patient['patient'].id
+
+    evaluate_readings([{'patient_id': pid, 'heart_rate': 105, 'temperature': 37.0, 'spo2': 97}])
+    risk = db.session.get(PatientRisk, pid)
+    assert risk.score == 7  # warning alert (5) + heart rate (2)
+    assert risk.stale_at is not None
+
+    # Age the alert out of the 24h window
+    past = datetime.now(timezone.utc) - timedelta(hours=25)
+    Alert.query.update({Alert.created_at: past})
+    risk.stale_at = past + timedelta(hours=24)
+    db.session.commit()
+
+    res = client.get('/analytics/dashboard/summary', headers={'Authorization': f'Token {nurse.api_token}'})
+    assert res.get_json()['patients_at_risk_count'] == 0
+    db.session.expire_all()
+    assert db.session.get(PatientRisk, pid).score == 2
+    assert db.session.get(PatientRisk, pid).stale_at is None
+
+
+def test_first_scores_from_two_workers_do_not_collide(app_instance, demo_user_and_patient, monkeypatch):
+    from sqlalchemy import insert
+    from app.utils import risk_assessment
+
+    pid = demo_user_and_patient['patient'].id
+    scores = risk_assessment.calculate_risk_scores
+
+    def racing(patient_ids):
+        # another worker stores this patient's first score while this one is computing
+        with db.engine.begin() as conn:
+            conn.execute(insert(PatientRisk).values(patient_id=pid, score=3))
+        return scores(patient_ids)
+
+    monkeypatch.setattr(risk_assessment, 'calculate_risk_scores', racing)
+    evaluate_readings([{'patient_id': pid, 'heart_rate': 105, 'temperature': 37.0, 'spo2': 97}])
+    db.session.expire_all()
+    assert db.session.get(PatientRisk, pid).score == 7
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from app import db
+from app.models import Alert, Note, Patient, PatientVital
+
+
+def _seed(patient_ids, nurse, n=5):
+    t0 = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    for pid in patient_ids:
+        for i in range(n):
+            db.session.add(PatientVital(patient_id=pid, heart_rate=70 + i, spo2=97, timestamp=t0 + timedelta(minutes=i)))
+            db.session.add(Alert(patient_id=pid, severity='warning', message=f'm{i}', created_at=t0 + timedelta(minutes=i),
+                                 escalated=bool(i % 2), escalated_by=nurse.id if i % 2 else None))
+            db.session.add(Note(patient_id=pid, user_id=nurse.id, content=f'n{i}', timestamp=t0 + timedelta(minutes=i)))
+    db.session.commit()
+    db.session.expire_all()
+
+
+def _expected(objects, **extra):
+    return [{**o.to_dict(), **{k: f(o) for k, f in extra.items()}} for o in objects]
+
+
+def test_lists_match_the_model_shape_without_loading_models(client, demo_user_and_patient):
+    nurse, doctor = demo_user_and_patient['nurse'], demo_user_and_patient['doctor']
+    pid = demo_user_and_patient['patient'].id
+    other = Patient(name='Other')
+    db.session.add(other)
+    db.session.commit()
+    _seed([pid, other.id], nurse)
+    nurse_headers = {'Authorization': f'Token {nurse.api_token}'}
+    client.get('/patients/vitals', headers=nurse_headers)  # warm the identity cache
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        vitals = client.get('/patients/vitals', headers=nurse_headers).get_json()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert len(vitals) == 10 and len(statements) <= 2  # no query per row for patient_name
+
+    by_id = {v.id: v for v in PatientVital.query.all()}
+    assert vitals == _expected([by_id[v['id']] for v in vitals], patient_name=lambda v: v.patient.name)
+    assert client.get(f'/patients/{pid}/vitals', headers=nurse_headers).get_json() == \
+        _expected(PatientVital.query.filter_by(patient_id=pid).order_by(PatientVital.timestamp.desc()).all())
+
+    notes = client.get(f'/patients/{pid}/notes/', headers=nurse_headers).get_json()
+    assert notes == _expected(Note.query.filter_by(patient_id=pid).order_by(Note.timestamp.desc()).all())
+
+    res = client.get('/alerts/?limit=4', headers=nurse_headers)
+    assert res.get_json() == _expected(Alert.query.order_by(Alert.created_at.desc(), Alert.id.desc()).limit(4).all())
+    page2 = client.get(f"/alerts/?limit=4&cursor={res.headers['X-Next-Cursor']}", headers=nurse_headers).get_json()
+    assert [a['id'] for a in page2] == [a.id for a in Alert.query.order_by(
+        Alert.created_at.desc(), Alert.id.desc()).offset(4).limit(4)]
+
+    escalated = client.get('/alerts/?escalated=true', headers={'Authorization': f'Token {doctor.api_token}'})
+    assert escalated.get_json() and all(a['escalated'] for a in escalated.get_json())
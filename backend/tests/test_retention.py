@@ -0,0 +1,77 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, event
+
+from app import db
+from app.models import ArchivedVital, PatientVital, VitalRollup
+from app.utils.retention import archive_vitals
+from app.utils.rollups import compact_rollups
+
+
+def _seed(pid):
+    now = datetime.now(timezone.utc)
+    for days in (45, 44, 40, 10, 1):
+        for i in range(3):
+            db.session.add(PatientVital(patient_id=pid, heart_rate=70 + i, temperature=37.0, spo2=97,
+                                        timestamp=now - timedelta(days=days, minutes=i)))
+    db.session.commit()
+    compact_rollups(settle=False)
+    # old reading that arrives after compaction: not in the rollups yet, so it must stay
+    db.session.add(PatientVital(patient_id=pid, heart_rate=99, timestamp=now - timedelta(days=50)))
+    db.session.commit()
+
+
+def test_archive_moves_only_old_compacted_rows(app_instance, demo_user_and_patient):
+    pid = demo_user_and_patient['patient'].id
+    _seed(pid)
+    rollups = VitalRollup.query.count()
+
+    report = archive_vitals(days=30, dry_run=True)
+    assert report['rows'] == 9 and report['dry_run']
+    assert PatientVital.query.count() == 16
+
+    report = archive_vitals(days=30, batch_size=4)
+    assert (report['rows'], report['batches']) == (9, 3)
+    assert report['destination'] == 'patient_vitals_archive'
+    assert PatientVital.query.count() == 7
+    assert ArchivedVital.query.count() == 9
+    assert PatientVital.query.filter_by(heart_rate=99).count() == 1
+    assert VitalRollup.query.count() == rollups
+
+    assert archive_vitals(days=30)['rows'] == 0
+    assert archive_vitals(days=0)['cutoff'] is None
+
+
+def test_archive_to_ndjson_files(app_instance, demo_user_and_patient, tmp_path):
+    pid = demo_user_and_patient['patient'].id
+    _seed(pid)
+
+    report = archive_vitals(days=30, archive_dir=str(tmp_path))
+    assert report['rows'] == 9
+    files = sorted((tmp_path / 'patient_vitals').glob('*/*.ndjson.gz'))
+    assert files
+    rows = [json.loads(line) for f in files for line in gzip.open(f, 'rt')]
+    assert len(rows) == 9 and {r['patient_id'] for r in rows} == {pid}
+    assert ArchivedVital.query.count() == 0
+    assert PatientVital.query.count() == 7
+
+
+def test_a_batch_taken_by_another_process_is_left_alone(app_instance, demo_user_and_patient, tmp_path):
+    pid = demo_user_and_patient['patient'].id
+    _seed(pid)
+    first = PatientVital.query.filter(PatientVital.heart_rate != 99).order_by(PatientVital.id).first().id
+
+    def other_worker(state):  # deletes one row of the batch just before this worker's DELETE
+        if state.is_delete:
+            state.session.connection().execute(delete(PatientVital).where(PatientVital.id == first))
+
+    event.listen(db.session, 'do_orm_execute', other_worker)
+    try:
+        report = archive_vitals(days=30, archive_dir=str(tmp_path))
+    finally:
+        event.remove(db.session, 'do_orm_execute', other_worker)
+    assert report['rows'] == 0
+    assert not list(tmp_path.rglob('*.gz')) and not list(tmp_path.rglob('*.tmp'))
+    assert PatientVital.query.count() == 16
@@ -0,0 +1,46 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from app import db
+from app.models import Alert, AlertRule, Patient, PatientVital
+from app.utils.alert_rules import invalidate_rules
+from app.utils.risk_assessment import calculate_risk_score, calculate_risk_scores
+
+
+def test_batch_scores_match_scalar_scores(app_instance):
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+
+    patients = [Patient(name=f'P{i}', ward=rng.choice([None, 'ICU', 'Ward B'])) for i in range(30)]
+    db.session.add_all(patients)
+    db.session.commit()
+    db.session.add(AlertRule(name='spo2_borderline', vital='spo2', min_value=96, risk_points=4, ward='ICU'))
+    db.session.add(AlertRule(name='temperature_high', vital='temperature', enabled=False, patient_id=patients[0].id))
+
+    for p in patients[1:]:  # patients[0] has no vitals or alerts
+        for _ in range(rng.randint(1, 6)):
+            db.session.add(PatientVital(
+                patient_id=p.id,
+                heart_rate=rng.choice([None, rng.randint(40, 130)]),
+                temperature=round(rng.uniform(36.0, 39.5), 1),
+                spo2=rng.randint(84, 100),
+                timestamp=now - timedelta(minutes=rng.randint(0, 600)),
+            ))
+        for _ in range(rng.randint(0, 4)):
+            db.session.add(Alert(
+                patient_id=p.id,
+                severity=rng.choice(['critical', 'warning', 'normal']),
+                message='x',
+                closed=rng.random() < 0.3,
+                created_at=now - timedelta(hours=rng.uniform(0, 48)),
+            ))
+    db.session.commit()
+    invalidate_rules()
+
+    batch = calculate_risk_scores()
+    assert set(batch) == {p.id for p in patients}
+    assert batch == {p.id: calculate_risk_score(p.id) for p in patients}
+
+    subset = [p.id for p in patients[:5]]
+    assert calculate_risk_scores(subset) == {pid: batch[pid] for pid in subset}
+    assert calculate_risk_scores([]) == {}
@@ -0,0 +1,66 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app import db
+from app.models import Alert, PatientVital
+from app.utils import serialization
+
+
+@dataclass(slots=True)
+class _VitalDTO:
+    patient_id: int
+    timestamp: datetime
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def encoder(request, monkeypatch):
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(serialization, 'orjson', None)
+    return request.param
+
+
+def test_models_encode_like_to_dict(app_instance, demo_user_and_patient, encoder):
+    pid = demo_user_and_patient['patient'].id
+    ts = datetime(2026, 3, 1, 8, 30, 15, 250000, tzinfo=timezone.utc)
+    alert = Alert(id=7, patient_id=pid, severity='critical', message='SpO2 low ✓', created_at=ts,
+                  escalated=True, escalated_at=ts.replace(microsecond=0))
+    vital = PatientVital(id=3, patient_id=pid, heart_rate=72, temperature=37.5, spo2=97, timestamp=ts)
+
+    body = serialization.dumps({'alerts': [alert], 'vital': vital})
+    assert json.loads(body) == {'alerts': [alert.to_dict()], 'vital': vital.to_dict()}
+    assert json.loads(body)['alerts'][0]['escalated_at'] == '2026-03-01T08:30:15+00:00'
+
+
+def test_rows_and_slotted_dtos(app_instance, demo_user_and_patient, encoder):
+    pid = demo_user_and_patient['patient'].id
+    db.session.add(PatientVital(patient_id=pid, heart_rate=80, timestamp=datetime(2026, 3, 1, 9, 0)))
+    db.session.commit()
+    rows = db.session.execute(select(PatientVital.patient_id, PatientVital.heart_rate, PatientVital.timestamp)).all()
+
+    assert json.loads(serialization.dumps(rows)) == [
+        {'patient_id': pid, 'heart_rate': 80, 'timestamp': '2026-03-01T09:00:00'}]
+    assert json.loads(serialization.dumps(_VitalDTO(pid, datetime(2026, 3, 1, 9, 0)))) == {
+        'patient_id': pid, 'timestamp': '2026-03-01T09:00:00'}
+    with pytest.raises(TypeError):
+        serialization.dumps(object())
+
+
+def test_routes_use_the_provider(client, demo_user_and_patient, encoder):
+    headers = {'Authorization': f"Token {demo_user_and_patient['nurse'].api_token}"}
+    pid = demo_user_and_patient['patient'].id
+    res = client.post(f'/patients/{pid}/vitals', json={'heart_rate': 150, 'temperature': 37.0, 'spo2': 98},
+                      headers=headers)
+    assert res.status_code == 201
+
+    alerts = client.get('/alerts/', headers=headers).get_json()
+    created = res.get_json()['alerts_created'][0]
+    assert alerts[0]['id'] == created['id']
+    assert created['created_at'].startswith(alerts[0]['created_at'])  # SQLite reads it back without the offset
+    assert client.post(f'/patients/{pid}/vitals', data='{not json', content_type='application/json',
+                       headers=headers).status_code == 400
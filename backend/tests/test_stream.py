@@ -0,0 +1,84 @@
+import json
+
+from app.utils.events import get_broker
+from app.utils.simulator import evaluate_readings
+
+
+def _next_event(chunks):
+    chunk = next(chunks)
+    chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+    fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+    return fields['event'], json.loads(fields['data'])
+
+
+def test_patient_stream_pushes_vitals_and_alerts(client, app_instance, demo_user_and_patient):
+    nurse = demo_user_and_patient['nurse']
+    pid = demo_user_and_patient['patient'].id
+    headers = {'Authorization': f'Token {nurse.api_token}'}
+
+    res = client.get(f'/stream/patients/{pid}', headers=headers)
+    assert res.status_code == 200
+    assert res.mimetype == 'text/event-stream'
+    chunks = iter(res.response)
+    assert next(chunks).startswith(b'retry:')
+    assert get_broker().stats()['subscribers'] == 1
+
+    evaluate_readings([{'patient_id': pid, 'heart_rate': 75, 'temperature': 38.6, 'spo2': 97}])
+
+    event, data = _next_event(chunks)
+    assert event == 'vital' and data['temperature'] == 38.6
+    event, data = _next_event(chunks)
+    assert event == 'alert' and data['severity'] == 'critical'
+
+    res.close()
+    assert get_broker().stats()['subscribers'] == 0
+
+
+def test_slow_subscribers_drop_oldest_events(app_instance):
+    broker = get_broker()
+    broker.max_queue = 2
+    sub = broker.subscribe(['ward'])
+    for i in range(5):
+        broker.publish('vital', {'n': i}, ['ward', 'patient:1'])
+    broker.publish('vital', {'n': 99}, ['patient:2'])  # not a topic this subscriber listens to
+
+    assert [sub.get(timeout=0)['data']['n'] for _ in range(2)] == [3, 4]
+    assert sub.get(timeout=0) is None
+    assert broker.stats()['dropped_events'] == 3
+
+
+def test_stream_requires_auth(client):
+    assert client.get('/stream/ward').status_code == 401
+
+
+def test_db_tail_streams_rows_stored_by_other_processes(app_instance, demo_user_and_patient):
+    from datetime import datetime, timezone
+    from sqlalchemy import insert
+    from app import db
+    from app.models import PatientVital
+    from app.utils.event_tail import tail_events
+
+    pid = demo_user_and_patient['patient'].id
+    app_instance.config['SSE_DB_TAIL_SECONDS'] = 0.5
+    sub = get_broker().subscribe(['ward'])
+    assert tail_events() == 0  # starts from the newest row
+
+    # this process's own readings come through the tail too, not twice
+    [(vital, _)] = evaluate_readings([{'patient_id': pid, 'heart_rate': 75, 'temperature': 38.6, 'spo2': 97}])
+    assert sub.get(timeout=0) is None
+    assert tail_events() == 2
+    assert [sub.get(timeout=0)['event'] for _ in range(2)] == ['vital', 'alert']
+
+    # another process (e.g. the ASGI ingest) commits id n+2 before n+1
+    def other_process(vital_id, hr):
+        with db.engine.begin() as conn:
+            conn.execute(insert(PatientVital).values(id=vital_id, patient_id=pid, heart_rate=hr,
+                                                     timestamp=datetime.now(timezone.utc)))
+
+    other_process(vital['id'] + 2, 90)
+    assert tail_events() == 1 and sub.get(timeout=0)['data']['heart_rate'] == 90
+    other_process(vital['id'] + 1, 80)
+    assert tail_events() == 1
+    event = sub.get(timeout=0)
+    assert event['event'] == 'vital' and event['data']['heart_rate'] == 80 and event['data']['patient_id'] == pid
+    assert tail_events() == 0
@@ -0,0 +1,54 @@
+from app.models import PatientVital, Alert
+
+
+def test_batch_ingest_reports_per_item_results(client, demo_user_and_patient):
+    nurse = demo_user_and_patient['nurse']
+    patient = demo_user_and_patient['patient']
+    headers = {'Authorization': f'Token {nurse.api_token}'}
+
+    readings = [
+        {'patient_id': patient.id, 'heart_rate': 75, 'temperature': 38.5, 'spo2': 97},
+        {'patient_id': patient.id, 'heart_rate': 300},
+        {'patient_id': 9999, 'spo2': 95},
+        {'patient_id': patient.id, 'spo2': 88, 'timestamp': '2026-01-01T10:00:00Z'},
+        {'patient_id': patient.id},
+    ]
+    res = client.post('/patients/vitals/batch', json={'readings': readings}, headers=headers)
+    assert res.status_code == 201
+    data = res.get_json()
+    assert data['accepted'] == 2
+    assert data['rejected'] == 3
+
+    results = data['results']
+    assert [r['ok'] for r in results] == [True, False, False, True, False]
+    assert 'heart_rate must be between' in results[1]['error']
+    assert results[2]['error'] == 'patient not found'
+    assert any(a['severity'] == 'critical' and 'Temperature' in a['message'] for a in results[0]['alerts_created'])
+    assert results[3]['vital']['timestamp'].startswith('2026-01-01T10:00:00')
+    assert results[3]['vital']['heart_rate'] is None
+
+    assert PatientVital.query.count() == 2
+    assert Alert.query.count() == 2
+
+
+def test_batch_ingest_requires_nurse(client, demo_user_and_patient):
+    doctor = demo_user_and_patient['doctor']
+    patient = demo_user_and_patient['patient']
+
+    res = client.post('/patients/vitals/batch', json={'readings': [{'patient_id': patient.id, 'spo2': 97}]},
+                      headers={'Authorization': f'Token {doctor.api_token}'})
+    assert res.status_code == 403
+
+
+def test_batch_ingest_rejects_empty_and_oversized(client, app_instance, demo_user_and_patient):
+    nurse = demo_user_and_patient['nurse']
+    patient = demo_user_and_patient['patient']
+    headers = {'Authorization': f'Token {nurse.api_token}'}
+
+    res = client.post('/patients/vitals/batch', json={'readings': []}, headers=headers)
+    assert res.status_code == 400
+
+    app_instance.config['VITALS_BATCH_MAX_SIZE'] = 2
+    readings = [{'patient_id': patient.id, 'spo2': 97}] * 3
+    res = client.post('/patients/vitals/batch', json={'readings': readings}, headers=headers)
+    assert res.status_code == 413
@@ -0,0 +1,82 @@
+import struct
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import db
+from app.models import PatientVital
+from app.utils.columnar import RECORD_DTYPE
+
+BASE = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _seed(pid, n=25):
+    db.session.add_all([
+        PatientVital(patient_id=pid, heart_rate=60 + i, temperature=36.5 + i / 10,
+                     spo2=None if i == 3 else 95, timestamp=BASE + timedelta(minutes=i))
+        for i in range(n)
+    ])
+    db.session.commit()
+
+
+def _headers(demo):
+    return {'Authorization': f"Token {demo['nurse'].api_token}"}
+
+
+def test_columnar_json_matches_row_json(client, demo_user_and_patient):
+    pid = demo_user_and_patient['patient'].id
+    _seed(pid)
+    headers = _headers(demo_user_and_patient)
+
+    rows = client.get(f'/patients/{pid}/vitals?limit=10', headers=headers)
+    cols = client.get(f'/patients/{pid}/vitals?limit=10&format=columnar', headers=headers)
+    assert cols.status_code == 200
+    assert cols.headers['X-Next-Cursor'] == rows.headers['X-Next-Cursor']
+
+    data = cols.get_json()
+    expected = rows.get_json()
+    assert data['heart_rate'] == [r['heart_rate'] for r in expected]
+    assert data['spo2'] == [r['spo2'] for r in expected]
+    assert data['timestamp'] == [
+        int(datetime.fromisoformat(r['timestamp']).replace(tzinfo=timezone.utc).timestamp() * 1000)
+        for r in expected
+    ]
+
+    data = client.get(f'/patients/vitals?patient_id={pid}&format=columnar', headers=headers).get_json()
+    assert data['patient_id'] == [pid] * 25 and len(data['temperature']) == 25
+
+
+def test_packed_binary_export_streams_every_row(client, app_instance, demo_user_and_patient):
+    pid = demo_user_and_patient['patient'].id
+    _seed(pid)
+    app_instance.config['EXPORT_BATCH_SIZE'] = 7
+
+    res = client.get(f'/patients/{pid}/vitals.bin', query_string={'start': (BASE + timedelta(minutes=2)).isoformat()},
+                     headers=_headers(demo_user_and_patient))
+    assert res.status_code == 200
+    assert res.mimetype == 'application/octet-stream'
+
+    # struct equivalent of RECORD_DTYPE
+    assert [name for name, _ in RECORD_DTYPE] == ['timestamp', 'heart_rate', 'temperature', 'spo2']
+    records = list(struct.iter_unpack('<qfff', res.data))
+    assert len(records) == 23
+    ts, hr, temp, spo2 = records[0]
+    assert ts == int((BASE + timedelta(minutes=2)).timestamp() * 1000)
+    assert hr == 62 and temp == pytest.approx(36.7)
+    assert records[1][3] != records[1][3]  # missing spo2 is NaN
+    assert [r[0] for r in records] == sorted(r[0] for r in records)
+
+
+def test_arrow_export(client, app_instance, demo_user_and_patient):
+    pa = pytest.importorskip('pyarrow')
+    pid = demo_user_and_patient['patient'].id
+    _seed(pid)
+    app_instance.config['EXPORT_BATCH_SIZE'] = 10
+
+    res = client.get(f'/patients/{pid}/vitals.arrow', headers=_headers(demo_user_and_patient))
+    assert res.status_code == 200
+    table = pa.ipc.open_stream(res.data).read_all()
+    assert table.num_rows == 25
+    assert table.column_names == ['timestamp', 'heart_rate', 'temperature', 'spo2']
+    assert table.column('spo2').null_count == 1
+    assert table.column('heart_rate').to_pylist() == list(range(60, 85))
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from app import db
+from app.models import Alert, PatientVital
+from app.utils.write_behind import get_write_behind_queue
+
+
+@pytest.fixture
+def write_behind(app_instance):
+    app_instance.config.update({'INGEST_MODE': 'write_behind', 'INGEST_FLUSH_ROWS': 3, 'INGEST_FLUSH_MS': 60000})
+    queue = get_write_behind_queue(app_instance)
+    yield queue
+    queue.flush()
+
+
+def _headers(demo):
+    return {'Authorization': f"Token {demo['nurse'].api_token}"}
+
+
+@pytest.fixture
+def commits():
+    seen = []
+
+    def after_commit(session):
+        seen.append(threading.current_thread().name)
+
+    db.event.listen(db.session, 'after_commit', after_commit)
+    yield seen
+    db.event.remove(db.session, 'after_commit', after_commit)
+
+
+def test_readings_are_queued_and_group_committed(client, demo_user_and_patient, write_behind, commits):
+    pid = demo_user_and_patient['patient'].id
+    for hr in (70, 72):
+        res = client.post(f'/patients/{pid}/vitals', json={'heart_rate': hr, 'spo2': 97}, headers=_headers(demo_user_and_patient))
+        assert res.status_code == 202 and res.get_json()['queued'] is True
+    assert PatientVital.query.count() == 0 and write_behind.stats()['queued'] == 2
+
+    # the third reading reaches INGEST_FLUSH_ROWS: one transaction for all three
+    client.post(f'/patients/{pid}/vitals', json={'heart_rate': 120, 'spo2': 97}, headers=_headers(demo_user_and_patient))
+    assert write_behind.flush()
+    db.session.expire_all()
+    assert [v.heart_rate for v in PatientVital.query.order_by(PatientVital.id)] == [70, 72, 120]
+    assert Alert.query.count() == 1
+    assert commits.count('ingest-writer') == 1
+    assert write_behind.stats()['written'] == 3
+
+
+def test_critical_readings_are_written_before_responding(client, demo_user_and_patient, write_behind):
+    pid = demo_user_and_patient['patient'].id
+    client.post(f'/patients/{pid}/vitals', json={'heart_rate': 70}, headers=_headers(demo_user_and_patient))
+    res = client.post(f'/patients/{pid}/vitals', json={'spo2': 85}, headers=_headers(demo_user_and_patient))
+    assert res.status_code == 201
+    assert [a['severity'] for a in res.get_json()['alerts_created']] == ['critical']
+    # the earlier queued reading went out in the same flush
+    assert PatientVital.query.count() == 2
+    assert write_behind.stats()['urgent_flushes'] == 1
+
+
+def test_full_queue_applies_back_pressure(client, demo_user_and_patient, write_behind, monkeypatch):
+    pid = demo_user_and_patient['patient'].id
+    monkeypatch.setattr(write_behind, 'max_size', 1)
+    monkeypatch.setattr(write_behind, 'flush_rows', 10)
+    assert client.post(f'/patients/{pid}/vitals', json={'heart_rate': 70}, headers=_headers(demo_user_and_patient)).status_code == 202
+    res = client.post(f'/patients/{pid}/vitals', json={'heart_rate': 71}, headers=_headers(demo_user_and_patient))
+    assert res.status_code == 503 and res.headers['Retry-After'] == '1'
+    assert write_behind.stats()['rejected'] == 1
+
+
+def test_critical_reading_still_queued_after_the_timeout_is_accepted(client, app_instance, demo_user_and_patient,
+                                                                     write_behind, monkeypatch):
+    from app.utils import write_behind as module
+
+    pid = demo_user_and_patient['patient'].id
+    registered = []
+    monkeypatch.setattr(module.atexit, 'register', registered.append)
+    app_instance.config['INGEST_URGENT_TIMEOUT_SECONDS'] = 0.05
+    monkeypatch.setattr(write_behind, '_start', lambda: None)  # writer stalled
+
+    res = client.post(f'/patients/{pid}/vitals', json={'spo2': 85}, headers=_headers(demo_user_and_patient))
+    assert res.status_code == 202 and res.get_json()['queued'] is True
+
+    monkeypatch.setattr(write_behind, '_start', module.WriteBehindQueue._start.__get__(write_behind))
+    write_behind._start()
+    assert write_behind.flush()
+    assert PatientVital.query.count() == 1 and Alert.query.count() == 1  # written once, by the queue
+
+    # a restarted writer thread does not register another exit flush
+    write_behind._thread = None
+    write_behind._start()
+    assert len(registered) == 1
@@ -0,0 +1,44 @@
+"""
+CLI tool to move old patient vitals out of the hot table.
+
+Rows older than --days that are already in the rollups go to the
+patient_vitals_archive table, or to gzipped NDJSON files under --archive-dir.
+The web workers run the same job every RETENTION_INTERVAL_SECONDS when
+VITALS_RETENTION_DAYS is set.
+
+Usage examples:
+  python tools/archive_vitals.py --days 90 --dry-run
+  python tools/archive_vitals.py --days 90 --archive-dir /var/lib/carewatch/archive
+  python tools/archive_vitals.py --days 30 --batch-size 2000 --max-batches 100
+"""
+import argparse
+
+from app import create_app
+from app.utils.retention import archive_vitals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive old patient vitals')
+    parser.add_argument('--days', type=int, default=None, help='Retention in days (default VITALS_RETENTION_DAYS)')
+    parser.add_argument('--batch-size', type=int, default=None, help='Rows moved per transaction')
+    parser.add_argument('--archive-dir', default=None, help='Write gzipped NDJSON here instead of the archive table')
+    parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches')
+    parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be archived')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        report = archive_vitals(days=args.days, batch_size=args.batch_size, archive_dir=args.archive_dir,
+                                dry_run=args.dry_run, max_batches=args.max_batches)
+
+    if report['cutoff'] is None:
+        print('Retention disabled: pass --days or set VITALS_RETENTION_DAYS')
+    elif report['dry_run']:
+        print(f"Would archive {report['rows']} vitals older than {report['cutoff']} to {report['destination']}")
+    else:
+        print(f"Archived {report['rows']} vitals older than {report['cutoff']} to {report['destination']} "
+              f"in {report['batches']} batches, {report['seconds']:.1f}s ({report['rows_per_sec']:.0f} rows/sec)")
+
+
+if __name__ == '__main__':
+    main()
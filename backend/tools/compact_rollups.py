@@ -0,0 +1,47 @@
+"""
+CLI tool to fold new vitals into the 1-min / 15-min / 1-hour rollup tables.
+
+The web workers run the same job in a background thread every
+ROLLUP_COMPACT_INTERVAL_SECONDS; use this when background workers are disabled
+or to backfill after an import.
+
+Usage examples:
+  python tools/compact_rollups.py --once
+  python tools/compact_rollups.py --interval 30
+"""
+import argparse
+import time
+
+from app import create_app
+from app.utils.rollups import compact_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact patient vitals into rollup tables')
+    parser.add_argument('--interval', type=float, default=60.0, help='Seconds between compaction runs')
+    parser.add_argument('--batch-size', type=int, default=None, help='Vitals per committed batch')
+    parser.add_argument('--once', action='store_true', help='Compact everything available now and exit')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        if args.once:
+            # settle=False: nothing else is expected to be writing during a one-off backfill
+            n = compact_rollups(batch_size=args.batch_size, settle=False)
+            print(f'Compacted {n} vitals')
+            return
+
+        try:
+            while True:
+                t0 = time.perf_counter()
+                n = compact_rollups(batch_size=args.batch_size)
+                if n:
+                    print(f'Compacted {n} vitals in {time.perf_counter() - t0:.2f}s')
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            print('\nCompaction stopped by user')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+CLI tool to drain the alert side-effect outbox (escalation emails).
+
+The web workers run the same dispatcher in a background thread every
+OUTBOX_DISPATCH_INTERVAL_SECONDS; set that to 0 and run this as its own
+process to keep side-effects off the request workers. Several copies can run
+against PostgreSQL/MySQL (rows are claimed with FOR UPDATE SKIP LOCKED).
+
+Usage examples:
+  python tools/dispatch_outbox.py --once
+  python tools/dispatch_outbox.py --interval 1 --batch-size 1000
+"""
+import argparse
+import time
+
+from app import create_app
+from app.utils.mailer import get_notifier
+from app.utils.outbox import dispatch_outbox, get_dispatch_stats, pending_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dispatch pending outbox events')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when the outbox is empty')
+    parser.add_argument('--batch-size', type=int, default=None, help='Events claimed per batch')
+    parser.add_argument('--once', action='store_true', help='Dispatch everything pending now and exit')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        if args.once:
+            t0 = time.perf_counter()
+            n = dispatch_outbox(limit=args.batch_size, max_batches=10 ** 9)
+            get_notifier().close()  # closes the SMTP connection
+            print(f'Dispatched {n} events in {time.perf_counter() - t0:.2f}s ({pending_count()} left)')
+            return
+
+        try:
+            while True:
+                t0 = time.perf_counter()
+                n = dispatch_outbox(limit=args.batch_size)
+                if n:
+                    stats = get_dispatch_stats().as_dict()
+                    print(f"Dispatched {n} events in {time.perf_counter() - t0:.2f}s "
+                          f"(total {stats['dispatched']}, failed {stats['failed']}, "
+                          f"{stats['events_per_second']} events/sec)")
+                else:
+                    time.sleep(args.interval)
+        except KeyboardInterrupt:
+            print('\nDispatcher stopped by user')
+        finally:
+            get_notifier().close()
+
+
+if __name__ == '__main__':
+    main()